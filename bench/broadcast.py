@@ -0,0 +1,88 @@
+""" Measure the CPU time used to send a packet to many recipients.
+
+Like WorldServer.broadcast, the same packet object is queued to every
+recipient connection, which then serializes it with its own session cipher.
+Recipients are simulated by their SessionCipher only; packets are serialized
+as connections do for their batches, a header and a body per packet.
+
+Usage: python -m bench.broadcast [--recipients 200] [--broadcasts 200]
+"""
+
+import argparse
+import os
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.common.crypto.session_cipher import SessionCipher
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.base_object import (
+    ObjectType, OBJECT_TYPE_TO_FLAGS )
+from durator.world.game.object.type.player import Player
+from durator.world.game.player_spawn_packet import (
+    PlayerSpawnPacket, PLAYER_SPAWN_FIELDS )
+from durator.world.game.update_object_packet import (
+    UpdateType, UpdateObjectPacket )
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--recipients", type = int, default = 200,
+        help = "number of connections receiving each broadcast"
+    )
+    argparser.add_argument(
+        "--broadcasts", type = int, default = 200,
+        help = "number of packets broadcast"
+    )
+    args = argparser.parse_args()
+
+    player = _create_player()
+    ciphers = [ SessionCipher(os.urandom(40))
+                for _ in range(args.recipients) ]
+    packet_factories = [
+        ("movement", lambda: _create_movement_packet(player)),
+        ("spawn", lambda: _create_spawn_packet(player))
+    ]
+
+    print("{} recipients per broadcast".format(args.recipients))
+    print("{:>10} {:>16} {:>16}".format(
+        "packet", "CPU us/broadcast", "CPU us/recipient"
+    ))
+    for name, packet_factory in packet_factories:
+        start = time.process_time()
+        for _ in range(args.broadcasts):
+            packet = packet_factory()
+            for cipher in ciphers:
+                packet.to_buffers(cipher)
+        duration = time.process_time() - start
+        print("{:>10} {:>16.1f} {:>16.2f}".format(
+            name,
+            duration / args.broadcasts * 1000000,
+            duration / (args.broadcasts * args.recipients) * 1000000
+        ))
+
+
+def _create_player():
+    player = Player()
+    for field in PLAYER_SPAWN_FIELDS:
+        player.set(field, 0)
+    player.set(ObjectField.GUID, 1)
+    player.set(ObjectField.TYPE, OBJECT_TYPE_TO_FLAGS[ObjectType.PLAYER])
+    player.movement.position = player.position
+    return player
+
+
+def _create_movement_packet(player):
+    infos = { "object": player, "is_player": False }
+    return UpdateObjectPacket(UpdateType.MOVEMENT, infos)
+
+
+def _create_spawn_packet(player):
+    infos = { "object": player, "is_player": False }
+    return PlayerSpawnPacket(infos)
+
+
+if __name__ == "__main__":
+    main()
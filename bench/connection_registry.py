@@ -0,0 +1,122 @@
+""" Compare targeted broadcasts with a scan of all connections and with the
+connection registry.
+
+Synthetic connections are all in world, and each broadcast targets a few
+random players, like a chat channel message or a world tick for players in an
+area. The scan is the previous implementation of WorldServer.broadcast,
+checking the eligibility of every connection.
+
+Usage: python -m bench.connection_registry [--connections 500] [--targets 10]
+"""
+
+import argparse
+import random
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.world.world_connection_state import WorldConnectionState
+from durator.world.world_server import WorldServer
+
+
+class FakePlayer(object):
+
+    def __init__(self, guid):
+        self.guid = guid
+        self.map_id = 0
+
+
+class FakeConnection(object):
+
+    def __init__(self, guid):
+        self.state = WorldConnectionState.IN_WORLD
+        self.player = FakePlayer(guid)
+        self.num_packets = 0
+
+    def queue_packet(self, packet):
+        self.num_packets += 1
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--connections", type = int, default = 500,
+        help = "number of connections in world"
+    )
+    argparser.add_argument(
+        "--targets", type = int, nargs = "+", default = [1, 10, 100],
+        help = "numbers of players targeted by each broadcast"
+    )
+    argparser.add_argument(
+        "--broadcasts", type = int, default = 2000,
+        help = "number of broadcasts for each test"
+    )
+    args = argparser.parse_args()
+
+    server = WorldServer()
+    connections = [ FakeConnection(guid)
+                    for guid in range(1, args.connections + 1) ]
+    for connection in connections:
+        server.connection_registry.add(connection)
+        server.connection_registry.set_player_guid(
+            connection, connection.player.guid
+        )
+
+    print("{} connections in world".format(args.connections))
+    print("{:>10} {:>10} {:>14} {:>12}".format(
+        "method", "targets", "broadcasts/s", "us/broadcast"
+    ))
+    in_world = WorldConnectionState.IN_WORLD
+    methods = [
+        ("scan", lambda guids: _broadcast_by_scan(
+            connections, None, state = in_world, guids = guids
+        )),
+        ("registry", lambda guids: server.broadcast(
+            None, state = in_world, guids = guids
+        ))
+    ]
+    for num_targets in args.targets:
+        for name, method in methods:
+            random.seed(0)
+            guid_lists = [
+                random.sample(range(1, args.connections + 1), num_targets)
+                for _ in range(args.broadcasts)
+            ]
+            start = time.perf_counter()
+            for guids in guid_lists:
+                method(guids)
+            duration = time.perf_counter() - start
+            print("{:>10} {:>10} {:>14.0f} {:>12.1f}".format(
+                name,
+                num_targets,
+                args.broadcasts / duration,
+                duration / args.broadcasts * 1000000
+            ))
+
+
+def _broadcast_by_scan(connections, packet, state = None, guids = None,
+                       map_id = None):
+    for connection in connections:
+        eligible = _get_broadcast_eligibility(
+            connection, state, guids, map_id
+        )
+        if eligible:
+            connection.queue_packet(packet)
+
+
+def _get_broadcast_eligibility(connection, state, guids, map_id):
+    state_condition = ( state is None
+                        or connection.state == state )
+    guid_condition = ( guids is None
+                       or ( connection.player
+                            and connection.player.guid in guids ) )
+    map_condition = ( map_id is None
+                      or ( connection.player
+                           and connection.player.map_id == map_id ) )
+    eligible = state_condition and guid_condition and map_condition
+    return eligible
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+""" Compare the movements relayed to the players around with and without the
+heartbeat filter.
+
+Synthetic players run in straight lines for a few seconds, then turn for a
+moment, and sometimes stop; their clients send a heartbeat every 500 ms while
+moving and a packet at each state change. Positions get a small random error,
+like slopes and collisions do. Each movement sent is relayed to all the other
+players, as a MovementRelayPacket.
+
+Usage: python -m bench.heartbeat_filter [--players 100] [--duration 60]
+"""
+
+import argparse
+import math
+import random
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.world.game.movement import Movement, MovementFlags
+from durator.world.game.movement_filter import MovementFilter
+from durator.world.game.movement_relay_packet import MovementRelayPacket
+from durator.world.game.object.type.unit import DEFAULT_SPEEDS
+from durator.world.opcodes import OpCode
+
+
+HEARTBEAT_PERIOD = 500
+STEP = 100
+
+# Filter settings: name, error threshold and max interval.
+FILTER_CONFIGS = [
+    ("disabled", None, None),
+    ("0.5/1000", 0.5, 1000),
+    ("1.0/1000", 1.0, 1000),
+    ("2.0/2000", 2.0, 2000)
+]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 100,
+        help = "number of players in range of each other"
+    )
+    argparser.add_argument(
+        "--duration", type = float, default = 60.0,
+        help = "simulated seconds"
+    )
+    args = argparser.parse_args()
+
+    random.seed(0)
+    sessions = [ _record_session(args.duration)
+                 for _ in range(args.players) ]
+    num_packets = sum(len(session) for session in sessions)
+    print("{} players, {:.0f} simulated seconds, {:.1f} packets/s each".format(
+        args.players, args.duration, num_packets / args.players / args.duration
+    ))
+    print("{:>10} {:>12} {:>12} {:>12} {:>12}".format(
+        "filter", "sent/s", "suppressed", "relay KiB/s", "us/packet"
+    ))
+    for name, threshold, max_interval in FILTER_CONFIGS:
+        filters = [ _create_filter(threshold, max_interval)
+                    for _ in range(args.players) ]
+        num_bytes = 0
+        cpu_start = time.process_time()
+        for movement_filter, session in zip(filters, sessions):
+            for opcode, movement in session:
+                if movement_filter.should_send(
+                    opcode, movement, DEFAULT_SPEEDS
+                ):
+                    packet = MovementRelayPacket(
+                        opcode, 1, movement.to_bytes()
+                    )
+                    num_bytes += ( len(packet.to_socket())
+                                   * (args.players - 1) )
+        cpu_time = time.process_time() - cpu_start
+
+        num_sent = sum(f.get_stats()["sent"] for f in filters)
+        num_suppressed = sum(f.get_stats()["suppressed"] for f in filters)
+        print("{:>10} {:>12.0f} {:>11.1%} {:>12.1f} {:>12.2f}".format(
+            name,
+            num_sent / args.duration,
+            num_suppressed / num_packets,
+            num_bytes / args.duration / 1024,
+            cpu_time / num_packets * 1000000
+        ))
+
+
+def _create_filter(threshold, max_interval):
+    movement_filter = MovementFilter()
+    movement_filter.ENABLED = threshold is not None
+    if threshold is not None:
+        movement_filter.ERROR_THRESHOLD = threshold
+        movement_filter.MAX_INTERVAL = max_interval
+    return movement_filter
+
+
+def _record_session(duration):
+    """ Return the list of (opcode, Movement) sent by a client for that
+    duration. Each phase lasts a few seconds: running straight, turning while
+    running, or standing still. """
+    forward = MovementFlags.FORWARD.value
+    turning = forward | MovementFlags.TURN_LEFT.value
+    phases = [
+        (OpCode.MSG_MOVE_START_FORWARD, forward, 2000, 8000),
+        (OpCode.MSG_MOVE_START_TURN_LEFT, turning, 300, 1500),
+        (OpCode.MSG_MOVE_STOP_TURN, forward, 2000, 8000),
+        (OpCode.MSG_MOVE_STOP, 0, 1000, 4000)
+    ]
+    session = []
+    x, y, o = 0.0, 0.0, random.uniform(0, 2 * math.pi)
+    now = 0
+    phase_index = 0
+    while now < duration * 1000:
+        opcode, flags, min_length, max_length = phases[phase_index]
+        phase_end = now + random.randint(min_length, max_length)
+        session.append((opcode, _create_movement(flags, now, x, y, o)))
+        last_heartbeat = now
+        while now < phase_end:
+            now += STEP
+            if flags & forward:
+                distance = DEFAULT_SPEEDS["run"] * STEP / 1000
+                x += math.cos(o) * distance + random.gauss(0, 0.05)
+                y += math.sin(o) * distance + random.gauss(0, 0.05)
+            if flags & MovementFlags.TURN_LEFT.value:
+                o += DEFAULT_SPEEDS["turn"] * STEP / 1000
+            if flags and now - last_heartbeat >= HEARTBEAT_PERIOD:
+                session.append((
+                    OpCode.MSG_MOVE_HEARTBEAT,
+                    _create_movement(flags, now, x, y, o)
+                ))
+                last_heartbeat = now
+        phase_index = (phase_index + 1) % len(phases)
+    return session
+
+
+def _create_movement(flags, now, x, y, o):
+    movement = Movement()
+    movement.flags = flags
+    movement.time = now
+    movement.position.x = x
+    movement.position.y = y
+    movement.position.o = o
+    return movement
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+""" Compare the Movement codec with the previous one, reading the payload
+through a BytesIO and concatenating bytes.
+
+The heartbeats are recorded from synthetic clients rather than from a real
+capture: most are plain runs, some are falling, swimming or on a transport, in
+the proportions given on the command line. The previous codec is reproduced
+here, with its Position and JumpData classes without __slots__.
+
+Usage: python -m bench.movement [--heartbeats 20000]
+"""
+
+import argparse
+import io
+import random
+import time
+from struct import Struct
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.world.game.movement import Movement, MovementFlags
+from pyshgck.bin import read_struct
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--heartbeats", type = int, default = 20000,
+        help = "number of recorded heartbeats"
+    )
+    argparser.add_argument(
+        "--special", type = float, default = 0.1,
+        help = "ratio of falling, swimming or transport heartbeats"
+    )
+    argparser.add_argument(
+        "--rounds", type = int, default = 5,
+        help = "rounds over the heartbeats, the best one is kept"
+    )
+    args = argparser.parse_args()
+
+    heartbeats = _record_heartbeats(args.heartbeats, args.special)
+    print("{} heartbeats, {:.0%} falling, swimming or on transport".format(
+        len(heartbeats), args.special
+    ))
+    print("{:>10} {:>8} {:>10} {:>10}".format(
+        "codec", "step", "us/packet", "speedup"
+    ))
+
+    parsed = [ _OldMovement.from_bytes(data) for data in heartbeats ]
+    old_parse = _best_time(args.rounds, lambda: [
+        _OldMovement.from_bytes(data) for data in heartbeats
+    ])
+    old_encode = _best_time(args.rounds, lambda: [
+        movement.to_bytes() for movement in parsed
+    ])
+
+    parsed = [ Movement.from_bytes(data) for data in heartbeats ]
+    assert [ movement.to_bytes() for movement in parsed ] == heartbeats
+    new_parse = _best_time(args.rounds, lambda: [
+        Movement.from_bytes(data) for data in heartbeats
+    ])
+    new_encode = _best_time(args.rounds, lambda: [
+        movement.to_bytes() for movement in parsed
+    ])
+
+    for name, step, duration, reference in (
+        ("bytesio", "parse", old_parse, old_parse),
+        ("bytesio", "encode", old_encode, old_encode),
+        ("struct", "parse", new_parse, old_parse),
+        ("struct", "encode", new_encode, old_encode)
+    ):
+        print("{:>10} {:>8} {:>10.2f} {:>9.1f}x".format(
+            name, step, duration / len(heartbeats) * 1000000,
+            reference / duration
+        ))
+
+
+def _best_time(rounds, func):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def _record_heartbeats(num_heartbeats, special_ratio):
+    random.seed(0)
+    special_flags = [
+        MovementFlags.IS_FALLING.value,
+        MovementFlags.IS_SWIMMING.value,
+        MovementFlags.ON_TRANSPORT.value,
+        MovementFlags.IS_FALLING.value | MovementFlags.SPLINE_ELEVATION.value
+    ]
+    heartbeats = []
+    for index in range(num_heartbeats):
+        movement = Movement()
+        movement.flags = MovementFlags.FORWARD.value
+        if random.random() < special_ratio:
+            movement.flags |= random.choice(special_flags)
+        movement.time = index * 500
+        movement.position.x = random.uniform(-9000.0, -8000.0)
+        movement.position.y = random.uniform(0.0, 1000.0)
+        movement.position.z = random.uniform(0.0, 100.0)
+        movement.position.o = random.uniform(0.0, 6.28)
+        movement.transport_guid = 0xF120000000001234
+        movement.transport_position.x = random.uniform(-10.0, 10.0)
+        movement.swim_pitch = random.uniform(-1.5, 1.5)
+        movement.jump_data.time = index * 500
+        movement.jump_data.velocity = random.uniform(-8.0, 0.0)
+        movement.spline_elevation_unk = random.uniform(0.0, 5.0)
+        heartbeats.append(movement.to_bytes())
+    return heartbeats
+
+
+class _OldPosition(object):
+
+    BIN = Struct("<4f")
+
+    def __init__(self, x = 0.0, y = 0.0, z = 0.0, o = 0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.o = o
+
+    @staticmethod
+    def from_io(bytes_io):
+        position = _OldPosition()
+        position_data = read_struct(bytes_io, _OldPosition.BIN)
+        position.x = position_data[0]
+        position.y = position_data[1]
+        position.z = position_data[2]
+        position.o = position_data[3]
+        return position
+
+    def to_bytes(self):
+        return self.BIN.pack(self.x, self.y, self.z, self.o)
+
+
+class _OldMovement(object):
+
+    HEADER_BIN           = Struct("<2I")
+    TRANSPORT_HEADER_BIN = Struct("<Q")
+    SWIMMING_BIN         = Struct("<f")
+    SPLINE_ELEVATION_BIN = Struct("<f")
+
+    def __init__(self):
+        self.flags = 0
+        self.time = 0
+        self.position = _OldPosition()
+        self.transport_guid = 0
+        self.transport_position = _OldPosition()
+        self.swim_pitch = 0.0
+        self.jump_data = _OldJumpData()
+        self.spline_elevation_unk = 0.0
+
+    @staticmethod
+    def from_bytes(data):
+        movement = _OldMovement()
+        data_io = io.BytesIO(data)
+
+        header_data = read_struct(data_io, _OldMovement.HEADER_BIN)
+        movement.flags, movement.time = header_data
+        movement.position = _OldPosition.from_io(data_io)
+
+        if movement.flags & MovementFlags.ON_TRANSPORT.value:
+            transport_data = read_struct(
+                data_io, _OldMovement.TRANSPORT_HEADER_BIN
+            )
+            movement.transport_guid = transport_data[0]
+            movement.transport_position = _OldPosition.from_io(data_io)
+
+        if movement.flags & MovementFlags.IS_SWIMMING.value:
+            swimming_data = read_struct(data_io, _OldMovement.SWIMMING_BIN)
+            movement.swim_pitch = swimming_data[0]
+
+        if movement.flags & MovementFlags.IS_FALLING.value:
+            movement.jump_data = _OldJumpData.from_io(data_io)
+
+        if movement.flags & MovementFlags.SPLINE_ELEVATION.value:
+            elevation_data = read_struct(
+                data_io, _OldMovement.SPLINE_ELEVATION_BIN
+            )
+            movement.spline_elevation_unk = elevation_data[0]
+
+        return movement
+
+    def to_bytes(self):
+        data = b""
+        data += self.HEADER_BIN.pack(self.flags, self.time)
+        data += self.position.to_bytes()
+
+        if self.flags & MovementFlags.ON_TRANSPORT.value:
+            data += self.TRANSPORT_HEADER_BIN.pack(self.transport_guid)
+            data += self.transport_position.to_bytes()
+
+        if self.flags & MovementFlags.IS_SWIMMING.value:
+            data += self.SWIMMING_BIN.pack(self.swim_pitch)
+
+        if self.flags & MovementFlags.IS_FALLING.value:
+            data += self.jump_data.to_bytes()
+
+        if self.flags & MovementFlags.SPLINE_ELEVATION.value:
+            data += self.SPLINE_ELEVATION_BIN.pack(self.spline_elevation_unk)
+
+        return data
+
+
+class _OldJumpData(object):
+
+    BIN = Struct("<I4f")
+
+    def __init__(self):
+        self.time = 0
+        self.velocity = 0.0
+        self.sin = 0.0
+        self.cos = 0.0
+        self.xy_speed = 0.0
+
+    @staticmethod
+    def from_io(bytes_io):
+        jump = _OldJumpData()
+        data = read_struct(bytes_io, _OldJumpData.BIN)
+        jump.time, jump.velocity, jump.sin, jump.cos, jump.xy_speed = data
+        return jump
+
+    def to_bytes(self):
+        return self.BIN.pack(
+            self.time, self.velocity, self.sin, self.cos, self.xy_speed
+        )
+
+
+if __name__ == "__main__":
+    main()
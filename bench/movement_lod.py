@@ -0,0 +1,83 @@
+""" Compare the world updates traffic sent with and without movement level of
+detail tiers.
+
+The session is the one of bench.world_tick, in a crowded city: synthetic
+players spread over a square area, all tracking each other, move regularly
+and their movements are sent by world ticks. Each run sets the tiers, as the
+movement_lod_tiers option does.
+
+Usage: python -m bench.movement_lod [--players 200] [--area-size 400]
+"""
+
+import argparse
+
+import durator.config
+durator.config.DEBUG = False
+
+from bench.world_tick import _run_bench
+from durator.world.game.object.movement_lod import MovementLod
+
+
+LOD_CONFIGS = [
+    ("none", []),
+    ("50/200", [(50.0, 1), (200.0, 2), (float("inf"), 5)]),
+    ("25/100", [(25.0, 1), (100.0, 2), (float("inf"), 5)])
+]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 200,
+        help = "number of players in the area"
+    )
+    argparser.add_argument(
+        "--area-size", type = float, default = 400.0,
+        help = "side of the square area"
+    )
+    argparser.add_argument(
+        "--tick-rate", type = float, default = 10.0,
+        help = "world tick rate"
+    )
+    argparser.add_argument(
+        "--move-rate", type = float, default = 2.0,
+        help = "movement packets per second sent by each player"
+    )
+    argparser.add_argument(
+        "--duration", type = float, default = 5.0,
+        help = "simulated seconds"
+    )
+    argparser.add_argument(
+        "--relay", action = "store_true",
+        help = "relay movements instead of sending update blocks"
+    )
+    args = argparser.parse_args()
+
+    print("{} players in {:.0f}x{:.0f}, {:.0f} moves/s each, {:.0f} Hz".format(
+        args.players, args.area_size, args.area_size, args.move_rate,
+        args.tick_rate
+    ))
+    print("{:>10} {:>12} {:>12} {:>10}".format(
+        "tiers", "packets/s", "KiB/s", "CPU s"
+    ))
+    default_tiers = MovementLod.TIERS
+    try:
+        for name, tiers in LOD_CONFIGS:
+            MovementLod.TIERS = tiers
+            results = _run_bench(
+                args.players, args.tick_rate, args.move_rate, args.duration,
+                movement_relay = args.relay, area_size = args.area_size
+            )
+            num_packets, num_bytes, cpu_time, _, _ = results
+            print("{:>10} {:>12.0f} {:>12.1f} {:>10.2f}".format(
+                name,
+                num_packets / args.duration,
+                num_bytes / args.duration / 1024,
+                cpu_time
+            ))
+    finally:
+        MovementLod.TIERS = default_tiers
+
+
+if __name__ == "__main__":
+    main()
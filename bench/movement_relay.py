@@ -0,0 +1,66 @@
+""" Compare the world updates traffic sent with movement update blocks and
+with relayed MSG_MOVE_* packets.
+
+The session is the one of bench.world_tick: synthetic players in a single area
+move regularly. Moves are sent either as movement update blocks, merged by
+world ticks, or relayed as heartbeats as the movement_relay option does (the
+relayed payload is the movement the client would have sent). CPU time covers
+the whole session, including ticks, and is divided by the moves received.
+
+Usage: python -m bench.movement_relay [--players 100] [--tick-rate 10]
+"""
+
+import argparse
+
+import durator.config
+durator.config.DEBUG = False
+
+from bench.world_tick import _run_bench
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 100,
+        help = "number of players in the area"
+    )
+    argparser.add_argument(
+        "--tick-rates", type = float, nargs = "+", default = [0, 10],
+        help = "world tick rates to test, 0 for per-event updates"
+    )
+    argparser.add_argument(
+        "--move-rate", type = float, default = 5.0,
+        help = "movement packets per second sent by each player"
+    )
+    argparser.add_argument(
+        "--duration", type = float, default = 5.0,
+        help = "simulated seconds"
+    )
+    args = argparser.parse_args()
+
+    num_moves = args.players * int(args.duration * args.move_rate)
+    print("{} players, {:.0f} moves/s each, {:.0f} simulated seconds".format(
+        args.players, args.move_rate, args.duration
+    ))
+    print("{:>10} {:>10} {:>12} {:>12} {:>12}".format(
+        "tick rate", "mode", "packets/s", "KiB/s", "CPU us/move"
+    ))
+    for tick_rate in args.tick_rates:
+        for name, movement_relay in (("update", False), ("relay", True)):
+            results = _run_bench(
+                args.players, tick_rate, args.move_rate, args.duration,
+                movement_relay = movement_relay
+            )
+            num_packets, num_bytes, cpu_time, _, _ = results
+            print("{:>10} {:>10} {:>12.0f} {:>12.1f} {:>12.1f}".format(
+                "per event" if tick_rate == 0
+                else "{:.0f} Hz".format(tick_rate),
+                name,
+                num_packets / args.duration,
+                num_bytes / args.duration / 1024,
+                cpu_time / num_moves * 1000000
+            ))
+
+
+if __name__ == "__main__":
+    main()
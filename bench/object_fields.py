@@ -0,0 +1,129 @@
+""" Measure the memory used by the update fields of players, the time to
+create PlayerSpawnPackets, and the time to serialize update fields in spawn and
+partial update blocks, or field by field with UpdateBlocksBuilder.add.
+
+Synthetic players get all the fields needed to spawn them, like a character
+loaded from the database, and a few skills. Memory is measured with
+tracemalloc, for the players objects and everything they own.
+
+Usage: python -m bench.object_fields [--players 1000] [--skills 20]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.world.game.object.object_fields import (
+    ObjectField, UnitField, PlayerField )
+from durator.world.game.object.object_fields_type import (
+    FieldType, FIELD_TYPE_MAP )
+from durator.world.game.object.type.base_object import (
+    ObjectType, OBJECT_TYPE_TO_FLAGS )
+from durator.world.game.object.type.player import Player
+from durator.world.game.player_spawn_packet import (
+    PlayerSpawnPacket, PLAYER_SPAWN_FIELDS )
+from durator.world.game.update_object_packet import (
+    UpdateType, UpdateObjectPacket, UpdateBlocksBuilder )
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 1000,
+        help = "number of synthetic players"
+    )
+    argparser.add_argument(
+        "--skills", type = int, default = 20,
+        help = "number of skills per player"
+    )
+    argparser.add_argument(
+        "--rounds", type = int, default = 5,
+        help = "number of serializations per player"
+    )
+    args = argparser.parse_args()
+
+    tracemalloc.start()
+    memory_start = tracemalloc.get_traced_memory()[0]
+    players = [ _create_player(guid, args.skills)
+                for guid in range(1, args.players + 1) ]
+    memory = tracemalloc.get_traced_memory()[0] - memory_start
+    tracemalloc.stop()
+
+    print("{} players, {} skills each".format(args.players, args.skills))
+    print("{:>20} {:>12}".format("memory/player", "{:.0f} B".format(
+        memory / args.players
+    )))
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for player in players:
+            infos = { "object": player, "is_player": False }
+            PlayerSpawnPacket(infos)
+    duration = time.perf_counter() - start
+    print("{:>20} {:>12}".format("spawn packet", "{:.1f} us".format(
+        duration / (args.rounds * args.players) * 1000000
+    )))
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for player in players:
+            infos = { "object": player, "is_player": False }
+            PlayerSpawnPacket(infos).get_block_bytes()
+    duration = time.perf_counter() - start
+    print("{:>20} {:>12}".format("spawn block", "{:.1f} us".format(
+        duration / (args.rounds * args.players) * 1000000
+    )))
+
+    fields = [ (field, players[0].get(field))
+               for field in PLAYER_SPAWN_FIELDS ]
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for player in players:
+            builder = UpdateBlocksBuilder()
+            for field, value in fields:
+                builder.add(field, value)
+            builder.to_bytes()
+    duration = time.perf_counter() - start
+    print("{:>20} {:>12}".format("builder add", "{:.1f} us".format(
+        duration / (args.rounds * args.players) * 1000000
+    )))
+
+    start = time.perf_counter()
+    for round_index in range(args.rounds):
+        for player in players:
+            player.set(UnitField.HEALTH, round_index + 2)
+            player.set(PlayerField.COINAGE, round_index + 2)
+            infos = { "object": player, "is_player": False }
+            packet = UpdateObjectPacket(UpdateType.PARTIAL, infos)
+            packet.add_object_fields(player.dirty_mask)
+            player.clear_dirty_fields()
+            packet.get_block_bytes()
+    duration = time.perf_counter() - start
+    print("{:>20} {:>12}".format("partial block", "{:.1f} us".format(
+        duration / (args.rounds * args.players) * 1000000
+    )))
+
+
+def _create_player(guid, num_skills):
+    player = Player()
+    for field in PLAYER_SPAWN_FIELDS:
+        if FIELD_TYPE_MAP[field] == FieldType.FLOAT:
+            player.set(field, 1.0)
+        else:
+            player.set(field, 1)
+    player.set(ObjectField.GUID, guid)
+    player.set(ObjectField.TYPE, OBJECT_TYPE_TO_FLAGS[ObjectType.PLAYER])
+    for slot in range(num_skills):
+        field_value = PlayerField.SKILL_INFO_1_ID.value + slot*3
+        player.set(field_value, slot + 1)
+        player.set(field_value + 1, 1 | 300 << 16)
+        player.set(field_value + 2, 0)
+    player.clear_dirty_fields()
+    return player
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+""" Compare the world updates traffic sent with and without packed GUIDs.
+
+The session is the one of bench.world_tick: synthetic players in a single area
+move regularly and their movements are sent by world ticks. Each run sets the
+update types using packed GUIDs, as the packed_guid_update_types option does.
+With --movement-relay, movements are sent as relayed MSG_MOVE packets.
+
+Usage: python -m bench.packed_guid [--players 100] [--tick-rate 10]
+"""
+
+import argparse
+
+import durator.config
+durator.config.DEBUG = False
+
+from bench.world_tick import _run_bench
+from durator.world.game.update_object_packet import (
+    UpdateType, UpdateObjectPacket )
+
+
+PACKED_GUID_CONFIGS = [
+    ("none", ()),
+    ("movement", (UpdateType.MOVEMENT,)),
+    ("all", tuple(UpdateType))
+]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 100,
+        help = "number of players in the area"
+    )
+    argparser.add_argument(
+        "--tick-rate", type = float, default = 10.0,
+        help = "world tick rate, 0 for per-event updates"
+    )
+    argparser.add_argument(
+        "--move-rate", type = float, default = 5.0,
+        help = "movement packets per second sent by each player"
+    )
+    argparser.add_argument(
+        "--duration", type = float, default = 5.0,
+        help = "simulated seconds"
+    )
+    argparser.add_argument(
+        "--movement-relay", action = "store_true",
+        help = "relay movement packets instead of sending update blocks"
+    )
+    args = argparser.parse_args()
+
+    print("{} players, {:.0f} moves/s each, {:.0f} Hz ticks".format(
+        args.players, args.move_rate, args.tick_rate
+    ))
+    print("{:>10} {:>12} {:>12} {:>12}".format(
+        "packed", "KiB/s", "bytes/packet", "saved KiB/s"
+    ))
+    default_types = UpdateObjectPacket.PACKED_GUID_TYPES
+    try:
+        for name, packed_types in PACKED_GUID_CONFIGS:
+            UpdateObjectPacket.PACKED_GUID_TYPES = packed_types
+            results = _run_bench(
+                args.players, args.tick_rate, args.move_rate, args.duration,
+                movement_relay = args.movement_relay
+            )
+            num_packets, num_bytes, _, bytes_saved, _ = results
+            print("{:>10} {:>12.1f} {:>12.1f} {:>12.1f}".format(
+                name,
+                num_bytes / args.duration / 1024,
+                num_bytes / num_packets,
+                bytes_saved / args.duration / 1024
+            ))
+    finally:
+        UpdateObjectPacket.PACKED_GUID_TYPES = default_types
+
+
+if __name__ == "__main__":
+    main()
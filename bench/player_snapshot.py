@@ -0,0 +1,160 @@
+""" Compare players range queries under contention, with locks and with the
+lock-free player snapshots.
+
+Reader threads ask for the players in range of random players, like the
+interest manager or name queries, while writer threads move random players,
+like movement handlers. With locks, readers use the previous implementation
+of _PlayerManager.players_in_range_of, taking the grid and partition locks;
+with snapshots, moves are published after each of them or once per world tick
+(batched), and readers take no lock.
+
+Usage: python -m bench.player_snapshot [--readers 4] [--writers 4]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from bench.spatial_grid import _create_player, _move
+from durator.config import CONFIG
+from durator.world.game.object.manager import _PlayerManager
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 2000,
+        help = "number of synthetic players"
+    )
+    argparser.add_argument(
+        "--map-size", type = float, default = 17000.0,
+        help = "side of the square map, in world units"
+    )
+    argparser.add_argument(
+        "--readers", type = int, default = 4,
+        help = "number of threads doing range queries"
+    )
+    argparser.add_argument(
+        "--writers", type = int, default = 4,
+        help = "number of threads moving players"
+    )
+    argparser.add_argument(
+        "--duration", type = float, default = 2.0,
+        help = "seconds to run each method"
+    )
+    argparser.add_argument(
+        "--tick-rate", type = float, default = 10.0,
+        help = "snapshots published per second by the batched method"
+    )
+    args = argparser.parse_args()
+
+    print("{} players, {} readers, {} writers, {:.0f} s per method".format(
+        args.players, args.readers, args.writers, args.duration
+    ))
+    print("{:>10} {:>12} {:>12}".format("method", "queries/s", "moves/s"))
+    for method in ("locks", "snapshot", "batched"):
+        num_queries, num_moves = _run_bench(method, args)
+        print("{:>10} {:>12.0f} {:>12.0f}".format(
+            method,
+            num_queries / args.duration,
+            num_moves / args.duration
+        ))
+
+
+def _run_bench(method, args):
+    """ Return the number of queries and moves done by readers and writers
+    running for the bench duration. """
+    random.seed(0)
+    player_manager = _PlayerManager(None)
+    players = [ _create_player(guid, args.map_size)
+                for guid in range(1, args.players + 1) ]
+    for player in players:
+        player_manager._add_to_partition(player, player.map_id)
+    player_manager.batched_snapshots = method == "batched"
+
+    if method == "locks":
+        query = _players_in_range_with_locks
+        move = _update_player_position_with_locks
+    else:
+        query = _PlayerManager.players_in_range_of
+        move = _PlayerManager.update_player_position
+
+    dist_range = float(CONFIG["world"]["update_range"])
+    stop = threading.Event()
+    num_queries = [0] * args.readers
+    num_moves = [0] * args.writers
+
+    def read(index):
+        rand = random.Random(index)
+        while not stop.is_set():
+            player = rand.choice(players)
+            query(player_manager, player, dist_range)
+            num_queries[index] += 1
+
+    def write(index):
+        rand = random.Random(-index - 1)
+        while not stop.is_set():
+            player = rand.choice(players)
+            with player.lock:
+                _move(player, args.map_size)
+            move(player_manager, player)
+            num_moves[index] += 1
+
+    def publish():
+        period = 1 / args.tick_rate
+        while not stop.wait(period):
+            player_manager.publish_snapshot()
+
+    threads = (
+        [ threading.Thread(target = read, args = (index,))
+          for index in range(args.readers) ] +
+        [ threading.Thread(target = write, args = (index,))
+          for index in range(args.writers) ]
+    )
+    if method == "batched":
+        threads.append(threading.Thread(target = publish))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(num_queries), sum(num_moves)
+
+
+def _players_in_range_with_locks(player_manager, ref_player, dist_range):
+    with ref_player.lock:
+        ref_guid = ref_player.guid
+        ref_position = ref_player.position
+
+    partition = player_manager._get_player_partition(ref_guid)
+    if partition is None:
+        return []
+    grid = partition.grid
+    near_guids = grid.guids_near(partition.map_id, ref_position, dist_range)
+    guids_in_range = []
+    for guid in near_guids:
+        if guid == ref_guid:
+            continue
+        base_object = partition.get_object(guid)
+        if base_object is None:
+            continue
+        if ref_position.distance_from(base_object.position) < dist_range:
+            guids_in_range.append(guid)
+    return guids_in_range
+
+
+def _update_player_position_with_locks(player_manager, player):
+    with player.lock:
+        guid = player.guid
+        position = player.position
+    partition = player_manager._get_player_partition(guid)
+    partition.move_object(guid, position)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+""" Compare the computation of the players in range of every player, once per
+tick, with the scalar range queries and with the NumPy proximity engine.
+
+Synthetic players are spread uniformly over a continent-sized map. The scalar
+loop is a snapshot range query (grid cells, then Python distances) for each
+player, as the interest manager does for moving players; the full scan checks
+the distance of every pair with Position.distance_from. The engine computes
+all pairs at once, then builds the visibility sets.
+
+Usage: python -m bench.proximity [--players 1000 5000] [--map-size 17000]
+"""
+
+import argparse
+import random
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from bench.spatial_grid import _create_player, _move
+from durator.world.game.object.interest_manager import InterestManager
+from durator.world.game.object.manager import _PlayerManager
+from durator.world.game.object.proximity_engine import (
+    ProximityEngine, NUMPY_AVAILABLE )
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, nargs = "+", default = [1000, 5000],
+        help = "numbers of synthetic players to test"
+    )
+    argparser.add_argument(
+        "--map-size", type = float, default = 17000.0,
+        help = "side of the square map, in world units"
+    )
+    argparser.add_argument(
+        "--ticks", type = int, default = 5,
+        help = "number of ticks, players move between each"
+    )
+    argparser.add_argument(
+        "--scan-limit", type = int, default = 1000,
+        help = "max number of players to test the full scan with"
+    )
+    args = argparser.parse_args()
+    if not NUMPY_AVAILABLE:
+        print("NumPy is not available.")
+        return
+
+    dist_range = InterestManager.LEAVE_RANGE
+    print("{:.0f}x{:.0f} map, range {:.0f}".format(
+        args.map_size, args.map_size, dist_range
+    ))
+    print("{:>8} {:>10} {:>12} {:>12}".format(
+        "players", "method", "ms/tick", "avg visible"
+    ))
+    for num_players in args.players:
+        random.seed(0)
+        player_manager = _PlayerManager(None)
+        player_manager.proximity_engine = ProximityEngine(dist_range)
+        players = [ _create_player(guid, args.map_size)
+                    for guid in range(1, num_players + 1) ]
+        for player in players:
+            player_manager._add_to_partition(player, player.map_id)
+        player_manager.batched_snapshots = True
+
+        methods = [
+            ("scalar", _visibility_by_range_queries),
+            ("numpy", _visibility_by_engine)
+        ]
+        if num_players <= args.scan_limit:
+            methods.insert(0, ("scan", _visibility_by_scan))
+        for name, method in methods:
+            random.seed(1)
+            duration, num_visible = 0.0, 0
+            for _ in range(args.ticks):
+                for player in players:
+                    _move(player, args.map_size)
+                    player_manager.update_player_position(player)
+                player_manager.publish_snapshot()
+                start = time.perf_counter()
+                visibility = method(player_manager, players, dist_range)
+                duration += time.perf_counter() - start
+                num_visible += sum(len(guids) for guids in visibility.values())
+            print("{:>8} {:>10} {:>12.1f} {:>12.1f}".format(
+                num_players,
+                name,
+                duration / args.ticks * 1000,
+                num_visible / (args.ticks * num_players)
+            ))
+
+
+def _visibility_by_scan(player_manager, players, dist_range):
+    visibility = {}
+    for player in players:
+        visibility[player.guid] = {
+            other.guid for other in players
+            if other is not player
+            and player.position.distance_from(other.position) < dist_range
+        }
+    return visibility
+
+
+def _visibility_by_range_queries(player_manager, players, dist_range):
+    snapshot = player_manager.snapshot
+    visibility = {}
+    for player in players:
+        guid = player.guid
+        visibility[guid] = set(snapshot.guids_in_range_of(
+            guid, player.map_id, player.position, dist_range
+        ))
+    return visibility
+
+
+def _visibility_by_engine(player_manager, players, dist_range):
+    return player_manager.proximity_engine.get_visibility()
+
+
+if __name__ == "__main__":
+    main()
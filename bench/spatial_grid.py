@@ -0,0 +1,108 @@
+""" Compare players range queries with a full scan and with the spatial grid.
+
+Synthetic players are spread uniformly over a continent-sized map, and each
+one in turn moves a bit then asks for the players in its update range, like a
+movement packet would. The full scan is the previous implementation of
+_PlayerManager.players_in_range_of, checking the distance to every player.
+
+Usage: python -m bench.spatial_grid [--players 2000] [--map-size 17000]
+"""
+
+import argparse
+import random
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.config import CONFIG
+from durator.world.game.object.manager import _PlayerManager
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.player import Player
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 2000,
+        help = "number of synthetic players"
+    )
+    argparser.add_argument(
+        "--map-size", type = float, default = 17000.0,
+        help = "side of the square map, in world units"
+    )
+    argparser.add_argument(
+        "--rounds", type = int, default = 3,
+        help = "number of moves per player"
+    )
+    args = argparser.parse_args()
+
+    random.seed(0)
+    player_manager = _PlayerManager(None)
+    players = [ _create_player(guid, args.map_size)
+                for guid in range(1, args.players + 1) ]
+    for player in players:
+        player_manager._add_to_partition(player, player.map_id)
+
+    dist_range = float(CONFIG["world"]["update_range"])
+    print("{} players on a {:.0f}x{:.0f} map, range {:.0f}, cell size {:.0f}"
+          .format(args.players, args.map_size, args.map_size, dist_range,
+                  player_manager.GRID_CELL_SIZE))
+    print("{:>10} {:>12} {:>12} {:>10}".format(
+        "method", "queries/s", "us/query", "avg found"
+    ))
+
+    methods = [
+        ("scan", _players_in_range_by_scan),
+        ("grid", _PlayerManager.players_in_range_of)
+    ]
+    for name, method in methods:
+        random.seed(1)
+        num_queries, num_found = 0, 0
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for player in players:
+                _move(player, args.map_size)
+                player_manager.update_player_position(player)
+                found = method(player_manager, player, dist_range)
+                num_queries += 1
+                num_found += len(found)
+        duration = time.perf_counter() - start
+        print("{:>10} {:>12.0f} {:>12.1f} {:>10.1f}".format(
+            name,
+            num_queries / duration,
+            duration / num_queries * 1000000,
+            num_found / num_queries
+        ))
+
+
+def _create_player(guid, map_size):
+    player = Player()
+    player.set(ObjectField.GUID, guid)
+    player.position.x = random.uniform(-map_size / 2, map_size / 2)
+    player.position.y = random.uniform(-map_size / 2, map_size / 2)
+    return player
+
+
+def _move(player, map_size):
+    """ Move the player a few units, staying in the map. """
+    limit = map_size / 2
+    position = player.position
+    position.x = min(max(position.x + random.uniform(-7, 7), -limit), limit)
+    position.y = min(max(position.y + random.uniform(-7, 7), -limit), limit)
+
+
+def _players_in_range_by_scan(player_manager, ref_player, dist_range):
+    with player_manager.lock:
+        ref_position = ref_player.position
+        guids_in_range = []
+        for player_guid in player_manager.player_maps:
+            player = player_manager.get_player(player_guid)
+            if ref_position.distance_from(player.position) < dist_range:
+                if ref_player.guid != player_guid:
+                    guids_in_range.append(player_guid)
+        return guids_in_range
+
+
+if __name__ == "__main__":
+    main()
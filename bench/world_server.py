@@ -0,0 +1,187 @@
+""" Compare the threaded and asyncio world servers.
+
+For each mode and number of clients, a world server runs in a child process
+while this process opens the client connections. Two things are measured:
+
+- idle CPU: CPU time used by the server while all clients are connected but
+    silent, as a percentage of one core;
+- latency: round-trip time of CMSG_PING packets, sent one at a time over all
+    connections. Pings are legal before authentication so no database is needed.
+
+Usage: python -m bench.world_server [--clients 50 200 1000] [--idle 3]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import socket
+import statistics
+from struct import Struct
+import threading
+import time
+
+import durator.config
+durator.config.DEBUG = False  # packet dumps would dominate the measures
+
+from durator.world.async_world_server import AsyncWorldServer
+from durator.world.opcodes import OpCode
+from durator.world.world_server import WorldServer
+
+
+AUTH_CHALLENGE_SIZE = 8
+
+# Unencrypted client header: uint16 BE size (opcode + data), uint32 LE opcode.
+# Server header: uint16 BE size, uint16 LE opcode. Ping data is an uint32.
+PING_SIZE_BIN = Struct(">H")
+PING_PACKET_SIZE = 8
+PONG_SIZE = 8
+
+MODES = ("threaded", "async")
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--clients", type = int, nargs = "+", default = [50, 200, 1000],
+        help = "numbers of connections to test"
+    )
+    argparser.add_argument(
+        "--idle", type = float, default = 3.0,
+        help = "seconds of idle time to measure"
+    )
+    argparser.add_argument(
+        "--pings", type = int, default = 1000,
+        help = "number of pings to measure latency"
+    )
+    args = argparser.parse_args()
+
+    _raise_files_limit()
+
+    print("{:>9} {:>7} {:>10} {:>12} {:>12}".format(
+        "mode", "clients", "idle CPU", "median RTT", "p99 RTT"
+    ))
+    for num_clients in args.clients:
+        for mode in MODES:
+            idle_cpu, latencies = _run_bench(
+                mode, num_clients, args.idle, args.pings
+            )
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print("{:>9} {:>7} {:>9.1f}% {:>10.3f}ms {:>10.3f}ms".format(
+                mode,
+                num_clients,
+                idle_cpu * 100,
+                statistics.median(latencies) * 1000,
+                p99 * 1000
+            ))
+
+
+def _raise_files_limit():
+    """ Each connection needs a few file descriptors on both sides. """
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+
+
+def _run_bench(mode, num_clients, idle_time, num_pings):
+    """ Return the idle CPU ratio and the list of ping latencies. """
+    parent_pipe, child_pipe = multiprocessing.Pipe()
+    server_process = multiprocessing.Process(
+        target = _run_server, args = (mode, child_pipe)
+    )
+    server_process.start()
+    port = parent_pipe.recv()
+
+    clients = [_connect_client(port) for _ in range(num_clients)]
+
+    parent_pipe.send("idle_start")
+    parent_pipe.recv()
+    time.sleep(idle_time)
+    parent_pipe.send("idle_stop")
+    idle_cpu = parent_pipe.recv()
+
+    latencies = []
+    for index in range(num_pings):
+        client = clients[index % num_clients]
+        latencies.append(_ping(client, index))
+
+    for client in clients:
+        client.close()
+    server_process.terminate()
+    server_process.join()
+    return idle_cpu, latencies
+
+
+def _connect_client(port):
+    client = socket.create_connection(("127.0.0.1", port))
+    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    _recv_exactly(client, AUTH_CHALLENGE_SIZE)
+    return client
+
+
+def _ping(client, ping_id):
+    packet = (
+        PING_SIZE_BIN.pack(PING_PACKET_SIZE) +
+        int.to_bytes(OpCode.CMSG_PING.value, 4, "little") +
+        int.to_bytes(ping_id, 4, "little")
+    )
+    start = time.perf_counter()
+    client.sendall(packet)
+    _recv_exactly(client, PONG_SIZE)
+    return time.perf_counter() - start
+
+
+def _recv_exactly(client, size):
+    data = b""
+    while len(data) < size:
+        some_data = client.recv(size - len(data))
+        if not some_data:
+            raise ConnectionError("Server closed the connection.")
+        data += some_data
+    return data
+
+
+def _run_server(mode, pipe):
+    """ Child process: run the server and answer CPU measure requests. """
+    if mode == "threaded":
+        server = WorldServer()
+        server.port = 0
+        server._listen_clients()
+        port = server.clients_socket.getsockname()[1]
+        _start_daemon(server._accept_clients)
+    else:
+        server = AsyncWorldServer()
+        server.port = 0
+        port_ready = threading.Event()
+        _start_daemon(_run_async_server, (server, port_ready))
+        port_ready.wait()
+        port = server.clients_socket.sockets[0].getsockname()[1]
+    pipe.send(port)
+
+    while True:
+        command = pipe.recv()
+        if command == "idle_start":
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            pipe.send(None)
+        elif command == "idle_stop":
+            cpu_time = time.process_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            pipe.send(cpu_time / wall_time)
+
+
+def _run_async_server(server, port_ready):
+    server.loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(server.loop)
+    server._listen_clients()
+    port_ready.set()
+    server._accept_clients()
+
+
+def _start_daemon(target, args = ()):
+    thread = threading.Thread(target = target, args = args, daemon = True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    main()
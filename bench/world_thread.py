@@ -0,0 +1,141 @@
+""" Compare movement handling with locks in connection threads and with the
+world thread.
+
+Synthetic players are spread across connection threads that handle their
+movement packets with MovementHandler, while world ticks run at --tick-rate.
+Without the world thread, connection threads update the world state
+themselves, contending for the objects and managers locks; with it, they only
+parse packets and post them. The CPU time to handle all movements and send the
+last tick, the time spent per packet in connection threads, and the world
+thread busy time (without ticks) are shown.
+
+Usage: python -m bench.world_thread [--players 100] [--threads 1 4 16]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from bench.world_tick import FakeConnection, _create_player, _move
+from durator.world.game.movement_filter import MovementFilter
+from durator.world.handlers.game.movement import MovementHandler
+from durator.world.opcodes import OpCode
+from durator.world.world_server import WorldServer
+from durator.world.world_thread import WorldThread
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 100,
+        help = "number of players in the area"
+    )
+    argparser.add_argument(
+        "--threads", type = int, nargs = "+", default = [1, 4, 16],
+        help = "numbers of connection threads to test"
+    )
+    argparser.add_argument(
+        "--moves", type = int, default = 50,
+        help = "movement packets sent by each player"
+    )
+    argparser.add_argument(
+        "--tick-rate", type = float, default = 10.0,
+        help = "world ticks per second"
+    )
+    args = argparser.parse_args()
+
+    print("{} players, {} moves each".format(args.players, args.moves))
+    print("{:>12} {:>8} {:>10} {:>14} {:>14}".format(
+        "mode", "threads", "CPU s", "conn us/move", "world busy s"
+    ))
+    for num_threads in args.threads:
+        for use_world_thread in (False, True):
+            results = _run_bench(
+                args.players, num_threads, args.moves, args.tick_rate,
+                use_world_thread
+            )
+            cpu_time, conn_time, busy_time = results
+            print("{:>12} {:>8} {:>10.2f} {:>14.1f} {:>14}".format(
+                "world thread" if use_world_thread else "locks",
+                num_threads,
+                cpu_time,
+                conn_time / (args.players * args.moves) * 1000000,
+                "-" if busy_time is None else "{:.2f}".format(busy_time)
+            ))
+
+
+def _run_bench(num_players, num_threads, num_moves, tick_rate,
+               use_world_thread):
+    """ Return the CPU time used to handle all movements, the time spent in
+    connection threads, and the world thread busy time if it is used. """
+    random.seed(0)
+    server = WorldServer()
+    server.world_tick.TICK_RATE = tick_rate
+    server.world_thread = WorldThread(server) if use_world_thread else None
+    object_manager = server.object_manager
+
+    players = [_create_player(guid) for guid in range(1, num_players + 1)]
+    for player in players:
+        connection = FakeConnection(player)
+        connection.server = server
+        connection.opcode = OpCode.MSG_MOVE_HEARTBEAT
+        connection.movement_filter = MovementFilter()
+        server.connection_registry.add(connection)
+        server.connection_registry.set_player_guid(connection, player.guid)
+        object_manager.player_manager._add_to_partition(player, 0)
+    for player in players:
+        object_manager.update_movement(player)
+    server.world_tick.flush()
+
+    # Movement packets are prepared beforehand, only their handling is timed.
+    packets = []
+    for player in players:
+        player_packets = []
+        for _ in range(num_moves):
+            _move(player)
+            player_packets.append(player.movement.to_bytes())
+        packets.append(player_packets)
+
+    connections = server.connection_registry.get_connections()
+    connections.sort(key = lambda connection: connection.player.guid)
+    conn_times = [0.0] * num_threads
+
+    def handle_packets(thread_index):
+        thread_connections = connections[thread_index::num_threads]
+        for move_index in range(num_moves):
+            for connection in thread_connections:
+                data = packets[connection.player.guid - 1][move_index]
+                start = time.perf_counter()
+                MovementHandler(connection, data).process()
+                conn_times[thread_index] += time.perf_counter() - start
+
+    if use_world_thread:
+        world_runner = threading.Thread(target = server.world_thread.run)
+    else:
+        world_runner = threading.Thread(target = server.world_tick.run)
+    world_runner.start()
+
+    cpu_start = time.process_time()
+    threads = [ threading.Thread(target = handle_packets, args = (index,))
+                for index in range(num_threads) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.call_in_world(server.world_tick.flush)
+    cpu_time = time.process_time() - cpu_start
+
+    server.shutdown_flag.set()
+    world_runner.join()
+    busy_time = None
+    if use_world_thread:
+        busy_time = server.world_thread.get_stats()["busy_time"]
+    return cpu_time, sum(conn_times), busy_time
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+""" Compare the world updates traffic sent per event and with world ticks.
+
+Synthetic players stand in a single area, all in range of each other, and
+move regularly. The world server sends their movements to the other players
+either right away, one update block per packet (tick rate 0), or gathered by
+world ticks in multi-block packets. Packets are serialized by fake connections
+instead of being sent, to count them and their bytes. The bytes saved by the
+update compression and the CPU time spent on it are shown as well.
+
+Usage: python -m bench.world_tick [--players 100] [--tick-rates 0 10 20]
+"""
+
+import argparse
+import random
+import time
+
+import durator.config
+durator.config.DEBUG = False
+
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.base_object import (
+    ObjectType, OBJECT_TYPE_TO_FLAGS )
+from durator.world.game.movement_relay_packet import MovementRelayPacket
+from durator.world.game.object.type.player import Player
+from durator.world.game.player_spawn_packet import PLAYER_SPAWN_FIELDS
+from durator.world.game.update_compression import UPDATE_COMPRESSION
+from durator.world.opcodes import OpCode
+from durator.world.world_connection_state import WorldConnectionState
+from durator.world.world_server import WorldServer
+
+
+class FakeConnection(object):
+
+    def __init__(self, player):
+        self.state = WorldConnectionState.IN_WORLD
+        self.player = player
+        self.num_packets = 0
+        self.num_bytes = 0
+
+    def queue_packet(self, packet):
+        self.num_packets += 1
+        self.num_bytes += len(packet.to_socket())
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "--players", type = int, default = 100,
+        help = "number of players in the area"
+    )
+    argparser.add_argument(
+        "--tick-rates", type = float, nargs = "+", default = [0, 10, 20],
+        help = "world tick rates to test, 0 for per-event updates"
+    )
+    argparser.add_argument(
+        "--move-rate", type = float, default = 5.0,
+        help = "movement packets per second sent by each player"
+    )
+    argparser.add_argument(
+        "--duration", type = float, default = 5.0,
+        help = "simulated seconds"
+    )
+    args = argparser.parse_args()
+
+    print("{} players, {:.0f} moves/s each, {:.0f} simulated seconds".format(
+        args.players, args.move_rate, args.duration
+    ))
+    print("{:>10} {:>12} {:>12} {:>10} {:>12} {:>10}".format(
+        "tick rate", "packets/s", "KiB/s", "CPU s", "saved KiB/s", "zlib CPU s"
+    ))
+    for tick_rate in args.tick_rates:
+        results = _run_bench(
+            args.players, tick_rate, args.move_rate, args.duration
+        )
+        num_packets, num_bytes, cpu_time, bytes_saved, zlib_time = results
+        print("{:>10} {:>12.0f} {:>12.1f} {:>10.2f} {:>12.1f} {:>10.2f}".format(
+            "per event" if tick_rate == 0 else "{:.0f} Hz".format(tick_rate),
+            num_packets / args.duration,
+            num_bytes / args.duration / 1024,
+            cpu_time,
+            bytes_saved / args.duration / 1024,
+            zlib_time
+        ))
+
+
+def _run_bench(num_players, tick_rate, move_rate, duration,
+               movement_relay = False, area_size = 100):
+    """ Return the number of packets and bytes sent, the CPU time used, and
+    the bytes saved and CPU time used by compression, while players move for
+    that simulated duration in a square area of area_size. With
+    movement_relay, moves are sent as relayed heartbeats, as MovementHandler
+    does in movement_relay mode. """
+    random.seed(0)
+    server = WorldServer()
+    server.world_tick.TICK_RATE = tick_rate
+    object_manager = server.object_manager
+
+    players = [ _create_player(guid, area_size)
+                for guid in range(1, num_players + 1) ]
+    connections = [FakeConnection(player) for player in players]
+    for connection in connections:
+        server.connection_registry.add(connection)
+        server.connection_registry.set_player_guid(
+            connection, connection.player.guid
+        )
+    for player in players:
+        object_manager.player_manager._add_to_partition(player, 0)
+    for player in players:
+        object_manager.update_movement(player)
+    server.world_tick.flush()
+    for connection in connections:
+        connection.num_packets = connection.num_bytes = 0
+
+    # Each player moves once per move period, at its own offset in it; ticks
+    # happen whenever the simulated time crosses a tick period.
+    stats_start = UPDATE_COMPRESSION.get_stats()
+    cpu_start = time.process_time()
+    tick_period = 1 / tick_rate if tick_rate else None
+    next_tick = tick_period
+    num_rounds = int(duration * move_rate)
+    for round_index in range(num_rounds):
+        for index, player in enumerate(players):
+            now = (round_index + index / num_players) / move_rate
+            while tick_period and now >= next_tick:
+                server.world_tick.flush()
+                next_tick += tick_period
+            _move(player)
+            object_manager.update_player_position(player)
+            relay_packet = None
+            if movement_relay:
+                relay_packet = MovementRelayPacket(
+                    OpCode.MSG_MOVE_HEARTBEAT,
+                    player.guid,
+                    player.movement.to_bytes()
+                )
+            object_manager.update_movement(player, relay_packet)
+    server.world_tick.flush()
+    cpu_time = time.process_time() - cpu_start
+    stats = UPDATE_COMPRESSION.get_stats()
+
+    num_packets = sum(connection.num_packets for connection in connections)
+    num_bytes = sum(connection.num_bytes for connection in connections)
+    bytes_saved = stats["bytes_saved"] - stats_start["bytes_saved"]
+    zlib_time = stats["cpu_time"] - stats_start["cpu_time"]
+    return num_packets, num_bytes, cpu_time, bytes_saved, zlib_time
+
+
+def _create_player(guid, area_size = 100):
+    player = Player()
+    for field in PLAYER_SPAWN_FIELDS:
+        player.set(field, 0)
+    player.set(ObjectField.GUID, guid)
+    player.set(ObjectField.TYPE, OBJECT_TYPE_TO_FLAGS[ObjectType.PLAYER])
+    player.position.x = random.uniform(-area_size / 2, area_size / 2)
+    player.position.y = random.uniform(-area_size / 2, area_size / 2)
+    player.movement.position = player.position
+    player.clear_dirty_fields()
+    return player
+
+
+def _move(player):
+    player.position.x += random.uniform(-1, 1)
+    player.position.y += random.uniform(-1, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import asyncio
+
+from durator.auth.login_connection import LoginConnection
+from durator.auth.login_packet import AsyncLoginPacketReceiver
+from durator.common.log import LOG
+
+
+class AsyncLoginConnection(LoginConnection):
+    """ LoginConnection running as a coroutine on the login server event loop
+    instead of having its own thread.
+
+    Packets are received and framed in the event loop, but the handlers (which
+    query the database and do the SRP computations) run in the loop default
+    executor, so a login storm is processed by a bounded thread pool without
+    blocking the loop. Responses are written back from the loop thread.
+    """
+
+    def __init__(self, server, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.loop = asyncio.get_event_loop()
+        super().__init__(server, writer.get_extra_info("socket"))
+
+    def __del__(self):
+        """ The transport owns the socket, it is closed with the writer. """
+        pass
+
+    def _setup_socket(self):
+        self.login_packet_receiver = AsyncLoginPacketReceiver(self.reader)
+
+    async def handle_connection(self):
+        """ Coroutine equivalent of ConnectionAutomaton.handle_connection. """
+        try:
+            while self.state not in self.END_STATES:
+                packet = await self._recv_packet()
+                if packet is None:
+                    break
+                await self.loop.run_in_executor(
+                    None, self._try_handle_packet, packet
+                )
+                await self.writer.drain()
+        except ConnectionError:
+            LOG.info("Lost connection.")
+        finally:
+            self._actions_after_main_loop()
+
+    async def _recv_packet(self):
+        try:
+            return await self.login_packet_receiver.get_next_packet()
+        except ConnectionError:
+            LOG.info("Lost connection.")
+            return None
+
+    def send_packet(self, packet):
+        """ Called from the executor: schedule the write in the loop thread.
+        Writes are done before the handler's future resolves, so they are in
+        the transport buffer when handle_connection drains it. """
+        self.loop.call_soon_threadsafe(self.writer.write, packet)
+
+    def _actions_after_main_loop(self):
+        """ Close connection with client. """
+        LOG.debug("LoginConnection: session ended.")
+        self.writer.close()
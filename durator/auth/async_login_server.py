@@ -0,0 +1,63 @@
+import asyncio
+
+from durator.auth.async_login_connection import AsyncLoginConnection
+from durator.auth.login_server import LoginServer
+from durator.common.log import LOG
+
+
+class AsyncLoginServer(LoginServer):
+    """ Login server handling all clients connections in a single asyncio event
+    loop, instead of starting a thread per LoginConnection.
+
+    Realm servers connections are short-lived and rare, so they are still
+    accepted by the threaded realm listener of the LoginServer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.loop = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        super().start()
+        self.loop.close()
+
+    #------------------------------
+    # Clients connection
+    #------------------------------
+
+    def _listen_clients(self):
+        server_coro = asyncio.start_server(
+            self._handle_client_streams,
+            self.CLIENTS_HOST,
+            self.CLIENTS_PORT,
+            backlog = self.BACKLOG_SIZE
+        )
+        self.clients_socket = self.loop.run_until_complete(server_coro)
+
+    def _accept_clients(self):
+        """ Run the event loop, serving all clients, until interrupted. """
+        try:
+            self.loop.run_forever()
+        except KeyboardInterrupt:
+            LOG.info("KeyboardInterrupt received, stop accepting clients.")
+
+    async def _handle_client_streams(self, reader, writer):
+        """ Run an AsyncLoginConnection for that client. """
+        address = writer.get_extra_info("peername")
+        address_string = str(address[0]) + ":" + str(address[1])
+        LOG.info("Accepting client connection from " + address_string)
+        login_connection = AsyncLoginConnection(self, reader, writer)
+        await login_connection.handle_connection()
+
+    def _stop_listen_clients(self):
+        """ Stop listening and end all connections still running. """
+        self.clients_socket.close()
+        self.clients_socket = None
+
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        gathering = asyncio.gather(*tasks, return_exceptions = True)
+        self.loop.run_until_complete(gathering)
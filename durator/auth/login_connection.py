@@ -1,6 +1,7 @@
 from durator.auth.constants import LoginOpCode
 from durator.auth.login_challenge import LoginChallenge
 from durator.auth.login_connection_state import LoginConnectionState
+from durator.auth.login_packet import LoginPacketReceiver
 from durator.auth.login_proof import LoginProof
 from durator.auth.realmlist_request import RealmlistRequest
 from durator.auth.recon_challenge import ReconChallenge
@@ -8,8 +9,6 @@ from durator.auth.recon_proof import ReconProof
 from durator.auth.srp import Srp
 from durator.common.networking.connection_automaton import ConnectionAutomaton
 from durator.common.log import LOG
-from durator.config import DEBUG
-from pyshgck.format import dump_data
 
 
 class LoginConnection(ConnectionAutomaton):
@@ -40,22 +39,22 @@ class LoginConnection(ConnectionAutomaton):
     def __init__(self, server, connection):
         super().__init__(connection)
         self.server = server
+        self.login_packet_receiver = None
+        self._setup_socket()
         self.account = None
         self.srp = Srp()
         self.recon_challenge = b""
 
+    def _setup_socket(self):
+        """ Create the packet receiver over the socket. """
+        self.login_packet_receiver = LoginPacketReceiver(self.socket)
+
     def __del__(self):
         self.socket.close()
 
     def _recv_packet(self):
-        # This assumes that all packets are received in no more or less than one
-        # piece, which is a wrong. However, exceptions shouldn't occur often
-        # with how short login messages are.
         try:
-            data = self.socket.recv(1024)
-            if data and DEBUG:
-                print(dump_data(data), end = "")
-            return data or None
+            return self.login_packet_receiver.get_next_packet()
         except ConnectionError:
             LOG.info("Lost connection.")
             return None
@@ -0,0 +1,120 @@
+""" Reception of complete login packets.
+
+Login packets do not share a common header: after the opcode byte, challenges
+declare the size of their content in a small header, whereas other packets have
+a fixed size. TCP does not preserve message boundaries, so packets are framed
+with these sizes instead of assuming that each recv returns exactly one packet.
+"""
+
+import asyncio
+
+from durator.auth.constants import LoginOpCode
+from durator.auth.login_challenge import LoginChallenge
+from durator.auth.login_proof import LoginProof
+from durator.auth.realmlist_request import RealmlistRequest
+from durator.auth.recon_challenge import ReconChallenge
+from durator.auth.recon_proof import ReconProof
+from durator.common.log import LOG
+from durator.config import DEBUG
+from pyshgck.format import dump_data
+
+
+# Packets with a header whose second value is the size of the remaining content.
+SIZED_PACKETS_HEADERS = {
+    LoginOpCode.LOGIN_CHALL: LoginChallenge.HEADER_BIN,
+    LoginOpCode.RECON_CHALL: ReconChallenge.HEADER_BIN
+}
+
+# Packets with a fixed content size.
+FIXED_PACKETS_SIZES = {
+    LoginOpCode.LOGIN_PROOF: LoginProof.PROOF_BIN.size,
+    LoginOpCode.RECON_PROOF: ReconProof.CONTENT_BIN.size,
+    LoginOpCode.REALMLIST:   RealmlistRequest.PACKET_BIN.size
+}
+
+
+class LoginPacketReceiver(object):
+    """ Helper class that can get a complete login packet from a socket. """
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.packet_buf = b""
+
+    def get_next_packet(self):
+        """ Return the next packet (opcode included) as bytes, or None if the
+        connection got closed or the opcode is unknown. """
+        try:
+            opcode_byte = self._recv_exactly(1)
+            opcode = _get_opcode(opcode_byte)
+            if opcode in SIZED_PACKETS_HEADERS:
+                header_bin = SIZED_PACKETS_HEADERS[opcode]
+                header = self._recv_exactly(header_bin.size)
+                content_size = header_bin.unpack(header)[1]
+                content = header + self._recv_exactly(content_size)
+            elif opcode in FIXED_PACKETS_SIZES:
+                content = self._recv_exactly(FIXED_PACKETS_SIZES[opcode])
+            else:
+                return None
+        except LoginPacketReceiverException:
+            return None
+
+        packet = opcode_byte + content
+        if DEBUG:
+            print(dump_data(packet), end = "")
+        return packet
+
+    def _recv_exactly(self, size):
+        while len(self.packet_buf) < size:
+            some_data = self.socket.recv(1024)
+            if not some_data:
+                raise LoginPacketReceiverException()
+            self.packet_buf += some_data
+
+        data = self.packet_buf[:size]
+        self.packet_buf = self.packet_buf[size:]
+        return data
+
+
+class LoginPacketReceiverException(Exception):
+    pass
+
+
+class AsyncLoginPacketReceiver(object):
+    """ Coroutine counterpart of LoginPacketReceiver, reading packets from an
+    asyncio StreamReader. """
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    async def get_next_packet(self):
+        """ Return the next packet (opcode included) as bytes, or None if the
+        connection got closed or the opcode is unknown. """
+        try:
+            opcode_byte = await self.reader.readexactly(1)
+            opcode = _get_opcode(opcode_byte)
+            if opcode in SIZED_PACKETS_HEADERS:
+                header_bin = SIZED_PACKETS_HEADERS[opcode]
+                header = await self.reader.readexactly(header_bin.size)
+                content_size = header_bin.unpack(header)[1]
+                content = header + await self.reader.readexactly(content_size)
+            elif opcode in FIXED_PACKETS_SIZES:
+                content_size = FIXED_PACKETS_SIZES[opcode]
+                content = await self.reader.readexactly(content_size)
+            else:
+                return None
+        except asyncio.IncompleteReadError:
+            return None
+
+        packet = opcode_byte + content
+        if DEBUG:
+            print(dump_data(packet), end = "")
+        return packet
+
+
+def _get_opcode(opcode_byte):
+    """ Return the LoginOpCode of that byte, or None if it's unknown. """
+    try:
+        return LoginOpCode(opcode_byte[0])
+    except ValueError:
+        LOG.warning("Unknown login opcode {:X}".format(opcode_byte[0]))
+        return None
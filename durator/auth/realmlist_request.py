@@ -8,6 +8,9 @@ class RealmlistRequest(object):
 
     MIN_RESPONSE_SIZE = 7
 
+    # - uint32  unknown (ignored)
+    PACKET_BIN = Struct("<I")
+
     RESPONSE_HEADER_BIN = Struct("<BHIB")
     RESPONSE_FOOTER_BIN = Struct("<H")
     REALM_PACKET_FMT    = "<IB{name_len}s{addr_len}sf3B"
@@ -26,14 +26,18 @@ class SessionCipher(object):
 
     def decrypt(self, data):
         """ Return the decrypted data byte buffer. """
-        assert len(data) >= self.DECRYPT_HEADER_SIZE
-        decrypted_header = [0] * self.DECRYPT_HEADER_SIZE
+        header = bytearray(data[:self.DECRYPT_HEADER_SIZE])
+        self.decrypt_in_place(header)
+        return bytes(header) + data[self.DECRYPT_HEADER_SIZE:]
+
+    def decrypt_in_place(self, buffer):
+        """ Decrypt the header at the beginning of that writable buffer, e.g. a
+        bytearray or a memoryview on one. """
+        assert len(buffer) >= self.DECRYPT_HEADER_SIZE
 
         for index in range(self.DECRYPT_HEADER_SIZE):
-            dec = (data[index] - self.recv_j) ^ self.session_key[self.recv_i]
-            dec %= 0x100
-            decrypted_header[index] = dec
-            self.recv_j = data[index]
+            enc = buffer[index]
+            dec = (enc - self.recv_j) ^ self.session_key[self.recv_i]
+            buffer[index] = dec % 0x100
+            self.recv_j = enc
             self.recv_i = (self.recv_i + 1) % len(self.session_key)
-
-        return bytes(decrypted_header) + data[self.DECRYPT_HEADER_SIZE:]
@@ -2,8 +2,10 @@
 
 import argparse
 
+from durator.auth.async_login_server import AsyncLoginServer
 from durator.auth.login_server import LoginServer
 from durator.db.database_client import DatabaseClient
+from durator.world.async_world_server import AsyncWorldServer
 from durator.world.world_server import WorldServer
 from durator.common.log import LOG
 
@@ -14,16 +16,28 @@ MODULES = {
     "db": DatabaseClient
 }
 
+ASYNC_MODULES = {
+    "login": AsyncLoginServer,
+    "world": AsyncWorldServer
+}
+
 
 def main():
     LOG.info("DuratorEmu - WoW 1.1.2.4125 Sandbox Server - Shgck 2016")
 
     argparser = argparse.ArgumentParser()
     argparser.add_argument("module", type = str, help = "module to start")
+    argparser.add_argument(
+        "--async", dest = "use_async", action = "store_true",
+        help = "serve all clients in a single asyncio event loop"
+    )
     args = argparser.parse_args()
 
-    if args.module in MODULES:
-        module_class = MODULES[args.module]
+    if args.use_async and args.module not in ASYNC_MODULES:
+        print("No asyncio implementation for module:", args.module)
+    elif args.module in MODULES:
+        modules = ASYNC_MODULES if args.use_async else MODULES
+        module_class = modules[args.module]
         module = module_class()
         module.start()
     else:
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+from durator.world.world_connection import WorldConnection
+from durator.world.world_packet import AsyncWorldPacketReceiver
+from durator.common.log import LOG
+
+
+class AsyncWorldConnection(WorldConnection):
+    """ WorldConnection running as a coroutine on the world server event loop
+    instead of having its own thread.
+
+    It uses the same automaton (states, legal opcodes and OP_HANDLERS table) as
+    the threaded WorldConnection. Handlers are still regular functions called
+    from the event loop, so all game logic runs in the loop thread and a slow
+    handler (e.g. one doing database queries) delays other clients.
+
+    Attributes:
+    - reader, writer: asyncio streams of this client
+    - loop: event loop running this connection
+    - loop_thread_id: identifier of the thread running the loop
+    - outgoing_event: set when packets have been queued for this client, to
+        wake up the coroutine sending them.
+    """
+
+    def __init__(self, server, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.loop = asyncio.get_event_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.outgoing_event = asyncio.Event()
+        super().__init__(server, writer.get_extra_info("socket"))
+
+    def _setup_socket(self):
+        """ The transport owns the socket, only set its TCP options and setup
+        the packet receiver. """
+        self._set_tcp_options(self.socket)
+        self.world_packet_receiver = AsyncWorldPacketReceiver(self.reader)
+
+    def _close_socket(self):
+        self.writer.close()
+
+    async def handle_connection(self):
+        """ Coroutine equivalent of ConnectionAutomaton.handle_connection. """
+        self._actions_before_main_loop()
+        sender = asyncio.ensure_future(self._send_queued_packets_forever())
+
+        try:
+            while self.state not in self.END_STATES:
+                packet = await self._recv_packet()
+                if packet is None:
+                    break
+                self._try_handle_packet(packet)
+
+                self._actions_at_loop_end()
+                if not await self._drain():
+                    break
+        finally:
+            sender.cancel()
+            self._actions_after_main_loop()
+
+    async def _recv_packet(self):
+        try:
+            packet = await self.world_packet_receiver.get_next_packet()
+            return packet
+        except ConnectionError:
+            LOG.info("Lost connection with client.")
+            return None
+
+    def send_packet(self, world_packet):
+        """ Write the packet in the transport buffer, it will be sent as soon
+        as the event loop gets the control back. """
+        ready_packet = world_packet.to_socket(self.session_cipher)
+        self.writer.write(ready_packet)
+
+    def _send_batch(self, batch):
+        """ Write the batch in the transport buffer, the transport sends it
+        with as few syscalls as it can. """
+        self.writer.writelines(batch)
+
+    def _disconnect(self):
+        """ Drop the transport and its buffered data; the reader gets EOF. """
+        self._call_in_loop(self.writer.transport.abort)
+
+    def _wake_up(self):
+        """ Wake up the sender coroutine. """
+        self._call_in_loop(self.outgoing_event.set)
+
+    def _call_in_loop(self, func):
+        """ Call func right away from the loop thread, where all game logic
+        runs, else schedule it there: transports and asyncio events are not
+        thread-safe, and call_soon_threadsafe writes to the loop self-pipe. """
+        if threading.get_ident() == self.loop_thread_id:
+            func()
+        else:
+            self.loop.call_soon_threadsafe(func)
+
+    async def _send_queued_packets_forever(self):
+        """ Wait for queued packets and send them, until cancelled. """
+        while True:
+            await self.outgoing_event.wait()
+            self.outgoing_event.clear()
+            self._send_queued_packets()
+            if not await self._drain():
+                return
+
+    async def _drain(self):
+        """ Wait for the transport buffer to be flushed if it is too full.
+        Return False if the connection has been lost in the process. """
+        try:
+            await self.writer.drain()
+            return True
+        except ConnectionError:
+            LOG.info("Lost connection with client.")
+            return False
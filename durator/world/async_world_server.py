@@ -0,0 +1,77 @@
+import asyncio
+
+from durator.world.async_world_connection import AsyncWorldConnection
+from durator.world.world_server import WorldServer
+from durator.common.log import LOG
+
+
+class AsyncWorldServer(WorldServer):
+    """ World server handling all clients connections in a single asyncio event
+    loop, instead of starting a thread per WorldConnection.
+
+    Only the clients connections are served by the loop; the heartbeat to the
+    login server still runs in its own thread as it does nothing but sleep.
+    The loop thread owning the world state, the world_thread option is ignored.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.loop = None
+        # All game logic already runs in the loop thread.
+        self.world_thread = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        super().start()
+        self.loop.close()
+
+    #------------------------------
+    # Clients connection
+    #------------------------------
+
+    def _listen_clients(self):
+        server_coro = asyncio.start_server(
+            self._handle_client_streams,
+            self.hostname,
+            self.port,
+            backlog = WorldServer.BACKLOG_SIZE
+        )
+        self.clients_socket = self.loop.run_until_complete(server_coro)
+
+    def _stop_listen_clients(self):
+        """ Stop listening and end all connections still running. """
+        self.clients_socket.close()
+        self.clients_socket = None
+
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        gathering = asyncio.gather(*tasks, return_exceptions = True)
+        self.loop.run_until_complete(gathering)
+
+    def _accept_clients(self):
+        """ Run the event loop, serving all clients, until interrupted. """
+        try:
+            self.loop.run_forever()
+        except KeyboardInterrupt:
+            LOG.info("KeyboardInterrupt received, stop accepting clients.")
+
+    def _start_world_tick(self):
+        """ Run the world ticks in the event loop, as the connections queues
+        must be filled from the loop thread. """
+        self.loop.call_soon(self._run_world_tick)
+
+    def _run_world_tick(self):
+        self.world_tick.flush()
+        self.loop.call_later(self.world_tick.get_period(), self._run_world_tick)
+
+    async def _handle_client_streams(self, reader, writer):
+        """ Run an AsyncWorldConnection and register it. """
+        address = writer.get_extra_info("peername")
+        address_string = str(address[0]) + ":" + str(address[1])
+        LOG.info("Accepting client connection from " + address_string)
+        world_connection = AsyncWorldConnection(self, reader, writer)
+        self.connection_registry.add(world_connection)
+
+        await world_connection.handle_connection()
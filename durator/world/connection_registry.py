@@ -0,0 +1,115 @@
+import threading
+
+
+class ConnectionRegistry(object):
+    """ Index of the world server connections, by player GUID and by
+    connection state, so broadcasts only visit their target connections.
+
+    Connections keep it up to date: they are added when accepted and removed
+    when closed, their state is updated by the WorldConnection.state setter,
+    and their player GUID by set_player and unset_player.
+
+    Writers change the indexes in place under the lock, in constant time.
+    Lists of connections by state are read from tuples cached until the next
+    change of that state set, so readers only take the lock to build them;
+    GUID lookups read the dict without any lock.
+
+    Attributes:
+    - connections: dict of the state of each connection
+    - by_state: dict of sets of connections by state
+    - by_guid: dict of connections by the GUID of their player
+    - guids: dict of the player GUID of each connection
+    - snapshots: dict of cached tuples of connections by state, with None
+        for all connections
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.by_state = {}
+        self.by_guid = {}
+        self.guids = {}
+        self.snapshots = {}
+
+    def add(self, connection):
+        with self.lock:
+            if connection in self.connections:
+                return
+            self._set_state(connection, connection.state)
+            self.snapshots.pop(None, None)
+
+    def remove(self, connection):
+        with self.lock:
+            if connection not in self.connections:
+                return
+            self._discard_state(connection)
+            del self.connections[connection]
+            self.snapshots.pop(None, None)
+            guid = self.guids.pop(connection, None)
+            if guid is not None and self.by_guid.get(guid) is connection:
+                del self.by_guid[guid]
+
+    def update_state(self, connection, old_state, new_state):
+        """ Move connection to the new_state set, if it is registered. The
+        state it is registered with is used, even if old_state is outdated. """
+        with self.lock:
+            if connection not in self.connections:
+                return
+            self._discard_state(connection)
+            self._set_state(connection, new_state)
+
+    def _set_state(self, connection, state):
+        self.connections[connection] = state
+        self.by_state.setdefault(state, set()).add(connection)
+        self.snapshots.pop(state, None)
+
+    def _discard_state(self, connection):
+        state = self.connections[connection]
+        state_connections = self.by_state[state]
+        state_connections.discard(connection)
+        if not state_connections:
+            del self.by_state[state]
+        self.snapshots.pop(state, None)
+
+    def set_player_guid(self, connection, guid):
+        with self.lock:
+            self.by_guid[guid] = connection
+            self.guids[connection] = guid
+
+    def unset_player_guid(self, guid):
+        with self.lock:
+            connection = self.by_guid.pop(guid, None)
+            if connection is not None:
+                self.guids.pop(connection, None)
+
+    def get_by_guid(self, guid):
+        """ Return the connection of the player with that GUID, or None. """
+        return self.by_guid.get(guid)
+
+    def get_connections(self, state = None, guids = None):
+        """ Return a list of the connections in that state and/or of players
+        with these GUIDs (all connections if both are None), each at most
+        once. It costs O(len(guids)) if guids are provided, else O(connections
+        in state). """
+        if guids is not None:
+            get_by_guid = self.by_guid.get
+            connections = dict.fromkeys(get_by_guid(guid) for guid in guids)
+            connections.pop(None, None)
+            if state is not None:
+                return [ connection for connection in connections
+                         if connection.state == state ]
+            return list(connections)
+        return list(self._get_snapshot(state))
+
+    def _get_snapshot(self, state):
+        """ Return the cached tuple of connections in that state (all of them
+        if state is None), building it if a change invalidated it. """
+        snapshot = self.snapshots.get(state)
+        if snapshot is None:
+            with self.lock:
+                if state is None:
+                    snapshot = tuple(self.connections)
+                else:
+                    snapshot = tuple(self.by_state.get(state, ()))
+                self.snapshots[state] = snapshot
+        return snapshot
@@ -196,14 +196,22 @@ class ChatManager(object):
         return 0
 
     def _send_global_chat_message(self, sender, message):
+        """ Send the message to all players on the sender's map. """
         server_message = ServerChatMessage()
         server_message.load_client_message(message)
         server_message.sender_guid = sender
         message_packet = server_message.to_packet()
 
+        sender_player = self.server.object_manager.get_player(sender)
+        if sender_player is None:
+            return 0
+        with sender_player.lock:
+            map_id = sender_player.map_id
+
         self.server.broadcast(
             message_packet,
-            state = WorldConnectionState.IN_WORLD
+            state = WorldConnectionState.IN_WORLD,
+            map_id = map_id
         )
         return 0
 
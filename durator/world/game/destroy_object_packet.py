@@ -0,0 +1,14 @@
+from struct import Struct
+
+from durator.world.opcodes import OpCode
+from durator.world.world_packet import WorldPacket
+
+
+class DestroyObjectPacket(WorldPacket):
+    """ Tell the client to remove an object from its world, e.g. when it gets
+    out of range. """
+
+    PACKET_BIN = Struct("<Q")
+
+    def __init__(self, guid):
+        super().__init__(OpCode.SMSG_DESTROY_OBJECT, self.PACKET_BIN.pack(guid))
@@ -1,9 +1,7 @@
 from enum import Enum
-import io
 from struct import Struct
 
 from durator.world.game.position import Position
-from pyshgck.bin import read_struct
 
 
 class MovementFlags(Enum):
@@ -15,6 +13,7 @@ class MovementFlags(Enum):
     STRAFE_RIGHT     = 1 << 3   # 0x00000008
     TURN_LEFT        = 1 << 4   # 0x00000010
     TURN_RIGHT       = 1 << 5   # 0x00000020
+    WALK_MODE        = 1 << 8   # 0x00000100
     IS_FALLING       = 1 << 13  # 0x00002000
     IS_SWIMMING      = 1 << 21  # 0x00200000
     ON_TRANSPORT     = 1 << 25  # 0x02000000
@@ -24,7 +23,6 @@ class MovementFlags(Enum):
 
     # PITCH_UP         = 1 << 6
     # PITCH_DOWN       = 1 << 7
-    # WALK_MODE        = 1 << 8
     # IS_LEVITATING    = 1 << 10
     # IS_FLYING        = 1 << 11
     # SPLINE_ENABLED   = 1 << 22
@@ -38,6 +36,14 @@ class MovementFlags(Enum):
 
 
 class Movement(object):
+    """ Movement block, sent by clients in all MSG_MOVE_* packets and in
+    update blocks.
+
+    Parsing and encoding are done with a single Struct call for the common
+    part, directly on the packet buffer. Movements parsed with from_bytes only
+    create the objects of their optional parts present in their flags; the
+    others are None.
+    """
 
     # - uint32      flags
     # - int32       unk
@@ -56,11 +62,22 @@ class Movement(object):
     #     if flags & 0x04000000 (is on spline elevation)
     #     - float       unk
 
-    HEADER_BIN           = Struct("<2I")
-    TRANSPORT_HEADER_BIN = Struct("<Q")
+    __slots__ = ( "flags", "time", "position", "transport_guid"
+                , "transport_position", "swim_pitch", "jump_data"
+                , "spline_elevation_unk" )
+
+    HEADER_BIN           = Struct("<2I4f")
+    TRANSPORT_HEADER_BIN = Struct("<Q4f")
     SWIMMING_BIN         = Struct("<f")
     SPLINE_ELEVATION_BIN = Struct("<f")
 
+    ON_TRANSPORT     = MovementFlags.ON_TRANSPORT.value
+    IS_SWIMMING      = MovementFlags.IS_SWIMMING.value
+    IS_FALLING       = MovementFlags.IS_FALLING.value
+    SPLINE_ELEVATION = MovementFlags.SPLINE_ELEVATION.value
+    OPTIONAL_FLAGS   = ( ON_TRANSPORT | IS_SWIMMING | IS_FALLING
+                         | SPLINE_ELEVATION )
+
     def __init__(self):
         self.flags = 0
         self.time = 0
@@ -72,70 +89,122 @@ class Movement(object):
         self.spline_elevation_unk = 0.0
 
     @staticmethod
-    def from_bytes(data):
-        movement = Movement()
-        data_io = io.BytesIO(data)
-
-        header_data = read_struct(data_io, Movement.HEADER_BIN)
-        movement.flags, movement.time = header_data
-        movement.position = Position.from_io(data_io)
-
-        if movement.flags & MovementFlags.ON_TRANSPORT.value:
-            transport_data = read_struct(data_io, Movement.TRANSPORT_HEADER_BIN)
-            movement.transport_guid = transport_data[0]
-            movement.transport_position = Position.from_io(data_io)
-
-        if movement.flags & MovementFlags.IS_SWIMMING.value:
-            swimming_data = read_struct(data_io, Movement.SWIMMING_BIN)
-            movement.swim_pitch = swimming_data[0]
-
-        if movement.flags & MovementFlags.IS_FALLING.value:
-            movement.jump_data = JumpData.from_io(data_io)
-
-        if movement.flags & MovementFlags.SPLINE_ELEVATION.value:
-            elevation_data = read_struct(data_io, Movement.SPLINE_ELEVATION_BIN)
-            movement.spline_elevation_unk = elevation_data[0]
+    def from_bytes(data, offset = 0):
+        """ Parse a movement from a bytes-like object (e.g. a memoryview on
+        the packet) at that offset. """
+        movement = Movement.__new__(Movement)
+        flags, movement.time, x, y, z, o = \
+            Movement.HEADER_BIN.unpack_from(data, offset)
+        movement.flags = flags
+        movement.position = Position(x, y, z, o)
+        movement.transport_guid = 0
+        movement.transport_position = None
+        movement.swim_pitch = 0.0
+        movement.jump_data = None
+        movement.spline_elevation_unk = 0.0
+        if not flags & Movement.OPTIONAL_FLAGS:
+            return movement
+
+        offset += Movement.HEADER_BIN.size
+        if flags & Movement.ON_TRANSPORT:
+            movement.transport_guid, x, y, z, o = \
+                Movement.TRANSPORT_HEADER_BIN.unpack_from(data, offset)
+            movement.transport_position = Position(x, y, z, o)
+            offset += Movement.TRANSPORT_HEADER_BIN.size
+
+        if flags & Movement.IS_SWIMMING:
+            movement.swim_pitch = \
+                Movement.SWIMMING_BIN.unpack_from(data, offset)[0]
+            offset += Movement.SWIMMING_BIN.size
+
+        if flags & Movement.IS_FALLING:
+            movement.jump_data = JumpData.from_bytes(data, offset)
+            offset += JumpData.BIN.size
+
+        if flags & Movement.SPLINE_ELEVATION:
+            movement.spline_elevation_unk = \
+                Movement.SPLINE_ELEVATION_BIN.unpack_from(data, offset)[0]
 
         return movement
 
+    def get_size(self):
+        """ Return the size of the encoded movement. """
+        flags = self.flags
+        size = self.HEADER_BIN.size
+        if flags & self.ON_TRANSPORT:
+            size += self.TRANSPORT_HEADER_BIN.size
+        if flags & self.IS_SWIMMING:
+            size += self.SWIMMING_BIN.size
+        if flags & self.IS_FALLING:
+            size += JumpData.BIN.size
+        if flags & self.SPLINE_ELEVATION:
+            size += self.SPLINE_ELEVATION_BIN.size
+        return size
+
     def to_bytes(self):
-        data = b""
-        data += self.HEADER_BIN.pack(self.flags, self.time)
-        data += self.position.to_bytes()
+        flags = self.flags
+        position = self.position
+        if not flags & self.OPTIONAL_FLAGS:
+            return self.HEADER_BIN.pack(
+                flags, self.time, position.x, position.y, position.z, position.o
+            )
+        buffer = bytearray(self.get_size())
+        self.pack_into(buffer, 0)
+        return bytes(buffer)
+
+    def pack_into(self, buffer, offset):
+        """ Write the movement in buffer at that offset, and return the offset
+        following it. """
+        flags = self.flags
+        position = self.position
+        self.HEADER_BIN.pack_into(
+            buffer, offset,
+            flags, self.time, position.x, position.y, position.z, position.o
+        )
+        offset += self.HEADER_BIN.size
 
-        if self.flags & MovementFlags.ON_TRANSPORT.value:
-            data += self.TRANSPORT_HEADER_BIN.pack(self.transport_guid)
-            data += self.transport_position.to_bytes()
+        if flags & self.ON_TRANSPORT:
+            position = self.transport_position
+            self.TRANSPORT_HEADER_BIN.pack_into(
+                buffer, offset,
+                self.transport_guid,
+                position.x, position.y, position.z, position.o
+            )
+            offset += self.TRANSPORT_HEADER_BIN.size
 
-        if self.flags & MovementFlags.IS_SWIMMING.value:
-            data += self.SWIMMING_BIN.pack(self.swim_pitch)
+        if flags & self.IS_SWIMMING:
+            self.SWIMMING_BIN.pack_into(buffer, offset, self.swim_pitch)
+            offset += self.SWIMMING_BIN.size
 
-        if self.flags & MovementFlags.IS_FALLING.value:
-            data += self.jump_data.to_bytes()
+        if flags & self.IS_FALLING:
+            offset = self.jump_data.pack_into(buffer, offset)
 
-        if self.flags & MovementFlags.SPLINE_ELEVATION.value:
-            data += self.SPLINE_ELEVATION_BIN.pack(self.spline_elevation_unk)
+        if flags & self.SPLINE_ELEVATION:
+            self.SPLINE_ELEVATION_BIN.pack_into(
+                buffer, offset, self.spline_elevation_unk
+            )
+            offset += self.SPLINE_ELEVATION_BIN.size
 
-        return data
+        return offset
 
 
 class JumpData(object):
 
+    __slots__ = ("time", "velocity", "sin", "cos", "xy_speed")
+
     BIN = Struct("<I4f")
 
-    def __init__(self):
-        self.time = 0
-        self.velocity = 0.0
-        self.sin = 0.0
-        self.cos = 0.0
-        self.xy_speed = 0.0
+    def __init__(self, time = 0, velocity = 0.0, sin = 0.0, cos = 0.0,
+                 xy_speed = 0.0):
+        self.time = time
+        self.velocity = velocity
+        self.sin = sin
+        self.cos = cos
+        self.xy_speed = xy_speed
 
     @staticmethod
-    def from_io(bytes_io):
-        jump = JumpData()
-        data = read_struct(bytes_io, JumpData.BIN)
-        jump.time, jump.velocity, jump.sin, jump.cos, jump.xy_speed = data
-        return jump
+    def from_bytes(data, offset = 0):
+        return JumpData(*JumpData.BIN.unpack_from(data, offset))
 
     def to_bytes(self):
         return self.BIN.pack(
@@ -145,3 +214,12 @@ class JumpData(object):
             self.cos,
             self.xy_speed
         )
+
+    def pack_into(self, buffer, offset):
+        """ Write the jump data in buffer at that offset, and return the
+        offset following it. """
+        self.BIN.pack_into(
+            buffer, offset,
+            self.time, self.velocity, self.sin, self.cos, self.xy_speed
+        )
+        return offset + self.BIN.size
@@ -0,0 +1,104 @@
+import math
+
+from durator.config import CONFIG
+from durator.world.game.movement import MovementFlags
+from durator.world.opcodes import OpCode
+
+
+class MovementFilter(object):
+    """ Decide which movements of a player are sent to the players around,
+    suppressing heartbeats they can extrapolate themselves.
+
+    Opcodes other than MSG_MOVE_HEARTBEAT change the movement state (start,
+    stop, jump...) and are always sent. A heartbeat is sent only if the
+    position dead-reckoned from the last sent movement (its position, moved
+    along its orientation and direction flags at the unit speed for the time
+    elapsed) is farther than ERROR_THRESHOLD from the real one, or if the last
+    sent movement is MAX_INTERVAL ms old. Heartbeats while turning, falling or
+    on a transport are always sent. Times are the client movement times.
+
+    Each connection has its own filter, only used by its own thread.
+
+    Attributes:
+    - last_sent: (flags, time, x, y, o) of the last movement sent, copied as
+        the player position object may be changed by the world afterwards
+    - sent: number of movements sent
+    - suppressed: number of heartbeats suppressed
+    """
+
+    ENABLED         = CONFIG.getboolean("world", "heartbeat_filter")
+    ERROR_THRESHOLD = float(CONFIG["world"]["heartbeat_error_threshold"])
+    MAX_INTERVAL    = int(CONFIG["world"]["heartbeat_max_interval"])
+
+    FORWARD      = MovementFlags.FORWARD.value
+    BACKWARD     = MovementFlags.BACKWARD.value
+    STRAFE_LEFT  = MovementFlags.STRAFE_LEFT.value
+    STRAFE_RIGHT = MovementFlags.STRAFE_RIGHT.value
+    WALK_MODE    = MovementFlags.WALK_MODE.value
+    IS_SWIMMING  = MovementFlags.IS_SWIMMING.value
+    UNPREDICTABLE_FLAGS = ( MovementFlags.TURN_LEFT.value
+                          | MovementFlags.TURN_RIGHT.value
+                          | MovementFlags.IS_FALLING.value
+                          | MovementFlags.ON_TRANSPORT.value )
+
+    def __init__(self):
+        self.last_sent = None
+        self.sent = 0
+        self.suppressed = 0
+
+    def should_send(self, opcode, movement, speeds):
+        """ Return True if that movement, received with opcode, has to be sent
+        to the players around. speeds are the unit speeds (see Unit). """
+        if ( not self.ENABLED
+             or opcode != OpCode.MSG_MOVE_HEARTBEAT
+             or self._is_off_course(movement, speeds) ):
+            position = movement.position
+            self.last_sent = ( movement.flags, movement.time,
+                               position.x, position.y, position.o )
+            self.sent += 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def _is_off_course(self, movement, speeds):
+        last_sent = self.last_sent
+        if last_sent is None:
+            return True
+        flags, time, x, y, o = last_sent
+        if ( flags & self.UNPREDICTABLE_FLAGS
+             or movement.flags & self.UNPREDICTABLE_FLAGS ):
+            return True
+        elapsed = movement.time - time
+        if not 0 <= elapsed < self.MAX_INTERVAL:
+            return True
+
+        x, y = self.get_reckoned_position(flags, x, y, o, speeds, elapsed)
+        position = movement.position
+        sq_error = (position.x - x) ** 2 + (position.y - y) ** 2
+        return sq_error > self.ERROR_THRESHOLD * self.ERROR_THRESHOLD
+
+    @classmethod
+    def get_reckoned_position(cls, flags, x, y, o, speeds, elapsed):
+        """ Return the (x, y) position a client extrapolates after elapsed ms
+        from a movement with these flags, position and orientation. Like the
+        client, use the swim speeds in water, else the walk speed in walk
+        mode, else the run speeds; backward speeds apply when moving back. """
+        forward = bool(flags & cls.FORWARD) - bool(flags & cls.BACKWARD)
+        strafe = bool(flags & cls.STRAFE_LEFT) - bool(flags & cls.STRAFE_RIGHT)
+        if not forward and not strafe:
+            return x, y
+
+        if flags & cls.IS_SWIMMING:
+            speed = speeds["swim"] if forward >= 0 else speeds["swim_bw"]
+        elif flags & cls.WALK_MODE:
+            speed = speeds["walk"]
+        else:
+            speed = speeds["run"] if forward >= 0 else speeds["run_bw"]
+        angle = o + math.atan2(strafe, forward)
+        distance = speed * elapsed / 1000
+        return x + math.cos(angle) * distance, y + math.sin(angle) * distance
+
+    def get_stats(self):
+        """ Return a dict with the numbers of movements sent and heartbeats
+        suppressed. """
+        return { "sent": self.sent, "suppressed": self.suppressed }
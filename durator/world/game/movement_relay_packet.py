@@ -0,0 +1,35 @@
+from struct import Struct
+
+from durator.world.game.packed_guid import pack_guid
+from durator.world.game.update_object_packet import (
+    UpdateObjectPacket, UpdateType )
+from durator.world.opcodes import OpCode
+from durator.world.world_packet import WorldPacket
+
+
+class MovementRelayPacket(WorldPacket):
+    """ MSG_MOVE_* packet relayed to the players tracking the mover: the same
+    opcode as the one received, with the mover GUID prepended to the movement
+    data sent by its client. The GUID is packed like the one of movement
+    update blocks, if "movement" is in packed_guid_update_types. """
+
+    GUID_BIN = Struct("<Q")
+
+    def __init__(self, opcode, guid, movement_data):
+        if UpdateType.MOVEMENT in UpdateObjectPacket.PACKED_GUID_TYPES:
+            guid_bytes = pack_guid(guid)
+        else:
+            guid_bytes = self.GUID_BIN.pack(guid)
+        super().__init__(opcode, guid_bytes + movement_data)
+        self.guid = guid
+
+    def get_replace_key(self):
+        """ A relayed movement holds the whole mover state, so a newer one for
+        the same mover replaces it in outgoing queues. """
+        return "relay", self.guid
+
+    def is_droppable(self):
+        """ Only heartbeats may be dropped: they are sent regularly while
+        moving, whereas other movements (stop, jump, fall land...) are not
+        followed by a newer one if the mover stands still. """
+        return self.opcode == OpCode.MSG_MOVE_HEARTBEAT
@@ -0,0 +1,167 @@
+from durator.config import CONFIG
+from durator.world.game.destroy_object_packet import DestroyObjectPacket
+from durator.world.game.player_spawn_packet import PlayerSpawnPacket
+from durator.world.game.update_object_packet import (
+    UpdateType, UpdateObjectPacket )
+
+
+class InterestManager(object):
+    """ Decide which players know about which other players, and send the
+    create, movement and destroy packets to keep clients up to date.
+
+    Each Player has a tracked_guids set with the GUIDs of the players its
+    client knows about, i.e. it received a create block for them. The relation
+    is symmetric: if A tracks B, B tracks A, and both sets are always modified
+    together, holding both players locks (taken in GUID order).
+
+    A player starts tracking another one when it gets within update_range of
+    it, but only stops when it gets farther than update_range plus
+    update_range_margin, so players moving around the range limit do not get
+    created and destroyed repeatedly. Far players may get movements at a
+    reduced rate, see MovementLod.
+    """
+
+    UPDATE_RANGE = float(CONFIG["world"]["update_range"])
+    LEAVE_RANGE  = UPDATE_RANGE + float(CONFIG["world"]["update_range_margin"])
+
+    def __init__(self, object_manager):
+        self.object_manager = object_manager
+        self.server = object_manager.server
+
+    def update_player(self, ref_player, movement_packet = None,
+                      send_movement = True):
+        """ Update the interests of ref_player after it moved (or entered the
+        world): create it for players getting in range (and them for it),
+        destroy it for players getting out of range (and them for it), and
+        send its movement to the ones still tracking it: movement_packet if
+        given (e.g. a MovementRelayPacket), else a movement update block,
+        unless send_movement is False (e.g. a suppressed heartbeat). """
+        with ref_player.lock:
+            ref_guid = ref_player.guid
+            ref_position = ref_player.position
+            tracked_guids = set(ref_player.tracked_guids)
+
+        object_manager = self.object_manager
+        near_guids = set(
+            object_manager.players_in_range_of(ref_player, self.LEAVE_RANGE)
+        )
+
+        entering_players = []
+        for guid in near_guids - tracked_guids:
+            player = object_manager.get_player(guid)
+            if player is None:
+                continue
+            if ref_position.distance_from(player.position) < self.UPDATE_RANGE:
+                if self._link(ref_player, player):
+                    entering_players.append(player)
+
+        leaving_guids = []
+        for guid in tracked_guids - near_guids:
+            if self._unlink(ref_player, guid):
+                leaving_guids.append(guid)
+
+        self._send_enter(ref_player, entering_players)
+        self._send_leave(ref_guid, leaving_guids)
+        if send_movement:
+            self._send_movement(
+                ref_player, tracked_guids & near_guids, movement_packet
+            )
+
+    def update_fields(self, ref_player):
+        """ Send the fields of ref_player changed since the last call, to
+        ref_player itself and to players tracking it, and clear them. """
+        infos = { "object": ref_player, "is_player": False }
+        partial_packet = UpdateObjectPacket(UpdateType.PARTIAL, infos)
+        with ref_player.lock:
+            if not ref_player.dirty_mask:
+                return
+            partial_packet.add_object_fields(ref_player.dirty_mask)
+            ref_player.clear_dirty_fields()
+            guids = set(ref_player.tracked_guids)
+            guids.add(ref_player.guid)
+        self._broadcast(partial_packet, guids)
+
+    def remove_player(self, ref_player):
+        """ Untrack ref_player from all players tracking it, before it leaves
+        the world. """
+        with ref_player.lock:
+            ref_guid = ref_player.guid
+            tracked_guids = set(ref_player.tracked_guids)
+
+        leaving_guids = []
+        for guid in tracked_guids:
+            if self._unlink(ref_player, guid):
+                leaving_guids.append(guid)
+        self._broadcast(DestroyObjectPacket(ref_guid), leaving_guids)
+
+    def _link(self, player_a, player_b):
+        """ Make both players track each other. Return False if they already
+        did (e.g. the other player did it concurrently). """
+        first, second = sorted([player_a, player_b], key = lambda p: p.guid)
+        with first.lock, second.lock:
+            if player_b.guid in player_a.tracked_guids:
+                return False
+            player_a.tracked_guids.add(player_b.guid)
+            player_b.tracked_guids.add(player_a.guid)
+            return True
+
+    def _unlink(self, ref_player, guid):
+        """ Make ref_player and the player with that GUID (if it still exists)
+        stop tracking each other, dropping their accumulated movements. Return
+        False if they already did. """
+        player = self.object_manager.get_player(guid)
+        if player is None:
+            with ref_player.lock:
+                if guid not in ref_player.tracked_guids:
+                    return False
+                ref_player.tracked_guids.discard(guid)
+        else:
+            first, second = sorted(
+                [ref_player, player], key = lambda p: p.guid
+            )
+            with first.lock, second.lock:
+                if guid not in ref_player.tracked_guids:
+                    return False
+                ref_player.tracked_guids.discard(guid)
+                player.tracked_guids.discard(ref_player.guid)
+
+        movement_lod = self.object_manager.movement_lod
+        movement_lod.discard(ref_player.guid, guid)
+        movement_lod.discard(guid, ref_player.guid)
+        return True
+
+    def _send_enter(self, ref_player, entering_players):
+        if not entering_players:
+            return
+        ref_infos = { "object": ref_player, "is_player": False }
+        entering_guids = [player.guid for player in entering_players]
+        self._broadcast(PlayerSpawnPacket(ref_infos), entering_guids)
+
+        for player in entering_players:
+            infos = { "object": player, "is_player": False }
+            self._broadcast(PlayerSpawnPacket(infos), [ref_player.guid])
+
+    def _send_leave(self, ref_guid, leaving_guids):
+        if not leaving_guids:
+            return
+        self._broadcast(DestroyObjectPacket(ref_guid), leaving_guids)
+        for guid in leaving_guids:
+            self._broadcast(DestroyObjectPacket(guid), [ref_guid])
+
+    def _send_movement(self, ref_player, guids, movement_packet = None):
+        if not guids:
+            return
+        if movement_packet is None:
+            infos = { "object": ref_player, "is_player": False }
+            movement_packet = UpdateObjectPacket(UpdateType.MOVEMENT, infos)
+        movement_lod = self.object_manager.movement_lod
+        if movement_lod.is_enabled():
+            guids = movement_lod.filter_trackers(
+                ref_player, guids, movement_packet
+            )
+        self._broadcast(movement_packet, guids)
+
+    def _broadcast(self, packet, guids):
+        """ Send the packet to these players with the next world tick. """
+        if guids:
+            self.server.world_tick.send(packet, guids)
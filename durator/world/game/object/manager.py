@@ -6,15 +6,17 @@ from peewee import PeeweeException
 from durator.config import CONFIG
 from durator.db.database import DB, db_connection
 from durator.world.game.character.manager import CharacterManager
+from durator.world.game.object.interest_manager import InterestManager
+from durator.world.game.object.movement_lod import MovementLod
 from durator.world.game.object.object_fields import (
     ObjectField, UnitField, PlayerField )
 from durator.world.game.object.type.base_object import (
     ObjectType, OBJECT_TYPE_TO_FLAGS )
+from durator.world.game.object.player_snapshot import PlayerSnapshot
+from durator.world.game.object.proximity_engine import (
+    ProximityEngine, NUMPY_AVAILABLE )
+from durator.world.game.object.spatial_grid import SpatialGrid
 from durator.world.game.object.type.player import Player
-from durator.world.game.player_spawn_packet import PlayerSpawnPacket
-from durator.world.game.update_object_packet import (
-    UpdateType, UpdateObjectPacket )
-from durator.world.world_connection_state import WorldConnectionState
 from durator.common.log import LOG
 
 
@@ -61,6 +63,8 @@ class ObjectManager(BaseObjectManager):
     def __init__(self, server):
         super().__init__(server)
         self.player_manager = _PlayerManager(server)
+        self.movement_lod = MovementLod(self)
+        self.interest_manager = InterestManager(self)
 
     # ----------------------------------------
     # Add diverse objects to the world
@@ -110,69 +114,61 @@ class ObjectManager(BaseObjectManager):
     # Modify objects in the world
     # ----------------------------------------
 
+    def update_player_position(self, player):
+        """ Update the spatial index after a player moved. """
+        self.player_manager.update_player_position(player)
+
+    def publish_snapshot(self):
+        """ Publish the players changes since the last snapshot, with their
+        visibility if the proximity engine is used. """
+        self.player_manager.publish_snapshot(with_visibility = True)
+
+    def set_batched_snapshots(self, batched):
+        """ If batched is True, player moves are only published by
+        publish_snapshot calls, e.g. at each world tick. """
+        self.player_manager.batched_snapshots = batched
+
     def save_player(self, player):
         """ Save the Player to the database. """
         self.player_manager.save_player(player)
 
-    def update_movement(self, ref_player):
-        """ Send ref_player update movement packets to near players. """
-        ref_guid = ref_player.guid
-        dist_range = float(CONFIG["world"]["update_range"])
-        players_guids = self.players_in_range_of(ref_player, dist_range)
-
-        update_movement_guids, update_create_guids = \
-            self._tracking_and_untracking_players(
-                ref_guid,
-                players_guids,
-                update = True
-            )
-
-        infos = { "object": ref_player, "is_player": False }
-        create_packet = PlayerSpawnPacket(infos)
-        movement_packet = UpdateObjectPacket(UpdateType.MOVEMENT, infos)
-
-        # If a player is not tracking our reference player (= it doesn't
-        # know about that GUID), send a create object packet.
-        self.server.broadcast(
-            create_packet,
-            state = WorldConnectionState.IN_WORLD,
-            guids = update_create_guids
+    def update_movement(self, ref_player, movement_packet = None,
+                        send_movement = True):
+        """ Send ref_player create, movement or destroy packets to players
+        around, and send it the players getting in or out of its range. If
+        movement_packet is given, it is sent instead of a movement update; if
+        send_movement is False, no movement is sent. """
+        self.interest_manager.update_player(
+            ref_player, movement_packet, send_movement
         )
 
-        # Else (already tracking ref_player), send a movement update.
-        self.server.broadcast(
-            movement_packet,
-            state = WorldConnectionState.IN_WORLD,
-            guids = update_movement_guids
-        )
+    def update_fields(self, ref_player):
+        """ Send ref_player changed fields to itself and players around. """
+        self.interest_manager.update_fields(ref_player)
 
-    def _tracking_and_untracking_players(self, ref_guid, players_guids,
-            update = False):
-        """ Return lists of players (from the GUID list) that are tracking or
-        not tracking ref_player. If update is True, append ref_guid to all not
-        previously tracking players. """
-        tracking_guids = []
-        not_tracking_guids = []
-
-        for player in [self.get_player(guid) for guid in players_guids]:
-            if player is None:
-                continue
-            with player.lock:
-                if ref_guid not in player.tracked_guids:
-                    not_tracking_guids.append(player.guid)
-                    if update:
-                        player.tracked_guids.append(ref_guid)
-                else:
-                    tracking_guids.append(player.guid)
+    def send_accumulated_movements(self):
+        """ Send the movements accumulated by the movement LOD which are due
+        at this world tick. """
+        for packet, guids in self.movement_lod.pop_due_packets().items():
+            self.server.world_tick.send(packet, guids)
 
-        return tracking_guids, not_tracking_guids
+    def update_all_fields(self):
+        """ Send the changed fields of all players. """
+        for guid in self.get_player_guids():
+            player = self.get_player(guid)
+            if player is not None and player.dirty_mask:
+                self.update_fields(player)
 
     # ----------------------------------------
     # Remove diverse objects from the world
     # ----------------------------------------
 
     def remove_player(self, guid):
-        """ Remove the player from the object list and save its data. """
+        """ Remove the player from the object list and save its data. Players
+        tracking it are told to destroy it. """
+        player = self.get_player(guid)
+        if player is not None:
+            self.interest_manager.remove_player(player)
         self.player_manager.remove_player(guid)
 
     @staticmethod
@@ -365,12 +361,125 @@ class _UnitManager(BaseObjectManager):
 
 
 
+class _MapPartition(BaseObjectManager):
+    """ Objects of a single map, with their own lock and spatial grid, so that
+    the grid cells of a map only hold objects of that map, and changes on a
+    map do not wait for changes on other maps. """
+
+    def __init__(self, server, map_id, cell_size):
+        super().__init__(server)
+        self.map_id = map_id
+        self.grid = SpatialGrid(cell_size)
+
+    def add_object(self, base_object):
+        with self.lock:
+            self._add_object(base_object)
+            self.grid.add(base_object.guid, self.map_id, base_object.position)
+
+    def get_object(self, guid):
+        return self._get_object(guid)
+
+    def get_guids(self):
+        return self._get_guids()
+
+    @lock
+    def move_object(self, guid, position):
+        """ Move that object in the grid and return the (old, new) keys of its
+        cells, or None if it is not in this partition (anymore). """
+        if guid not in self.objects:
+            return None
+        old_key = self.grid.get_key(guid)
+        self.grid.move(guid, self.map_id, position)
+        return old_key, self.grid.get_key(guid)
+
+    @lock
+    def remove_object(self, guid):
+        """ Remove that object and return the key of its former cell. """
+        key = self.grid.get_key(guid)
+        self._remove_object(guid)
+        self.grid.remove(guid)
+        return key
+
+
+
+
+
 class _PlayerManager(BaseObjectManager):
     """ The player manager handles all player in world, but must be accessed
-    from the more general object manager for now. """
+    from the more general object manager for now.
+
+    Players are stored in a _MapPartition per map, created when a player first
+    enters it; the manager itself keeps the map and the position of each
+    player GUID. Changes are published in an immutable PlayerSnapshot: readers
+    (get_player, range queries...) only use the current snapshot and never
+    take a lock.
+
+    Locks are always taken in this order:
+    - lock: guards the players, their maps and the partitions, so it is only
+        held when a player enters the world, changes map or leaves it, and
+        while publishing a snapshot;
+    - the partition lock: held by all changes on that map, alone for moves;
+    - state_lock: guards the positions, changed grid cells and proximity
+        engine shared by all maps, only held for a few operations.
+
+    Added and removed players are published right away. Moves are published
+    after each of them, or only by publish_snapshot calls if batched_snapshots
+    is True, e.g. once per world tick; readers then see positions at most one
+    batch old. A new snapshot shares the grid cells that did not change with
+    the previous one: changed cells go in its recent cells, which are merged
+    in a new cells dict only once there are more than the square root of the
+    number of cells (and at least MIN_RECENT_CELLS), so a publication copies
+    about that many cells instead of all of them.
+
+    With the numpy proximity engine, positions are also stored in its arrays,
+    and the snapshots published at each world tick come with the players
+    visible by each player (within the interest manager leave range), computed
+    all at once; range queries for that range then just read them.
+    """
+
+    GRID_CELL_SIZE = float(CONFIG["world"]["grid_cell_size"])
+    PROXIMITY_ENGINE = CONFIG["world"]["proximity_engine"]
+    MIN_RECENT_CELLS = 16
 
     def __init__(self, server):
         super().__init__(server)
+        self.state_lock = threading.Lock()
+        self.partitions = {}
+        self.player_maps = {}
+        self.players = {}
+        self.positions = {}
+        self.snapshot = PlayerSnapshot(cell_size = self.GRID_CELL_SIZE)
+        self.changed_cells = set()
+        self.players_changed = False
+        self.batched_snapshots = False
+        self.proximity_engine = self._create_proximity_engine()
+        self.visibility_changed = False
+
+    def _create_proximity_engine(self):
+        if self.PROXIMITY_ENGINE != "numpy":
+            return None
+        if not NUMPY_AVAILABLE:
+            LOG.warning("NumPy is not available, using grid range queries.")
+            return None
+        return ProximityEngine(InterestManager.LEAVE_RANGE)
+
+    @lock
+    def _get_partition(self, map_id):
+        """ Return the partition for that map, creating it if needed. """
+        partition = self.partitions.get(map_id)
+        if partition is None:
+            partition = _MapPartition(self.server, map_id, self.GRID_CELL_SIZE)
+            self.partitions[map_id] = partition
+        return partition
+
+    def _get_player_partition(self, guid):
+        """ Return the partition of that player, or None if it's unknown. It
+        takes no lock, partitions are never removed; callers check that the
+        player is still in the partition under its lock. """
+        map_id = self.player_maps.get(guid)
+        if map_id is None:
+            return None
+        return self.partitions[map_id]
 
     # ----------------------------------------
     # Add players to world
@@ -392,10 +501,42 @@ class _PlayerManager(BaseObjectManager):
         _PlayerManager.add_player_fields(player, char_data)
         player.import_skills(char_data)
         player.import_spells(char_data)
+        player.clear_dirty_fields()  # sent with the spawn packet
 
-        self._add_object(player)
+        self._add_to_partition(player, player.map_id)
         return player
 
+    def _add_to_partition(self, player, map_id):
+        with self.lock:
+            self._add_to_partition_unpublished(player, map_id)
+        self.publish_snapshot()
+
+    def _add_to_partition_unpublished(self, player, map_id):
+        """ Add the player to the partition of that map; the manager lock must
+        be held. """
+        guid = player.guid
+        partition = self._get_partition(map_id)
+        with partition.lock:
+            partition.add_object(player)
+            self.player_maps[guid] = map_id
+            self.players[guid] = player
+            self.players_changed = True
+            self._set_position(
+                partition, guid, player.position, partition.grid.get_key(guid)
+            )
+
+    def _set_position(self, partition, guid, position, *keys):
+        """ Record the new position of that GUID, moved in the partition grid
+        beforehand under its lock, and the grid cells (keys) to publish. """
+        with self.state_lock:
+            self.positions[guid] = (position.x, position.y, position.z)
+            self.changed_cells.update(keys)
+            if self.proximity_engine is not None:
+                self.proximity_engine.set_position(
+                    guid, partition.map_id, position.x, position.y, position.z
+                )
+                self.visibility_changed = True
+
     @staticmethod
     @db_connection
     def add_player_fields(player, char_data):
@@ -440,24 +581,132 @@ class _PlayerManager(BaseObjectManager):
     # ----------------------------------------
 
     def get_player(self, guid):
-        return self._get_object(guid)
+        return self.snapshot.get_player(guid)
 
     def get_guids(self):
-        return self._get_guids()
+        return self.snapshot.get_guids()
 
-    @lock
     def players_in_range_of(self, ref_player, dist_range):
-        """ Return a list of Players' GUIDs in that ref_player's range."""
-        with ref_player.lock:
-            ref_position = ref_player.position
-
-        guids_in_range = []
-        for player_guid in self.objects:
-            player = self.get_player(player_guid)
-            if ref_position.distance_from(player.position) < dist_range:
-                if ref_player.guid != player_guid:
-                    guids_in_range.append(player_guid)
-        return guids_in_range
+        """ Return a list of Players' GUIDs in that ref_player's range, only
+        looking at players of its map, in the current snapshot. """
+        ref_guid = ref_player.guid
+        snapshot = self.snapshot
+        if ref_guid not in snapshot.players:
+            return []
+        return snapshot.guids_in_range_of(
+            ref_guid, ref_player.map_id, ref_player.position, dist_range
+        )
+
+    def publish_snapshot(self, with_visibility = False, blocking = True):
+        """ Replace the snapshot with a new one if anything changed. Only the
+        changed grid cells are rebuilt. If with_visibility is True and the
+        proximity engine is used, the visibility is computed again, else the
+        previous one is kept.
+
+        If blocking is False and the manager lock is held by another thread,
+        return right away: that thread publishes the changes afterwards, as
+        publishers check for changes made while they held the lock. """
+        while self.lock.acquire(blocking):
+            try:
+                self._publish_snapshot(with_visibility)
+            finally:
+                self.lock.release()
+            if not self.changed_cells:
+                return
+            blocking = False
+            with_visibility = False
+
+    def _publish_snapshot(self, with_visibility):
+        """ Publish a new snapshot; the manager lock must be held. """
+        snapshot = self.snapshot
+        players = snapshot.players
+        players_changed = self.players_changed
+        if players_changed:
+            players = dict(self.players)
+            self.players_changed = False
+        with self.state_lock:
+            changed_cells = self.changed_cells
+            self.changed_cells = set()
+        engine = self.proximity_engine
+        update_visibility = ( with_visibility and engine is not None
+                              and self.visibility_changed )
+        if not changed_cells and not players_changed and not update_visibility:
+            return
+
+        cells = snapshot.cells
+        recent_cells = dict(snapshot.recent_cells)
+        positions = self.positions
+        for key in changed_cells:
+            partition = self.partitions[key[0]]
+            with partition.lock:
+                cell_guids = partition.grid.get_cell(key)
+                with self.state_lock:
+                    recent_cells[key] = tuple( (guid,) + positions[guid]
+                                               for guid in cell_guids )
+        max_recent_cells = max( self.MIN_RECENT_CELLS,
+                                int(len(cells) ** 0.5) )
+        if len(recent_cells) > max_recent_cells:
+            cells = dict(cells)
+            for key, cell in recent_cells.items():
+                if cell:
+                    cells[key] = cell
+                else:
+                    cells.pop(key, None)
+            recent_cells = {}
+        visibility = snapshot.visibility
+        visibility_range = None
+        if engine is not None:
+            if update_visibility:
+                with self.state_lock:
+                    visibility = engine.get_visibility()
+                    self.visibility_changed = False
+            visibility_range = engine.dist_range
+        self.snapshot = PlayerSnapshot(
+            players, cells, self.GRID_CELL_SIZE,
+            visibility = visibility,
+            visibility_range = visibility_range,
+            recent_cells = recent_cells
+        )
+
+    # ----------------------------------------
+    # Modify players data
+    # ----------------------------------------
+
+    def update_player_position(self, player):
+        """ Update the player position in its partition grid, moving it to
+        another partition if its map changed. Moves on the same map only take
+        the partition lock. """
+        with player.lock:
+            guid = player.guid
+            map_id = player.map_id
+            position = player.position
+
+        partition = self._get_player_partition(guid)
+        if partition is None:
+            return
+        if partition.map_id == map_id:
+            with partition.lock:
+                keys = partition.move_object(guid, position)
+                if keys is None:
+                    return
+                self._set_position(partition, guid, position, *keys)
+            if not self.batched_snapshots:
+                self.publish_snapshot(blocking = False)
+        else:
+            self._change_map(player, map_id)
+
+    def _change_map(self, player, map_id):
+        guid = player.guid
+        with self.lock:
+            partition = self._get_player_partition(guid)
+            if partition is None:
+                return
+            with partition.lock:
+                key = partition.remove_object(guid)
+                with self.state_lock:
+                    self.changed_cells.add(key)
+            self._add_to_partition_unpublished(player, map_id)
+        self.publish_snapshot()
 
     # ----------------------------------------
     # Remove players from world
@@ -470,7 +719,22 @@ class _PlayerManager(BaseObjectManager):
             LOG.warning("Tried to remove a non-existing player.")
             return
 
-        self._remove_object(guid)
+        with self.lock:
+            partition = self._get_player_partition(guid)
+            if partition is None:
+                return
+            del self.player_maps[guid]
+            del self.players[guid]
+            self.players_changed = True
+            with partition.lock:
+                key = partition.remove_object(guid)
+                with self.state_lock:
+                    self.changed_cells.add(key)
+                    del self.positions[guid]
+                    if self.proximity_engine is not None:
+                        self.proximity_engine.remove(guid)
+                        self.visibility_changed = True
+        self.publish_snapshot()
         self.save_player(player)
 
     @db_connection
@@ -0,0 +1,118 @@
+import threading
+
+from durator.config import CONFIG
+
+
+class MovementLod(object):
+    """ Movement level of detail: players far from a mover get its movements
+    at a reduced rate.
+
+    TIERS is a list of (max distance, divisor) sorted by distance, read from
+    the movement_lod_tiers option. Trackers in a tier with a divisor of 1 get
+    the movements right away; for the others, each (tracker, mover) pair has
+    an accumulator keeping only the most recent movement packet, which is sent
+    by a world tick every divisor client heartbeat periods, so a moving player
+    is seen at 1/divisor of its heartbeat rate. Movers are spread over ticks by
+    their GUID, so far trackers do not get all the accumulated movements at the
+    same tick.
+
+    It needs world ticks: with a tick rate of 0, all movements are sent.
+
+    Attributes:
+    - pending: dict of [packet, due tick] by (tracker GUID, mover GUID)
+    - due_keys: dict of lists of pending keys by due tick; keys discarded or
+        sent earlier are left in there, pending has the actual due tick
+    - tick: number of flushes so far
+    - replaced: number of accumulated packets replaced by a newer one
+    """
+
+    # Time (seconds) between two heartbeats of a moving client.
+    HEARTBEAT_PERIOD = 0.5
+
+    TIERS = sorted(
+        ( float(tier.split(":")[0]), int(tier.split(":")[1]) )
+        for tier in CONFIG["world"]["movement_lod_tiers"].split(",")
+        if tier.strip()
+    )
+
+    def __init__(self, object_manager):
+        self.object_manager = object_manager
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.due_keys = {}
+        self.tick = 0
+        self.replaced = 0
+
+    def is_enabled(self):
+        world_tick = self.object_manager.server.world_tick
+        return bool(self.TIERS) and world_tick.is_enabled()
+
+    def get_divisor(self, sq_distance):
+        """ Return the divisor of the tier of a tracker at that squared
+        distance; beyond the last tier, its divisor is used. """
+        for max_distance, divisor in self.TIERS:
+            if sq_distance < max_distance * max_distance:
+                return divisor
+        return self.TIERS[-1][1]
+
+    def filter_trackers(self, ref_player, guids, packet):
+        """ Return the GUIDs of the trackers of ref_player which must get the
+        movement packet right away, and accumulate it for the others. """
+        ref_guid = ref_player.guid
+        ref_position = ref_player.position
+        get_player = self.object_manager.get_player
+        tick_period = self.object_manager.server.world_tick.get_period()
+        direct_guids = []
+        with self.lock:
+            pending = self.pending
+            for guid in guids:
+                player = get_player(guid)
+                divisor = 1
+                if player is not None:
+                    position = player.position
+                    divisor = self.get_divisor(
+                        (ref_position.x - position.x) ** 2 +
+                        (ref_position.y - position.y) ** 2 +
+                        (ref_position.z - position.z) ** 2
+                    )
+                key = (guid, ref_guid)
+                if divisor == 1:
+                    # An older accumulated movement must not be sent after it.
+                    pending.pop(key, None)
+                    direct_guids.append(guid)
+                    continue
+
+                entry = pending.get(key)
+                if entry is not None:
+                    entry[0] = packet
+                    self.replaced += 1
+                    continue
+                num_ticks = max(
+                    round(divisor * self.HEARTBEAT_PERIOD / tick_period), 1
+                )
+                next_tick = self.tick + 1
+                due_tick = next_tick + (-(next_tick + ref_guid)) % num_ticks
+                pending[key] = [packet, due_tick]
+                self.due_keys.setdefault(due_tick, []).append(key)
+        return direct_guids
+
+    def discard(self, tracker_guid, mover_guid):
+        """ Drop the movement accumulated for that pair, e.g. when the tracker
+        does not track the mover anymore. """
+        with self.lock:
+            self.pending.pop((tracker_guid, mover_guid), None)
+
+    def pop_due_packets(self):
+        """ Start a new tick and return a dict of the lists of tracker GUIDs
+        by packet, for the accumulated movements due at this tick. """
+        due_packets = {}
+        with self.lock:
+            self.tick += 1
+            pending = self.pending
+            for key in self.due_keys.pop(self.tick, ()):
+                entry = pending.get(key)
+                if entry is None or entry[1] != self.tick:
+                    continue
+                del pending[key]
+                due_packets.setdefault(entry[0], []).append(key[0])
+        return due_packets
@@ -0,0 +1,98 @@
+""" Precompiled layouts of update fields, computed once from FIELD_TYPE_MAP:
+where each field is in the object slots, how its value is packed, and which
+bits it sets in update masks. """
+
+from enum import Enum
+from struct import Struct
+
+from durator.world.game.object.object_fields_type import (
+    FieldType, FIELD_TYPE_MAP )
+
+
+class FieldLayout(object):
+    """ Layout of an update field in the 32-bit slots of an object.
+
+    Attributes:
+    - index: index of the first slot of the field
+    - field_bin: Struct of the field value
+    - slots_bin: Struct of the 1 or 2 slots holding that value
+    - num_slots
+    - mask: int bitmask of the slots of the field
+    """
+
+    FIELD_BIN_MAP = {
+        FieldType.INT32:      Struct("<i"),
+        FieldType.TWO_INT16:  Struct("<I"),
+        FieldType.FLOAT:      Struct("<f"),
+        FieldType.INT64:      Struct("<q"),
+        FieldType.FOUR_BYTES: Struct("<I")
+    }
+
+    SLOTS_BIN_MAP = {
+        1: Struct("<I"),
+        2: Struct("<2I")
+    }
+
+    def __init__(self, field, field_type):
+        if isinstance(field, Enum):
+            self.index = field.value
+        else:
+            self.index = int(field)
+        self.field_bin = self.FIELD_BIN_MAP[field_type]
+        self.num_slots = self.field_bin.size // 4
+        self.slots_bin = self.SLOTS_BIN_MAP[self.num_slots]
+        self.mask = ((1 << self.num_slots) - 1) << self.index
+
+    def to_slots(self, value):
+        """ Return the tuple of slot values for that field value. """
+        return self.slots_bin.unpack(self.field_bin.pack(value))
+
+    def from_slots(self, slots):
+        """ Return the field value stored in these object slots. """
+        index = self.index
+        data = self.slots_bin.pack(*slots[index:index + self.num_slots])
+        return self.field_bin.unpack(data)[0]
+
+
+class ObjectLayout(object):
+    """ Layout of the update fields of an object type.
+
+    Attributes:
+    - num_fields: number of slots, i.e. the hard limit of the object type
+    - fields: dict of FieldLayouts of the fields this object type can have,
+        keyed like FIELD_TYPE_MAP (*Field values or ints)
+    """
+
+    def __init__(self, num_fields, field_enums):
+        self.num_fields = num_fields
+        self.fields = {}
+        for field, field_layout in FIELD_LAYOUTS.items():
+            if not isinstance(field, field_enums + (int,)):
+                continue
+            if field_layout.index + field_layout.num_slots <= num_fields:
+                self.fields[field] = field_layout
+
+    def get_field(self, field):
+        """ Return the FieldLayout of field, or None if it does not fit in
+        num_fields, e.g. a player field for a base object; fields with no
+        known type are INT32. """
+        field_layout = self.fields.get(field)
+        if field_layout is None:
+            field_layout = FieldLayout(field, FieldType.INT32)
+            if field_layout.index + field_layout.num_slots > self.num_fields:
+                return None
+        return field_layout
+
+    def get_mask(self, fields):
+        """ Return the int bitmask of the slots of all these fields, ignoring
+        fields out of this layout. """
+        mask = 0
+        for field in fields:
+            field_layout = self.get_field(field)
+            if field_layout is not None:
+                mask |= field_layout.mask
+        return mask
+
+
+FIELD_LAYOUTS = { field: FieldLayout(field, field_type)
+                  for field, field_type in FIELD_TYPE_MAP.items() }
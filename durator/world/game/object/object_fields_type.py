@@ -6,7 +6,6 @@ from durator.world.game.object.object_fields import (
     ObjectField, ItemField, ContainerField,
     UnitField, PlayerField,
     DynamicObjectField, GameObjectField, CorpseField )
-from durator.world.game.object.type.player import Player
 
 
 class FieldType(Enum):
@@ -337,7 +336,12 @@ FIELD_TYPE_MAP = {
 }
 
 
-for i in range(Player.NUM_SKILLS):
+# Skill fields fill the space up to the quest logs, 3 per skill. It matches
+# Player.NUM_SKILLS, but object types can't be imported as they use this map.
+NUM_SKILLS = ( PlayerField.QUEST_LOG_1_1.value
+               - PlayerField.SKILL_INFO_1_ID.value ) // 3
+
+for i in range(NUM_SKILLS):
     FIELD_TYPE_MAP.update({
         PlayerField.SKILL_INFO_1_ID.value + i*3:         FieldType.INT32,
         PlayerField.SKILL_INFO_1_LEVEL.value + i*3:      FieldType.INT32,
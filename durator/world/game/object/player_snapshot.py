@@ -0,0 +1,80 @@
+import math
+
+
+class PlayerSnapshot(object):
+    """ Immutable view of the players in world, with their positions and the
+    spatial grid cells, so readers can use it without taking any lock.
+
+    The _PlayerManager builds a new snapshot after each batch of changes and
+    replaces its reference to the previous one (read-copy-update); a reader
+    keeping a snapshot sees the same consistent state for as long as it needs
+    it. Snapshots and their containers must never be modified.
+
+    Attributes:
+    - players: dict of Players by GUID
+    - cells: dict of grid cells by key (map_id, cell_x, cell_y), see
+        SpatialGrid; a cell is a tuple of the (guid, x, y, z) of its players
+    - recent_cells: cells changed since cells was built, looked up first, so
+        publishing a few changes does not copy all the cells; an empty cell
+        has been removed
+    - cell_size: size of the grid cells
+    - visibility: if the proximity engine is used, dict of tuples of the
+        GUIDs of players within visibility_range of each player, else None
+    """
+
+    def __init__(self, players = None, cells = None, cell_size = 1.0,
+                 visibility = None, visibility_range = None,
+                 recent_cells = None):
+        self.players = players or {}
+        self.cells = cells if cells is not None else {}
+        self.recent_cells = recent_cells or {}
+        self.cell_size = cell_size
+        self.visibility = visibility
+        self.visibility_range = visibility_range
+
+    def get_player(self, guid):
+        return self.players.get(guid)
+
+    def get_guids(self):
+        return list(self.players)
+
+    def guids_in_range_of(self, ref_guid, map_id, position, dist_range):
+        """ Return a list of GUIDs of players on that map within dist_range of
+        position, except ref_guid. Only players in grid cells around position
+        are checked.
+
+        If dist_range is the visibility range, the visibility computed for
+        ref_guid is returned instead, from the snapshot position of ref_guid.
+        """
+        if ( self.visibility is not None
+             and dist_range == self.visibility_range
+             and ref_guid in self.visibility ):
+            return list(self.visibility[ref_guid])
+
+        cell_size = self.cell_size
+        min_x = math.floor((position.x - dist_range) / cell_size)
+        max_x = math.floor((position.x + dist_range) / cell_size)
+        min_y = math.floor((position.y - dist_range) / cell_size)
+        max_y = math.floor((position.y + dist_range) / cell_size)
+
+        cells = self.cells
+        recent_cells = self.recent_cells
+        sq_range = dist_range * dist_range
+        guids_in_range = []
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                key = (map_id, cell_x, cell_y)
+                cell = recent_cells.get(key)
+                if cell is None:
+                    cell = cells.get(key)
+                if not cell:
+                    continue
+                for guid, x, y, z in cell:
+                    if guid == ref_guid:
+                        continue
+                    sq_dist = ( (position.x - x) ** 2 +
+                                (position.y - y) ** 2 +
+                                (position.z - z) ** 2 )
+                    if sq_dist < sq_range:
+                        guids_in_range.append(guid)
+        return guids_in_range
@@ -0,0 +1,150 @@
+""" Optional NumPy proximity engine, computing all players in range of each
+other at once instead of one range query per player.
+
+NumPy is not a required dependency: if it is missing, NUMPY_AVAILABLE is False
+and the server uses the grid range queries of the player snapshots.
+"""
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    numpy = None
+    NUMPY_AVAILABLE = False
+
+
+class ProximityEngine(object):
+    """ Keep the map ID and the x/y/z of every player in contiguous arrays,
+    and compute the players visible by each one with vectorized math.
+
+    Rows are packed: a removed player is replaced by the last row. Positions
+    are only read by get_visibility, so the _PlayerManager updates them as
+    they change and calls it once per world tick.
+
+    Visibility is computed with a sort and sweep for each map: players are
+    sorted by x in bands of y of dist_range height, each one is only compared
+    to the following ones of its band and of the next band whose x is within
+    dist_range, and the distances of these candidate pairs are computed all at
+    once.
+    """
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, dist_range):
+        self.dist_range = dist_range
+        self.rows = {}
+        self.guids = numpy.zeros(self.INITIAL_CAPACITY, dtype = numpy.uint64)
+        self.map_ids = numpy.zeros(self.INITIAL_CAPACITY, dtype = numpy.int64)
+        self.coords = numpy.zeros(
+            (self.INITIAL_CAPACITY, 3), dtype = numpy.float64
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def set_position(self, guid, map_id, x, y, z):
+        """ Add the player with that GUID or update its position. """
+        row = self.rows.get(guid)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.guids):
+                self._grow()
+            self.rows[guid] = row
+            self.guids[row] = guid
+        self.map_ids[row] = map_id
+        self.coords[row] = (x, y, z)
+
+    def _grow(self):
+        capacity = len(self.guids) * 2
+        self.guids = numpy.resize(self.guids, capacity)
+        self.map_ids = numpy.resize(self.map_ids, capacity)
+        self.coords = numpy.resize(self.coords, (capacity, 3))
+
+    def remove(self, guid):
+        row = self.rows.pop(guid, None)
+        if row is None:
+            return
+        last_row = len(self.rows)
+        if row != last_row:
+            last_guid = int(self.guids[last_row])
+            self.guids[row] = last_guid
+            self.map_ids[row] = self.map_ids[last_row]
+            self.coords[row] = self.coords[last_row]
+            self.rows[last_guid] = row
+
+    def get_pairs(self):
+        """ Return two arrays of rows (a, b), one item per pair of players on
+        the same map within dist_range. """
+        num_rows = len(self.rows)
+        map_ids = self.map_ids[:num_rows]
+        dist_range = self.dist_range
+
+        pairs_a, pairs_b = [], []
+        for map_id in numpy.unique(map_ids):
+            map_rows = numpy.flatnonzero(map_ids == map_id)
+            x, y, z = self.coords[map_rows].T
+            # Players are sorted by band of y, then by x in each band; the sort
+            # key of a band is offset by more than the x span of the map plus
+            # dist_range, so players close enough to the one at index i have
+            # a key within dist_range of its own in the same band, or within
+            # dist_range of its own plus band_offset in the next band.
+            band_offset = (x.max() - x.min()) + 2 * dist_range + 1
+            keys = numpy.floor(y / dist_range) * band_offset + (x - x.min())
+            order = numpy.argsort(keys)
+            keys, x, y, z = keys[order], x[order], y[order], z[order]
+
+            same_band = self._get_candidates(
+                numpy.arange(1, len(keys) + 1),
+                numpy.searchsorted(keys, keys + dist_range, side = "right")
+            )
+            next_band = self._get_candidates(
+                numpy.searchsorted(
+                    keys, keys + band_offset - dist_range, side = "left"
+                ),
+                numpy.searchsorted(
+                    keys, keys + band_offset + dist_range, side = "right"
+                )
+            )
+            first = numpy.concatenate((same_band[0], next_band[0]))
+            second = numpy.concatenate((same_band[1], next_band[1]))
+
+            dx = x[first] - x[second]
+            dy = y[first] - y[second]
+            dz = z[first] - z[second]
+            in_range = dx * dx + dy * dy + dz * dz < dist_range * dist_range
+            pairs_a.append(map_rows[order[first[in_range]]])
+            pairs_b.append(map_rows[order[second[in_range]]])
+
+        if not pairs_a:
+            empty = numpy.zeros(0, dtype = numpy.int64)
+            return empty, empty
+        return numpy.concatenate(pairs_a), numpy.concatenate(pairs_b)
+
+    @staticmethod
+    def _get_candidates(starts, ends):
+        """ Return two arrays of indexes (i, j) for each j in range(starts[i],
+        ends[i]), for each i. """
+        counts = numpy.maximum(ends - starts, 0)
+        offsets = numpy.cumsum(counts) - counts
+        first = numpy.repeat(numpy.arange(len(starts)), counts)
+        second = ( numpy.repeat(starts - offsets, counts) +
+                   numpy.arange(int(counts.sum())) )
+        return first, second
+
+    def get_visibility(self):
+        """ Return a dict with, for each player GUID, a tuple of the GUIDs of
+        the other players within dist_range. """
+        num_rows = len(self.rows)
+        rows_a, rows_b = self.get_pairs()
+        sources = numpy.concatenate((rows_a, rows_b))
+        targets = numpy.concatenate((rows_b, rows_a))
+        order = numpy.argsort(sources, kind = "stable")
+        visible_guids = self.guids[targets[order]].tolist()
+        ends = numpy.cumsum(numpy.bincount(sources, minlength = num_rows))
+
+        visibility = {}
+        start = 0
+        for guid, end in zip(self.guids[:num_rows].tolist(), ends.tolist()):
+            visibility[guid] = tuple(visible_guids[start:end])
+            start = end
+        return visibility
@@ -0,0 +1,82 @@
+import math
+import threading
+
+
+class SpatialGrid(object):
+    """ Index of object GUIDs by position, to find objects near a point without
+    looking at every object in the world.
+
+    Each map is divided in square cells of cell_size world units; a cell is
+    keyed by (map_id, cell_x, cell_y) and holds the set of GUIDs of objects
+    located in it. Range queries only visit cells overlapping the square around
+    the query point, so they return candidates that callers have to filter with
+    the real distance.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.guid_cells = {}
+        self.lock = threading.Lock()
+
+    def get_cell_key(self, map_id, position):
+        return ( map_id,
+                 math.floor(position.x / self.cell_size),
+                 math.floor(position.y / self.cell_size) )
+
+    def add(self, guid, map_id, position):
+        """ Add the GUID to the cell at that position, or move it there if it
+        is already in the grid. """
+        self.move(guid, map_id, position)
+
+    def move(self, guid, map_id, position):
+        """ Update the cell of that GUID. Return True if its cell changed. """
+        new_key = self.get_cell_key(map_id, position)
+        with self.lock:
+            old_key = self.guid_cells.get(guid)
+            if old_key == new_key:
+                return False
+            if old_key is not None:
+                self._remove_from_cell(guid, old_key)
+            self.cells.setdefault(new_key, set()).add(guid)
+            self.guid_cells[guid] = new_key
+            return True
+
+    def remove(self, guid):
+        with self.lock:
+            key = self.guid_cells.pop(guid, None)
+            if key is not None:
+                self._remove_from_cell(guid, key)
+
+    def _remove_from_cell(self, guid, key):
+        cell = self.cells[key]
+        cell.discard(guid)
+        if not cell:
+            del self.cells[key]
+
+    def get_key(self, guid):
+        """ Return the key of the cell of that GUID, or None. """
+        with self.lock:
+            return self.guid_cells.get(guid)
+
+    def get_cell(self, key):
+        """ Return a tuple of the GUIDs in the cell with that key. """
+        with self.lock:
+            return tuple(self.cells.get(key, ()))
+
+    def guids_near(self, map_id, position, dist_range):
+        """ Return a list of GUIDs in cells that are within dist_range of that
+        position on that map (a superset of the GUIDs really in range). """
+        min_x = math.floor((position.x - dist_range) / self.cell_size)
+        max_x = math.floor((position.x + dist_range) / self.cell_size)
+        min_y = math.floor((position.y - dist_range) / self.cell_size)
+        max_y = math.floor((position.y + dist_range) / self.cell_size)
+
+        guids = []
+        with self.lock:
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    cell = self.cells.get((map_id, cell_x, cell_y))
+                    if cell:
+                        guids.extend(cell)
+        return guids
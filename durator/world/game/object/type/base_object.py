@@ -1,8 +1,11 @@
+from array import array
 from enum import Enum
 import threading
 
 from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.position import Position
+from durator.common.log import LOG
 
 
 class ObjectType(Enum):
@@ -83,18 +86,34 @@ class BaseObject(object):
     - map_id
     - zone_id
     - position: the current Position object
-    - fields: dict of fields with their associated values.
-        Beware, keys can be *Field values but also ints as not all fields have a
-        corresponding Enum member.
+    - slots: array of raw 32-bit update fields, as sent to clients, laid out
+        as described by the LAYOUT of the object type. 64-bit fields use two
+        slots (low part first) and floats are stored as their binary
+        representation, so use get and set to access fields. Fields can be
+        *Field values but also ints as not all fields have a corresponding Enum
+        member; fields with no known type are INT32. Fields out of the layout
+        (e.g. player fields of a base object) are never set: get returns None
+        and set only logs a warning.
+    - set_mask: int bitmask of the slots that have been set.
+    - dirty_mask: int bitmask of the slots changed since the last call to
+        clear_dirty_fields, i.e. fields that clients have to be updated about.
+    - fields_cache: None or a (watched_mask, data) tuple, data being anything
+        computed from the slots in watched_mask, e.g. encoded update fields. It
+        is reset to None when one of these slots changes.
     """
 
+    LAYOUT = ObjectLayout(0x6, (ObjectField,))
+
     def __init__(self):
         self.lock = threading.RLock()
         self.name = "Unnamed object"
         self.map_id = 0
         self.zone_id = 0
         self.position = Position()
-        self.fields = {}
+        self.slots = array("I", [0]) * self.LAYOUT.num_fields
+        self.set_mask = 0
+        self.dirty_mask = 0
+        self.fields_cache = None
 
     @property
     def guid(self):
@@ -109,7 +128,12 @@ class BaseObject(object):
 
     def get(self, field):
         """ Return the object field value, or None if it hasn't been set. """
-        return self.fields.get(field)
+        field_layout = self.LAYOUT.get_field(field)
+        if field_layout is None:
+            return None
+        if self.set_mask & field_layout.mask != field_layout.mask:
+            return None
+        return field_layout.from_slots(self.slots)
 
     def threaded_get(self, field):
         """ Thread-safe get. """
@@ -117,10 +141,37 @@ class BaseObject(object):
             return self.get(field)
 
     def set(self, field, value):
-        """ Set a new object field value. """
-        self.fields[field] = value
+        """ Set a new object field value, marking it dirty if it changed. """
+        field_layout = self.LAYOUT.get_field(field)
+        if field_layout is None:
+            LOG.warning("Field {} is out of the {} fields, ignored.".format(
+                field, type(self).__name__
+            ))
+            return
+        index, mask = field_layout.index, field_layout.mask
+        slot_values = field_layout.to_slots(value)
+        slots = self.slots
+        if ( self.set_mask & mask == mask
+             and tuple(slots[index:index + len(slot_values)]) == slot_values ):
+            return
+        for offset, slot_value in enumerate(slot_values):
+            slots[index + offset] = slot_value
+        self.set_mask |= mask
+        self.dirty_mask |= mask
+        fields_cache = self.fields_cache
+        if fields_cache is not None and fields_cache[0] & mask:
+            self.fields_cache = None
 
     def threaded_set(self, field, value):
         """ Thread-safe set. """
         with self.lock:
             self.set(field, value)
+
+    def get_field_mask(self, field):
+        """ Return the bitmask of the slots used by that field, 0 if it is out
+        of the layout. """
+        field_layout = self.LAYOUT.get_field(field)
+        return field_layout.mask if field_layout is not None else 0
+
+    def clear_dirty_fields(self):
+        self.dirty_mask = 0
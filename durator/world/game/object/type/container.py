@@ -1,7 +1,10 @@
 """ A Container is an Item that contains Items. """
 
+from durator.world.game.object.object_fields import (
+    ObjectField, ItemField, ContainerField )
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.item import ItemObject
 
 
 class ContainerObject(ItemObject):
-    pass
+    LAYOUT = ObjectLayout(0x5A, (ObjectField, ItemField, ContainerField))
@@ -1,7 +1,9 @@
 """ A Corpse is the cadaver of an Unit, I guess? """
 
+from durator.world.game.object.object_fields import ObjectField, CorpseField
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.base_object import BaseObject
 
 
 class Corpse(BaseObject):
-    pass
+    LAYOUT = ObjectLayout(0x24, (ObjectField, CorpseField))
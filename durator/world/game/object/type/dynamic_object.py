@@ -1,5 +1,8 @@
+from durator.world.game.object.object_fields import (
+    ObjectField, DynamicObjectField )
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.base_object import BaseObject
 
 
 class DynamicObject(BaseObject):
-    pass
+    LAYOUT = ObjectLayout(0x10, (ObjectField, DynamicObjectField))
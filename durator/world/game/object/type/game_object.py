@@ -1,5 +1,8 @@
+from durator.world.game.object.object_fields import (
+    ObjectField, GameObjectField )
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.base_object import BaseObject
 
 
 class GameObject(BaseObject):
-    pass
+    LAYOUT = ObjectLayout(0x16, (ObjectField, GameObjectField))
@@ -1,8 +1,10 @@
 """ An ItemObject is a BaseObject that appears in world and can be interacted
 with. """
 
+from durator.world.game.object.object_fields import ObjectField, ItemField
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.base_object import BaseObject
 
 
 class ItemObject(BaseObject):
-    pass
+    LAYOUT = ObjectLayout(0x30, (ObjectField, ItemField))
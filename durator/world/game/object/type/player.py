@@ -1,5 +1,7 @@
 from durator.db.database import db_connection
-from durator.world.game.object.object_fields import PlayerField
+from durator.world.game.object.object_fields import (
+    ObjectField, UnitField, PlayerField )
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.unit import Unit
 from durator.world.game.skill.constants import SkillId
 from durator.world.game.skill.defaults import SKILL_MAX_LEVELS
@@ -10,6 +12,8 @@ from durator.world.game.spell.spell import Spell
 class Player(Unit):
     """ A Player is a Unit controlled by a human player. """
 
+    LAYOUT = ObjectLayout(0x36C, (ObjectField, UnitField, PlayerField))
+
     NUM_TUTORIALS      = 64
     NUM_SKILLS         = 128
     NUM_SPELLS         = 100
@@ -21,7 +25,7 @@ class Player(Unit):
         super().__init__()
         self.skills = []
         self.spells = []
-        self.tracked_guids = []
+        self.tracked_guids = set()
 
     @db_connection
     def import_skills(self, char_data):
@@ -1,7 +1,8 @@
 from enum import Enum
 
 from durator.world.game.movement import Movement, MovementFlags
-from durator.world.game.object.object_fields import UnitField
+from durator.world.game.object.object_fields import ObjectField, UnitField
+from durator.world.game.object.object_fields_layout import ObjectLayout
 from durator.world.game.object.type.base_object import BaseObject
 
 
@@ -48,6 +49,8 @@ class Unit(BaseObject):
     access this Unit's position, you should use BaseObject.position.
     """
 
+    LAYOUT = ObjectLayout(0xB0, (ObjectField, UnitField))
+
     def __init__(self):
         super().__init__()
         self.movement = Movement()
@@ -72,3 +75,15 @@ class Unit(BaseObject):
     def is_falling(self):
         falling_flags = MovementFlags.IS_FALLING.value
         return bool(self.movement.flags & falling_flags)
+
+    def is_moving(self):
+        """ Return True if the last movement block moves, turns or falls, in
+        which case the client keeps sending movements. """
+        moving_flags = ( MovementFlags.FORWARD.value
+                       | MovementFlags.BACKWARD.value
+                       | MovementFlags.STRAFE_LEFT.value
+                       | MovementFlags.STRAFE_RIGHT.value
+                       | MovementFlags.TURN_LEFT.value
+                       | MovementFlags.TURN_RIGHT.value
+                       | MovementFlags.IS_FALLING.value )
+        return bool(self.movement.flags & moving_flags)
@@ -0,0 +1,31 @@
+""" Packed GUIDs, a compact encoding of uint64 GUIDs used by some packets.
+
+A packed GUID is a uint8 mask followed by the non-zero bytes of the GUID, in
+little-endian order: bit N of the mask is set if byte N of the GUID is present.
+A GUID below 2^24 then takes at most 4 bytes instead of 8.
+"""
+
+
+def pack_guid(guid):
+    """ Return the packed GUID bytes. """
+    mask = 0
+    data = bytearray(1)
+    for index in range(8):
+        guid_byte = (guid >> (index * 8)) & 0xFF
+        if guid_byte:
+            mask |= 1 << index
+            data.append(guid_byte)
+    data[0] = mask
+    return bytes(data)
+
+
+def unpack_guid(data, offset = 0):
+    """ Return the GUID packed in data at offset, and its packed size. """
+    mask = data[offset]
+    guid = 0
+    size = 1
+    for index in range(8):
+        if mask & (1 << index):
+            guid |= data[offset + size] << (index * 8)
+            size += 1
+    return guid, size
@@ -76,46 +76,73 @@ PLAYER_SPAWN_FIELDS = [
     PlayerField.COINAGE
 ]
 
+# Slots of these fields in the Player layout, to add them at once.
+PLAYER_SPAWN_MASK = Player.LAYOUT.get_mask(PLAYER_SPAWN_FIELDS)
+
+# Slots of all skill fields, sent if set.
+PLAYER_SKILLS_MASK = ( ((1 << Player.NUM_SKILLS * 3) - 1)
+                       << PlayerField.SKILL_INFO_1_ID.value )
+
 
 class PlayerSpawnPacket(UpdateObjectPacket):
     """ This specific UpdateObjectPacket is used to let a player spawn.
     Basically a wrapper around CREATE_OBJECT UpdateObjectPacket for Players that
-    add some required fields. """
+    add some required fields.
+
+    The encoded fields are cached in the player fields_cache, and reused by
+    next spawn packets until one of the spawn fields changes; the movement part
+    of the block is still read when the packet is sent.
+    """
 
     def __init__(self, update_infos):
         super().__init__(UpdateType.CREATE_OBJECT, update_infos)
 
         player = update_infos["object"]
         with player.lock:
-            self._add_required_fields(player)
-            self._add_int_fields(player)
+            fields_cache = player.fields_cache
+            if fields_cache is None:
+                fields_mask = self._get_required_fields_mask(player)
+                fields_mask |= self._get_int_fields_mask(player)
+                self.add_object_fields(fields_mask)
+                fields_bytes = self.blocks_builder.to_bytes()
+                watched_mask = PLAYER_SPAWN_MASK | PLAYER_SKILLS_MASK
+                fields_cache = player.fields_cache = watched_mask, fields_bytes
+            self.fields_bytes = fields_cache[1]
 
-    def _add_required_fields(self, player):
-        for required_field in PLAYER_SPAWN_FIELDS:
-            value = player.get(required_field)
-            if value is None:
-                LOG.error("A required field for player spawning is not set.")
-                LOG.error(str(required_field))
-                continue
-            self.add_field(required_field, value)
+    def get_fields_bytes(self):
+        return self.fields_bytes
+
+    def _get_required_fields_mask(self, player):
+        missing_mask = PLAYER_SPAWN_MASK & ~player.set_mask
+        if missing_mask:
+            for required_field in PLAYER_SPAWN_FIELDS:
+                if player.get_field_mask(required_field) & missing_mask:
+                    LOG.error("A required field for player spawning is not "
+                              "set.")
+                    LOG.error(str(required_field))
+        return PLAYER_SPAWN_MASK & player.set_mask
 
-    def _add_int_fields(self, player):
+    def _get_int_fields_mask(self, player):
+        # Skill fields are INT32, their slots can be checked directly.
+        slots = player.slots
         start_field = PlayerField.SKILL_INFO_1_ID.value
+        fields_mask = 0
         for index in range(Player.NUM_SKILLS):
             field_value = start_field + index*3
 
-            ident = player.get(field_value)
-            if ident is None or ident == 0:
+            ident = slots[field_value]
+            if ident == 0:
                 continue
             else:
-                self.add_field(field_value, ident)
+                fields_mask |= 1 << field_value
 
             field_value += 1
-            level = player.get(field_value)
+            level = slots[field_value]
             if level:
-                self.add_field(field_value, level)
+                fields_mask |= 1 << field_value
 
             field_value += 1
-            stat_level = player.get(field_value)
+            stat_level = slots[field_value]
             if stat_level:
-                self.add_field(field_value, stat_level)
+                fields_mask |= 1 << field_value
+        return fields_mask
@@ -0,0 +1,72 @@
+""" zlib compression of SMSG_UPDATE_OBJECT packets. """
+
+from struct import Struct
+import threading
+import time
+import zlib
+
+from durator.config import CONFIG
+from durator.world.opcodes import OpCode
+
+
+class UpdateCompression(object):
+    """ Compress update packets data bigger than a threshold, and keep stats
+    to tune it.
+
+    A SMSG_COMPRESSED_UPDATE_OBJECT holds the uncompressed size of the
+    SMSG_UPDATE_OBJECT data and then the data compressed with zlib.
+
+    Stats are:
+    - num_compressed: number of compressed packets
+    - bytes_saved: bytes saved by compression, including the size fields
+    - cpu_time: CPU time spent in compression, in seconds, including the time
+        spent on data that was finally sent uncompressed
+    """
+
+    THRESHOLD = int(CONFIG["world"]["update_compression_threshold"])
+    LEVEL     = int(CONFIG["world"]["update_compression_level"])
+
+    SIZE_BIN = Struct("<I")
+
+    def __init__(self, threshold = THRESHOLD, level = LEVEL):
+        self.threshold = threshold
+        self.level = level
+        self.lock = threading.Lock()
+        self.num_compressed = 0
+        self.bytes_saved = 0
+        self.cpu_time = 0.0
+
+    def compress(self, data):
+        """ Return the opcode and data to send for that SMSG_UPDATE_OBJECT
+        data, compressed if it is worth it. """
+        if self.threshold <= 0 or len(data) < self.threshold:
+            return OpCode.SMSG_UPDATE_OBJECT, data
+
+        cpu_start = time.thread_time()
+        compressed = self.SIZE_BIN.pack(len(data))
+        compressed += zlib.compress(data, self.level)
+        cpu_time = time.thread_time() - cpu_start
+
+        is_smaller = len(compressed) < len(data)
+        with self.lock:
+            self.cpu_time += cpu_time
+            if is_smaller:
+                self.num_compressed += 1
+                self.bytes_saved += len(data) - len(compressed)
+
+        if is_smaller:
+            return OpCode.SMSG_COMPRESSED_UPDATE_OBJECT, compressed
+        return OpCode.SMSG_UPDATE_OBJECT, data
+
+    def get_stats(self):
+        """ Return a dict with the compression stats. """
+        with self.lock:
+            return {
+                "num_compressed": self.num_compressed,
+                "bytes_saved": self.bytes_saved,
+                "cpu_time": self.cpu_time
+            }
+
+
+# Instance used for all update packets.
+UPDATE_COMPRESSION = UpdateCompression()
@@ -1,14 +1,15 @@
 """ Tools for the SMSG_UPDATE_OBJECT (and the compressed counterpart). """
 
 from enum import Enum
-import math
 from struct import Struct
 
+from durator.config import CONFIG
 from durator.world.game.object.object_fields import ObjectField
-from durator.world.game.object.object_fields_type import (
-    FieldType, FIELD_TYPE_MAP )
+from durator.world.game.object.object_fields_layout import FIELD_LAYOUTS
 from durator.world.game.object.type.base_object import ObjectTypeFlags
 from durator.world.game.object.type.unit import DEFAULT_SPEEDS
+from durator.world.game.packed_guid import pack_guid
+from durator.world.game.update_compression import UPDATE_COMPRESSION
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
 from durator.common.log import LOG
@@ -26,7 +27,8 @@ class UpdateType(Enum):
 
 class UpdateObjectPacket(WorldPacket):
     """ Handle the creation of update packets. It can handle object fields
-    update and movement update.
+    update (PARTIAL, with only the fields added), movement update and object
+    creation.
 
     The update_infos dict contains the most values of interest. Some elements
     must be provided for some update types only:
@@ -43,14 +45,28 @@ class UpdateObjectPacket(WorldPacket):
                         , UpdateType.MOVEMENT  # ?
                         , UpdateType.CREATE_OBJECT )
 
-    IMPLEMENTED_TYPES = ( UpdateType.MOVEMENT
+    IMPLEMENTED_TYPES = ( UpdateType.PARTIAL
+                        , UpdateType.MOVEMENT
                         , UpdateType.CREATE_OBJECT )
 
     # - uint32  count
     # - uint8   bool hasTransport (?)
+    PACKET_HEADER_BIN = Struct("<IB")
+
     # - uint8   UpdateType
     # - uint64  guid
-    PACKET_HEADER_BIN = Struct("<I2BQ")
+    BLOCK_HEADER_BIN = Struct("<BQ")
+
+    # - uint8   UpdateType
+    # - packed  guid (see packed_guid)
+    BLOCK_TYPE_BIN = Struct("<B")
+
+    # Update types whose blocks use a packed GUID.
+    PACKED_GUID_TYPES = tuple(
+        UpdateType[name.strip().upper()]
+        for name in CONFIG["world"]["packed_guid_update_types"].split(",")
+        if name.strip()
+    )
 
     # - uint8   ObjectType
     PACKET_OBJECT_TYPE_BIN = Struct("<B")
@@ -78,6 +94,7 @@ class UpdateObjectPacket(WorldPacket):
         super().__init__(OpCode.SMSG_UPDATE_OBJECT)
         self.update_type = update_type
         self.update_infos = update_infos
+        self.block_bytes = None
 
         if self.has_fields():
             self.blocks_builder = UpdateBlocksBuilder()
@@ -87,22 +104,65 @@ class UpdateObjectPacket(WorldPacket):
 
     def add_field(self, field, value):
         """ If this update packet can hold update fields, add it. """
-        if not self.has_fields:
+        if not self.has_fields():
             LOG.error("Tried to add an update field to a wrong update packet.")
             return
         self.blocks_builder.add(field, value)
 
-    def to_socket(self, session_cipher = None):
-        """ Prepare the bytes to be sent to clients.  """
+    def add_object_fields(self, fields_mask):
+        """ Add the fields of the update object whose slots are set in
+        fields_mask (see BaseObject.get_field_mask), with their current raw
+        values. Call it with the object lock held. """
+        if not self.has_fields():
+            LOG.error("Tried to add update fields to a wrong update packet.")
+            return
         base_object = self.update_infos["object"]
-        data = b""
-
-        data += self.PACKET_HEADER_BIN.pack(
-            1,  # we only send one batch of update values at a time for now
-            int(False),
-            self.update_type.value,
-            base_object.guid
-        )
+        self.blocks_builder.add_slots(base_object.slots, fields_mask)
+
+    def get_fields_bytes(self):
+        """ Return the update fields part of the block. """
+        return self.blocks_builder.to_bytes()
+
+    def get_replace_key(self):
+        """ Movement updates are read from the object when sent, so a newer one
+        for the same object replaces it in outgoing queues. """
+        if self.update_type == UpdateType.MOVEMENT:
+            guid = self.update_infos["object"].guid
+            return OpCode.SMSG_UPDATE_OBJECT, self.update_type, guid
+        return None
+
+    def is_droppable(self):
+        """ Movement updates of an object which stopped moving are the last
+        ones for a while, they are never dropped. """
+        return self.update_infos["object"].is_moving()
+
+    def freeze(self):
+        """ Prepare the bytes to be sent to clients, as a packet with only this
+        update block. Big packets are compressed. """
+        data = self.PACKET_HEADER_BIN.pack(1, int(False))
+        data += self.get_block_bytes()
+        self.opcode, self.data = UPDATE_COMPRESSION.compress(data)
+        super().freeze()
+
+    def get_block_bytes(self):
+        """ Return the bytes of this update block, without the packet header, to
+        be possibly sent along other blocks in a MultiUpdateObjectPacket. Like
+        the packet, the block is serialized once, the first time it's asked. """
+        block_bytes = self.block_bytes
+        if block_bytes is None:
+            block_bytes = self.block_bytes = self._build_block_bytes()
+        return block_bytes
+
+    def _build_block_bytes(self):
+        base_object = self.update_infos["object"]
+        if self.update_type in self.PACKED_GUID_TYPES:
+            data = self.BLOCK_TYPE_BIN.pack(self.update_type.value)
+            data += pack_guid(base_object.guid)
+        else:
+            data = self.BLOCK_HEADER_BIN.pack(
+                self.update_type.value,
+                base_object.guid
+            )
 
         if self.update_type in self.TYPES_WITH_OBJECT_TYPE:
             data += self.PACKET_OBJECT_TYPE_BIN.pack(base_object.type.value)
@@ -133,77 +193,109 @@ class UpdateObjectPacket(WorldPacket):
             )
 
         if self.update_type in self.TYPES_WITH_FIELDS:
-            data += self.blocks_builder.to_bytes()
+            data += self.get_fields_bytes()
+
+        return data
 
-        self.data = data
-        return super().to_socket(session_cipher)
+
+class MultiUpdateObjectPacket(WorldPacket):
+    """ SMSG_UPDATE_OBJECT packet holding the update blocks of several
+    UpdateObjectPackets, so a client gets many updates in a single packet.
+    Blocks are serialized when the packet is, and compressed if big; each block
+    is only serialized once for all the packets it is part of. """
+
+    def __init__(self, update_packets):
+        super().__init__(OpCode.SMSG_UPDATE_OBJECT)
+        self.update_packets = update_packets
+
+    def freeze(self):
+        header_bin = UpdateObjectPacket.PACKET_HEADER_BIN
+        data = header_bin.pack(len(self.update_packets), int(False))
+        data += b"".join(
+            update_packet.get_block_bytes()
+            for update_packet in self.update_packets
+        )
+        self.opcode, self.data = UPDATE_COMPRESSION.compress(data)
+        super().freeze()
 
 
 class UpdateBlocksBuilder(object):
-    """ Create the UpdateBlocks part of an UpdateObject packet. """
+    """ Create the UpdateBlocks part of an UpdateObject packet.
 
-    FIELD_BIN_MAP = {
-        FieldType.INT32:      Struct("<i"),
-        FieldType.TWO_INT16:  Struct("<I"),
-        FieldType.FLOAT:      Struct("<f"),
-        FieldType.INT64:      Struct("<q"),
-        FieldType.FOUR_BYTES: Struct("<I")
-    }
+    Fields are kept as raw 32-bit slot values, by slot index, along with the
+    int bitmask of the slots added, which is the update mask sent to clients.
+    Field layouts are precompiled in FIELD_LAYOUTS.
+    """
 
     HARD_MASK_BLOCKS_LIMIT = 0x1C
 
+    # Structs of N uint32 slot values, by N, compiled on first use.
+    VALUES_BINS = {}
+
     def __init__(self):
-        self.mask_blocks = []
-        self.update_blocks = {}
+        self.mask = 0
+        self.slot_values = {}
+        # Slots are usually added in index order, so sorting can be skipped.
+        self.last_index = -1
+        self.is_sorted = True
 
     def add(self, field, value):
         """ Add a field and its value to the UpdateBlocks. """
-        try:
-            field_type = FIELD_TYPE_MAP[field]
-        except KeyError:
+        field_layout = FIELD_LAYOUTS.get(field)
+        if field_layout is None:
             LOG.error("No type associated with " + str(field))
             LOG.error("Object not updated.")
             return
-        field_struct = self.FIELD_BIN_MAP[field_type]
-
-        field_index = UpdateBlocksBuilder._get_field_index(field)
-        self._set_field_mask_bits(field_index, field_struct)
-        self._set_field_value(field_index, field_struct, value)
 
-        assert len(self.mask_blocks) < self.HARD_MASK_BLOCKS_LIMIT
-
-    @staticmethod
-    def _get_field_index(field):
-        if isinstance(field, Enum):
-            return field.value
-        else:
-            return int(field)
-
-    def _set_field_mask_bits(self, field_index, field_struct):
-        num_mask_blocks = math.ceil(field_struct.size / 4)
-        for index in range(field_index, field_index + num_mask_blocks):
-            self._set_field_mask_bit(index)
-
-    def _set_field_mask_bit(self, field_index):
-        mask_block_index = field_index // 32
-        bit_index = field_index % 32
-        while len(self.mask_blocks) < mask_block_index+1:
-            self.mask_blocks.append(0)
-        self.mask_blocks[mask_block_index] |= 1 << bit_index
-
-    def _set_field_value(self, field_index, field_struct, value):
-        update_block = field_struct.pack(value)
-        self.update_blocks[field_index] = update_block
+        index = field_layout.index
+        for slot_value in field_layout.to_slots(value):
+            self._set_slot_value(index, slot_value)
+            index += 1
+        self.mask |= field_layout.mask
+
+        assert self.mask.bit_length() < self.HARD_MASK_BLOCKS_LIMIT * 32
+
+    def add_slots(self, slots, slots_mask):
+        """ Add the raw 32-bit values of the slots whose bit is set in
+        slots_mask, e.g. object update fields. """
+        mask = slots_mask
+        while mask:
+            low_bit = mask & -mask
+            index = low_bit.bit_length() - 1
+            self._set_slot_value(index, slots[index])
+            mask ^= low_bit
+        self.mask |= slots_mask
+
+        assert self.mask.bit_length() < self.HARD_MASK_BLOCKS_LIMIT * 32
+
+    def _set_slot_value(self, index, slot_value):
+        if index < self.last_index:
+            self.is_sorted = False
+        self.last_index = index
+        self.slot_values[index] = slot_value
 
     def to_bytes(self):
         """ Return the mask count, the mask and the update blocks as bytes. """
-        num_mask_blocks_bytes = int.to_bytes(len(self.mask_blocks), 1, "little")
-
-        mask_blocks = [int.to_bytes(b, 4, "little") for b in self.mask_blocks]
-        mask_bytes = b"".join(mask_blocks)
+        num_mask_blocks = (self.mask.bit_length() + 31) // 32
+        if self.is_sorted:
+            slot_values = list(self.slot_values.values())
+        else:
+            slot_values = [ self.slot_values[index]
+                            for index in sorted(self.slot_values) ]
 
-        sorted_blocks = [ self.update_blocks[k]
-                          for k in sorted(self.update_blocks.keys()) ]
-        update_data = b"".join(sorted_blocks)
+        mask_size = num_mask_blocks * 4
+        data = bytearray(1 + mask_size + len(slot_values) * 4)
+        data[0] = num_mask_blocks
+        data[1:1 + mask_size] = self.mask.to_bytes(mask_size, "little")
+        values_bin = UpdateBlocksBuilder._get_values_bin(len(slot_values))
+        values_bin.pack_into(data, 1 + mask_size, *slot_values)
+        return bytes(data)
 
-        return num_mask_blocks_bytes + mask_bytes + update_data
+    @staticmethod
+    def _get_values_bin(num_values):
+        """ Return a Struct of num_values uint32, compiled once. """
+        values_bin = UpdateBlocksBuilder.VALUES_BINS.get(num_values)
+        if values_bin is None:
+            values_bin = Struct("<{}I".format(num_values))
+            UpdateBlocksBuilder.VALUES_BINS[num_values] = values_bin
+        return values_bin
@@ -17,7 +17,7 @@ class LeaveChannelHandler(object):
         return None, response_packet
 
     def _parse_packet(self, packet):
-        self.channel_name = packet[:-1].decode("utf8")
+        self.channel_name = bytes(packet[:-1]).decode("utf8")
 
     def _try_leave_channel(self):
         leave_result_code = self.conn.server.chat_manager.leave_channel(
@@ -17,16 +17,19 @@ class MessageHandler(object):
 
     def process(self):
         self._parse_packet(self.packet)
+        self.conn.server.post_to_world(self._route_message, self.conn.player)
+        return None, None
 
-        player_guid = self.conn.player.guid
+    def _route_message(self, player):
+        """ Send the message to its recipients, and the channel notification
+        if any to the sender. """
         chat_manager = self.conn.server.chat_manager
-        result_code = chat_manager.receive_message(player_guid, self.message)
+        result_code = chat_manager.receive_message(player.guid, self.message)
 
         if self.message.message_type == ChatMessageType.CHANNEL:
             response_packet = self._get_channel_response_packet(result_code)
-            return None, response_packet
-        else:
-            return None, None
+            if response_packet is not None:
+                self.conn.queue_packet(response_packet)
 
     def _parse_packet(self, packet):
         self.message = ClientChatMessage.from_client(packet)
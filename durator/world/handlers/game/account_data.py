@@ -30,7 +30,7 @@ class UpdateAccountDataHandler(object):
 
         self.data_type = AccountDataType(data_type_value)
         self.decompressed_size = decomp_size
-        self.zlib_data = content
+        self.zlib_data = bytes(content)
 
     def _update_account_data(self):
         AccountDataManager.set_account_data(
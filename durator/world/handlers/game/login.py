@@ -113,4 +113,6 @@ class PlayerLoginHandler(object):
 
     def _notify_near_players(self):
         object_manager = self.conn.server.object_manager
-        object_manager.update_movement(self.conn.player)
+        self.conn.server.post_to_world(
+            object_manager.update_movement, self.conn.player
+        )
@@ -1,32 +1,58 @@
+from durator.config import CONFIG
 from durator.world.game.movement import Movement
+from durator.world.game.movement_relay_packet import MovementRelayPacket
 
 
 class MovementHandler(object):
-    """ Handle all player movement opcodes. """
+    """ Handle all player movement opcodes.
+
+    In movement_relay mode, the received packet is relayed as is to the
+    players tracking the mover, see MovementRelayPacket; else they get a
+    movement update block. Heartbeats they can extrapolate are not sent at
+    all, see MovementFilter.
+    """
+
+    RELAY = CONFIG.getboolean("world", "movement_relay")
 
     def __init__(self, connection, packet):
         self.conn = connection
         self.packet = packet
 
         self.movement = None
+        self.send_movement = True
+        self.relay_packet = None
 
     def process(self):
         self.movement = Movement.from_bytes(self.packet)
-        self._update_player()
-        self._notify_near_players()
+        player = self.conn.player
+        self.send_movement = self.conn.movement_filter.should_send(
+            self.conn.opcode, self.movement, player.speeds
+        )
+        if self.send_movement and self.RELAY:
+            # The packet data is only valid during this call, copy it.
+            self.relay_packet = MovementRelayPacket(
+                self.conn.opcode, player.guid, bytes(self.packet)
+            )
+        self.conn.server.post_to_world(self._move_player, player)
         return None, None
 
-    def _update_player(self):
+    def _move_player(self, player):
+        self._update_player(player)
+        self._notify_near_players(player)
+
+    def _update_player(self, player):
         """ Update player data according to the received Movement.
 
         This currently doesn't take into account transports and stuff, it just
         update the player position from the base position in the Movement.
         """
-        player = self.conn.player
         with player.lock:
             player.movement = self.movement
             player.position = self.movement.position
+        self.conn.server.object_manager.update_player_position(player)
 
-    def _notify_near_players(self):
+    def _notify_near_players(self, player):
         object_manager = self.conn.server.object_manager
-        object_manager.update_movement(self.conn.player)
+        object_manager.update_movement(
+            player, self.relay_packet, send_movement = self.send_movement
+        )
@@ -0,0 +1,88 @@
+from collections import deque
+import threading
+
+
+class OutgoingQueue(object):
+    """ Thread-safe bounded queue of WorldPackets waiting to be sent to a
+    client.
+
+    Packets are handled differently depending on whether they can become
+    obsolete, which is the case when their get_replace_key method returns a key
+    (e.g. movement updates of an object). Others, like chat messages, must all
+    be delivered.
+
+    - A replaceable packet takes the place of a queued one with the same key,
+      so a client late on movement updates only gets the last state of each
+      object. Otherwise it is queued, unless there are already soft_limit
+      packets waiting and it is droppable (see WorldPacket.is_droppable), in
+      which case it is dropped: a state that would not be updated again, like
+      a stop, is never lost.
+    - Other packets are always queued, until there are hard_limit packets
+      waiting: then the client can't keep up and put() returns False, so the
+      connection can be closed.
+
+    Attributes:
+    - dropped: number of replaceable packets dropped because of the soft limit
+    - replaced: number of queued packets replaced by a newer one
+    """
+
+    def __init__(self, soft_limit, hard_limit):
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.lock = threading.Lock()
+        # Queued [key, packet] slots, and slots by key for replaceable ones.
+        self.slots = deque()
+        self.keyed_slots = {}
+
+        self.dropped = 0
+        self.replaced = 0
+
+    def put(self, packet):
+        """ Queue the packet according to the policies described above. Return
+        False if the hard limit is reached, in which case it is not queued. """
+        key = packet.get_replace_key()
+        with self.lock:
+            if key is not None:
+                slot = self.keyed_slots.get(key)
+                if slot is not None:
+                    slot[1] = packet
+                    self.replaced += 1
+                    return True
+                if ( len(self.slots) >= self.soft_limit
+                     and packet.is_droppable() ):
+                    self.dropped += 1
+                    return True
+
+            if len(self.slots) >= self.hard_limit:
+                return False
+
+            slot = [key, packet]
+            self.slots.append(slot)
+            if key is not None:
+                self.keyed_slots[key] = slot
+            return True
+
+    def pop(self):
+        """ Return the oldest queued packet, or None if the queue is empty. """
+        with self.lock:
+            if not self.slots:
+                return None
+            key, packet = self.slots.popleft()
+            if key is not None:
+                del self.keyed_slots[key]
+            return packet
+
+    def empty(self):
+        return len(self.slots) == 0
+
+    def qsize(self):
+        return len(self.slots)
+
+    def get_stats(self):
+        """ Return a dict with the queue depth and drop counters. """
+        with self.lock:
+            return {
+                "depth": len(self.slots),
+                "dropped": self.dropped,
+                "replaced": self.replaced
+            }
@@ -1,10 +1,13 @@
 import os
-import queue
+import selectors
+import socket
+from collections import deque
 from struct import Struct
 
 from durator.common.account.managers import AccountSessionManager
 from durator.common.networking.connection_automaton import ConnectionAutomaton
 from durator.config import CONFIG
+from durator.world.game.movement_filter import MovementFilter
 from durator.world.handlers.ack.move_worldport import MoveWorldportAckHandler
 from durator.world.handlers.auth_session import AuthSessionHandler
 from durator.world.handlers.character.char_create import CharCreateHandler
@@ -23,6 +26,7 @@ from durator.world.handlers.game.zone_update import ZoneUpdateHandler
 from durator.world.handlers.nop import NopHandler
 from durator.world.handlers.ping import PingHandler
 from durator.world.opcodes import OpCode
+from durator.world.outgoing_queue import OutgoingQueue
 from durator.world.world_connection_state import WorldConnectionState
 from durator.world.world_packet import WorldPacket, WorldPacketReceiver
 from durator.common.log import LOG
@@ -31,10 +35,17 @@ from durator.common.log import LOG
 class WorldConnection(ConnectionAutomaton):
     """ Handle the communication between a client and the world server.
 
+    The connection thread blocks on a selector waiting for either data from the
+    client or a byte on its wakeup socket, which is written when packets are
+    queued for it; an idle connection does not use any CPU and queued packets
+    are sent right away. Queued packets are sent in batches, with a single
+    sendmsg call for up to SEND_BATCH_SIZE bytes of packets.
+
     Attributes:
     - world_packet_receiver: object that helps with world packet reception
-    - outgoing_queue: a thread-safe queue with messages for that client,
-        e.g. chat messages from other players.
+    - outgoing_queue: a thread-safe OutgoingQueue with messages for that
+        client, e.g. chat messages from other players. Use queue_packet to
+        fill it; a client letting it fill up is disconnected.
     - shared_data: dict, holds misc temporary values that can be of use for
         several handlers; anything living longer than a few seconds should
         probably be stored somewhere else.
@@ -47,6 +58,14 @@ class WorldConnection(ConnectionAutomaton):
 
     AUTH_CHALLENGE_BIN = Struct("<I")
 
+    SEND_BATCH_SIZE  = int(CONFIG["world"]["send_batch_size"])
+    TCP_NODELAY      = CONFIG.getboolean("world", "tcp_nodelay")
+    TCP_CORK         = CONFIG.getboolean("world", "tcp_cork")
+    QUEUE_SOFT_LIMIT = int(CONFIG["world"]["outgoing_queue_soft_limit"])
+    QUEUE_HARD_LIMIT = int(CONFIG["world"]["outgoing_queue_hard_limit"])
+    # Linux default IOV_MAX, max number of buffers for a single sendmsg call.
+    MAX_BATCH_COUNT  = 1024
+
     LEGAL_OPS = {
         WorldConnectionState.INIT:     [ OpCode.CMSG_AUTH_SESSION ],
         WorldConnectionState.ERROR:    [ ],
@@ -104,27 +123,83 @@ class WorldConnection(ConnectionAutomaton):
     END_STATES       = [ WorldConnectionState.ERROR ]
     MAIN_ERROR_STATE = WorldConnectionState.ERROR
 
-    RECV_TIMEOUT = float(CONFIG["world"]["recv_timeout"])
-
     def __init__(self, server, connection):
-        super().__init__(connection)
         self.server = server
-        self.socket.settimeout(self.RECV_TIMEOUT)
+        self._state = None
+        super().__init__(connection)
 
-        self.world_packet_receiver = WorldPacketReceiver(self.socket)
-        self.outgoing_queue = queue.Queue()
+        self.world_packet_receiver = None
+        self.selector = None
+        self.wakeup_socket = None
+        self.wakeup_trigger = None
+        self.wakeup_pending = False
+        self._setup_socket()
+        self.outgoing_queue = OutgoingQueue(
+            self.QUEUE_SOFT_LIMIT, self.QUEUE_HARD_LIMIT
+        )
+        # Set by queue_packet when the queue is full, the connection thread
+        # then moves to the error state.
+        self.overflowed = False
         self.shared_data = {}
 
         self.account = None
         self.session_cipher = None
 
         self.player = None
+        self.movement_filter = MovementFilter()
+        # Opcode of the packet being handled, for handlers of several opcodes.
+        self.opcode = None
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        """ Set the connection state, updating the server registry. """
+        old_state = self._state
+        self._state = state
+        self.server.connection_registry.update_state(self, old_state, state)
+
+    def _setup_socket(self):
+        """ Create the packet receiver, and the selector waiting on both the
+        client socket and the wakeup socket. """
+        self.socket.setblocking(True)
+        self._set_tcp_options(self.socket)
+        self.world_packet_receiver = WorldPacketReceiver(
+            self.socket, wait_for_data = self._wait_for_data
+        )
+
+        self.wakeup_socket, self.wakeup_trigger = socket.socketpair()
+        self.wakeup_socket.setblocking(False)
+        self.wakeup_trigger.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        self.selector.register(self.wakeup_socket, selectors.EVENT_READ)
+
+    def _set_tcp_options(self, client_socket):
+        """ Apply the TCP_NODELAY setting; TCP_CORK is used when sending
+        batches, if the platform has it. """
+        client_socket.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self.TCP_NODELAY)
+        )
+
+    def _close_socket(self):
+        """ Close the client socket and the wakeup mechanism. The connection
+        must not be reachable by broadcasts anymore. """
+        self.selector.close()
+        self.wakeup_trigger.close()
+        self.wakeup_socket.close()
+        self.socket.close()
 
     def set_session_cipher(self, session_cipher):
         self.session_cipher = session_cipher
         self.world_packet_receiver.session_cipher = self.session_cipher
 
     def _recv_packet(self):
+        """ Return the next packet, waiting for data through the selector
+        before each receive, even in the middle of a packet. """
         try:
             packet = self.world_packet_receiver.get_next_packet()
             return packet
@@ -132,7 +207,23 @@ class WorldConnection(ConnectionAutomaton):
             LOG.info("Lost connection with " + self.account.name + ".")
             return None
 
+    def _wait_for_data(self):
+        """ Block until the client sends something or a packet is queued.
+
+        If we only got woken up to send queued packets, raise socket.timeout:
+        the main loop will then send them before waiting again, like it did
+        after a receive timeout. A partially received packet is kept by the
+        packet receiver until then.
+        """
+        events = self.selector.select()
+        ready_sockets = [key.fileobj for key, _ in events]
+        if self.wakeup_socket in ready_sockets:
+            self._clear_wakeup()
+        if self.socket not in ready_sockets:
+            raise socket.timeout()
+
     def _parse_packet(self, packet):
+        self.opcode = packet.opcode
         return packet.opcode, packet.data
 
     def send_packet(self, world_packet):
@@ -151,13 +242,144 @@ class WorldConnection(ConnectionAutomaton):
         packet = WorldPacket(OpCode.SMSG_AUTH_CHALLENGE, packet_data)
         self.send_packet(packet)
 
+    def queue_packet(self, packet):
+        """ Queue a packet that will be sent by this connection's own loop.
+        This is the thread-safe way to send something to another client.
+
+        If the client has too many packets waiting, it is disconnected. The
+        state is only changed by the connection thread, see _check_overflow.
+        """
+        is_queued = self.outgoing_queue.put(packet)
+        if not is_queued and not self.overflowed:
+            LOG.warning("Outgoing queue full, disconnecting client.")
+            self.overflowed = True
+            self._disconnect()
+        self._wake_up()
+
+    def get_outgoing_stats(self):
+        """ Return a dict with the outgoing queue depth and drop counters. """
+        return self.outgoing_queue.get_stats()
+
+    def get_movement_stats(self):
+        """ Return a dict with the numbers of player movements sent and
+        heartbeats suppressed, see MovementFilter. """
+        return self.movement_filter.get_stats()
+
+    def _disconnect(self):
+        """ Shut the socket down from another thread, which also stops the
+        connection thread if it is blocked sending to a slow client. """
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _wake_up(self):
+        """ Wake up the connection thread if it's waiting in _wait_for_data.
+
+        Only the first call since the last wakeup writes to the wakeup socket.
+        The flag is cleared by the connection thread before it empties the
+        outgoing queue, so a packet is never left in the queue unnoticed.
+        """
+        if self.wakeup_pending:
+            return
+        self.wakeup_pending = True
+        try:
+            self.wakeup_trigger.send(b"\x00")
+        except OSError:
+            # Either a wakeup is already waiting in a full socket buffer, or the
+            # connection is being closed; nothing to do in both cases.
+            pass
+
+    def _clear_wakeup(self):
+        self.wakeup_pending = False
+        try:
+            while self.wakeup_socket.recv(1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _check_overflow(self):
+        """ Move to the error state if the outgoing queue got full. Return
+        True in that case. """
+        if self.overflowed:
+            self.state = self.MAIN_ERROR_STATE
+        return self.overflowed
+
     def _actions_at_loop_begin(self):
-        while not self.outgoing_queue.empty():
-            try:
-                packet = self.outgoing_queue.get(block = False)
-            except queue.Empty:
-                return
-            self.send_packet(packet)
+        if self._check_overflow():
+            return
+        try:
+            self._send_queued_packets()
+        except OSError as exc:
+            LOG.info("Could not send queued packets: " + str(exc))
+            self.state = self.MAIN_ERROR_STATE
+
+    def _send_queued_packets(self):
+        """ Send all packets waiting in the outgoing queue, in batches. """
+        use_cork = self.TCP_CORK and hasattr(socket, "TCP_CORK")
+        if use_cork:
+            self._set_cork(True)
+        try:
+            batch = self._get_outgoing_batch()
+            while batch:
+                self._send_batch(batch)
+                batch = self._get_outgoing_batch()
+        finally:
+            if use_cork:
+                self._set_cork(False)
+
+    def _get_outgoing_batch(self):
+        """ Get packets from the outgoing queue and return their buffers ready
+        to send, until the batch reaches SEND_BATCH_SIZE bytes or
+        MAX_BATCH_COUNT buffers. Each packet is its own encrypted header and its
+        body, which is shared with other recipients of the packet. Headers are
+        encrypted in the queue order. """
+        batch = []
+        batch_size = 0
+        while ( batch_size < self.SEND_BATCH_SIZE
+                and len(batch) < self.MAX_BATCH_COUNT - 1 ):
+            packet = self.outgoing_queue.pop()
+            if packet is None:
+                break
+            header, body = packet.to_buffers(self.session_cipher)
+            batch.append(header)
+            if body:
+                batch.append(body)
+            batch_size += len(header) + len(body)
+        return batch
+
+    def _send_batch(self, batch):
+        """ Send these byte buffers with as few syscalls as possible. """
+        if not hasattr(self.socket, "sendmsg"):
+            self.socket.sendall(b"".join(batch))
+            return
+
+        buffers = deque(memoryview(ready_packet) for ready_packet in batch)
+        while buffers:
+            num_sent = self.socket.sendmsg(buffers)
+            while buffers and num_sent >= len(buffers[0]):
+                num_sent -= len(buffers.popleft())
+            if num_sent > 0:
+                buffers[0] = buffers[0][num_sent:]
+
+    def _set_cork(self, enabled):
+        self.socket.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_CORK, int(enabled)
+        )
+
+    def _actions_at_loop_end(self):
+        """ Stop if the outgoing queue got full while handling the packet, else
+        without world ticks, send the player fields it changed, as ticks would
+        do. """
+        if self._check_overflow():
+            return
+        player = self.player
+        if ( player is not None
+             and player.dirty_mask
+             and not self.server.world_tick.is_enabled() ):
+            self.server.post_to_world(
+                self.server.object_manager.update_fields, player
+            )
 
     def _actions_after_main_loop(self):
         LOG.debug("WorldConnection: session ended.")
@@ -166,16 +388,22 @@ class WorldConnection(ConnectionAutomaton):
         if self.player:
             self.unset_player()
 
-        with self.server.world_connections_lock:
-            self.server.world_connections.remove(self)
+        self.server.connection_registry.remove(self)
+        self._close_socket()
 
     def set_player(self, char_data):
         """ Ask the ObjectManager to create a Player object with the char_data
-        from the database. """
-        self.player = self.server.object_manager.add_player(char_data)
+        from the database, waiting for it if it runs in the world thread. """
+        self.player = self.server.call_in_world(
+            self.server.object_manager.add_player, char_data
+        )
+        self.server.connection_registry.set_player_guid(self, self.player.guid)
 
     def unset_player(self):
         """ Transfer the Player data back to the database, after a logout or
         after the connection has been closed. """
-        self.server.object_manager.remove_player(self.player.guid)
+        self.server.connection_registry.unset_player_guid(self.player.guid)
+        self.server.post_to_world(
+            self.server.object_manager.remove_player, self.player.guid
+        )
         self.player = None
@@ -1,3 +1,4 @@
+import asyncio
 from struct import Struct
 import traceback
 
@@ -9,7 +10,13 @@ from pyshgck.format import dump_data
 
 
 class WorldPacket(object):
-    """ Describe a world server packet. The opcode can be None if unknown. """
+    """ Describe a world server packet. The opcode can be None if unknown.
+
+    Outgoing packets are serialized once, the first time they are sent, into a
+    frozen (header, body) pair of bytes: a packet broadcast to many clients is
+    built once, and each connection only encrypts its own copy of the 4-byte
+    header. A packet must not be modified once it has been sent.
+    """
 
     OUTGOING_SIZE_BIN   = Struct(">H")
     OUTGOING_OPCODE_BIN = Struct("<H")
@@ -17,31 +24,86 @@ class WorldPacket(object):
     def __init__(self, opcode = None, data = b""):
         self.opcode = opcode
         self.data = data
+        self.frozen = None
 
-    def to_socket(self, session_cipher = None):
-        """ Return ready-to-send bytes, possibly encrypted, from the packet. """
+    def freeze(self):
+        """ Serialize the packet header and body, once and for all. Subclasses
+        building their data when sent should do it here. Connections sending
+        the packet concurrently may both freeze it, but to the same bytes. """
         if DEBUG:
             print(">>>", self.opcode)
             print(dump_data(self.data), end = "")
 
         opcode_bytes = self.OUTGOING_OPCODE_BIN.pack(self.opcode.value)
-        packet = opcode_bytes + self.data
-        size_bytes = self.OUTGOING_SIZE_BIN.pack(len(packet))
-        packet = size_bytes + packet
-
+        body = bytes(self.data)
+        size_bytes = self.OUTGOING_SIZE_BIN.pack(len(opcode_bytes) + len(body))
+        self.frozen = size_bytes + opcode_bytes, body
+
+    def to_buffers(self, session_cipher = None):
+        """ Return ready-to-send header and body, the header being possibly
+        encrypted. The body is shared by all recipients, not copied. """
+        frozen = self.frozen
+        if frozen is None:
+            self.freeze()
+            frozen = self.frozen
+        header, body = frozen
         if session_cipher is not None:
-            packet = session_cipher.encrypt(packet)
+            header = session_cipher.encrypt(header)
+        return header, body
 
-        return packet
+    def to_socket(self, session_cipher = None):
+        """ Return ready-to-send bytes, possibly encrypted, from the packet. """
+        header, body = self.to_buffers(session_cipher)
+        return header + body
+
+    def get_replace_key(self):
+        """ Return a hashable key if a newer queued packet with the same key
+        makes this one obsolete, e.g. an object state update; else None. """
+        return None
+
+    def is_droppable(self):
+        """ Return True if this replaceable packet may be dropped when the
+        client is late, because a newer one with the same key will follow,
+        e.g. the updates of a moving object; packets ending a state, like a
+        stop, must return False. """
+        return True
 
 
 class WorldPacketReceiver(object):
-    """ Helper class that can get a complete WorldPacket from a connection. """
+    """ Helper class that can get a complete WorldPacket from a connection.
 
-    def __init__(self, socket):
+    Received data is stored in a preallocated bytearray filled by recv_into;
+    bytes between start and end are yet to be processed. Headers are decrypted
+    in place and packet contents are returned as memoryview slices of that
+    buffer, so they are only valid until the next call to get_next_packet:
+    handlers keeping data around must copy it.
+
+    When there is no room left after end, the pending bytes are moved back at
+    the beginning of the buffer (contents have to stay contiguous, so it does
+    not wrap around), and the buffer is replaced by a bigger one if needed.
+
+    The amount of data asked to each recv_into call adapts to the traffic: it
+    doubles when a read fills it and halves when reads get mostly empty.
+
+    If wait_for_data is provided, it is called before each recv_into call, and
+    may raise socket.timeout to let the caller do something else: partially
+    received packets are kept, the next get_next_packet call resumes them.
+    """
+
+    OPCODE_SIZE = 4
+    INITIAL_BUFFER_SIZE = 4096
+    MIN_READ_SIZE = 1024
+    MAX_READ_SIZE = 65536
+
+    def __init__(self, socket, wait_for_data = None):
         self.socket = socket
+        self.wait_for_data = wait_for_data
         self.session_cipher = None
-        self.packet_buf = b""
+        self.buffer = bytearray(self.INITIAL_BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.read_size = self.MIN_READ_SIZE
 
         # This data has to be reset after each packet (see clean())
         self.packet_size = -1
@@ -49,14 +111,15 @@ class WorldPacketReceiver(object):
         self.content = b""
 
     def get_next_packet(self):
-        """ Return a received WorldPacket.
+        """ Return a received WorldPacket, its data being a memoryview.
 
         It captures when a connection get closed (recv returns None), and return
         None as well, but it doesn't capture other network exceptions like
         ConnectionResetError.
         """
         try:
-            self._get_header()
+            if self.packet_size < 0:
+                self._get_header()
             self._get_content()
         except WorldPacketReceiverException:
             return None
@@ -64,60 +127,88 @@ class WorldPacketReceiver(object):
         if DEBUG:
             if self.opcode is not None:
                 print("<<<", self.opcode)
-            print(dump_data(self.content), end = "")
+            print(dump_data(bytes(self.content)), end = "")
 
         packet = WorldPacket(self.opcode, self.content)
         self.clean()
         return packet
 
+    def has_buffered_data(self):
+        """ Return True if received data is waiting to be processed, in which
+        case there may be a complete packet available without receiving. """
+        return self.end > self.start
+
     def _get_header(self):
-        """ Ensure we get all the (possibly decrypted) data from the header. """
-        while len(self.packet_buf) < SessionCipher.DECRYPT_HEADER_SIZE:
+        """ Get the (possibly decrypted) header, and cut the packet size and
+        opcode from it. """
+        header_size = SessionCipher.DECRYPT_HEADER_SIZE
+        while self.end - self.start < header_size:
             self._get_more_data()
 
+        header = self.view[self.start : self.start + header_size]
         if self.session_cipher is not None:
-            self.packet_buf = self.session_cipher.decrypt(self.packet_buf)
+            self.session_cipher.decrypt_in_place(header)
+        self.start += header_size
 
-        self._slice_packet_size()
-
-    def _slice_packet_size(self):
-        """ Cut the packet size from packet_buf. """
-        packet_size = int.from_bytes(self.packet_buf[:2], "big")
-        self.packet_size = packet_size
-        self.packet_buf = self.packet_buf[2:]
+        packet_size = int.from_bytes(header[:2], "big")
+        if packet_size < self.OPCODE_SIZE:
+            LOG.warning("WorldPacketReceiver: invalid packet size.")
+            raise WorldPacketReceiverException()
+        self.packet_size = packet_size - self.OPCODE_SIZE
+        self.opcode = _get_opcode(header[2:])
 
     def _get_content(self):
-        while len(self.packet_buf) < self.packet_size:
+        while self.end - self.start < self.packet_size:
             self._get_more_data()
 
-        self.content = self.packet_buf[:self.packet_size]
-        self.packet_buf = self.packet_buf[self.packet_size:]
-
-        self._slice_packet_opcode()
-
-    def _slice_packet_opcode(self):
-        """ Cut the packet opcode from content. """
-        opcode_bytes = self.content[:4]
-        opcode_value = int.from_bytes(opcode_bytes, "little")
-        self.content = self.content[4:]
-
-        try:
-            self.opcode = OpCode(opcode_value)
-        except ValueError:
-            LOG.warning("Unknown opcode {:X}".format(opcode_value))
+        content_end = self.start + self.packet_size
+        self.content = self.view[self.start : content_end]
+        self.start = content_end
+        if self.start == self.end:
+            self.start = self.end = 0
 
     def _get_more_data(self):
-        some_data = None
+        if self.wait_for_data is not None:
+            self.wait_for_data()
+        self._make_room()
+        read_view = self.view[self.end : self.end + self.read_size]
+        num_read = 0
         try:
-            some_data = self.socket.recv(1024)
+            num_read = self.socket.recv_into(read_view)
         except ConnectionError as exc:
             LOG.warning("WorldPacketReceiver: ConnectionError: " + str(exc))
             traceback.print_tb(exc.__traceback__)
 
-        if not some_data:
+        if not num_read:
             raise WorldPacketReceiverException()
 
-        self.packet_buf += some_data
+        self.end += num_read
+        self._adapt_read_size(num_read)
+
+    def _make_room(self):
+        """ Ensure there is read_size bytes available after end, moving the
+        pending data at the beginning of the buffer or growing it. """
+        if len(self.buffer) - self.end >= self.read_size:
+            return
+
+        pending_size = self.end - self.start
+        needed_size = pending_size + self.read_size
+        if needed_size > len(self.buffer):
+            new_size = max(needed_size, len(self.buffer) * 2)
+            new_buffer = bytearray(new_size)
+            new_buffer[:pending_size] = self.view[self.start : self.end]
+            self.buffer = new_buffer
+            self.view = memoryview(self.buffer)
+        else:
+            self.view[:pending_size] = self.view[self.start : self.end]
+        self.start = 0
+        self.end = pending_size
+
+    def _adapt_read_size(self, num_read):
+        if num_read == self.read_size:
+            self.read_size = min(self.read_size * 2, self.MAX_READ_SIZE)
+        elif num_read < self.read_size // 4:
+            self.read_size = max(self.read_size // 2, self.MIN_READ_SIZE)
 
     def clean(self):
         self.packet_size = -1
@@ -127,3 +218,51 @@ class WorldPacketReceiver(object):
 
 class WorldPacketReceiverException(Exception):
     pass
+
+
+class AsyncWorldPacketReceiver(object):
+    """ Coroutine counterpart of WorldPacketReceiver, reading packets from an
+    asyncio StreamReader instead of a socket. """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.session_cipher = None
+
+    async def get_next_packet(self):
+        """ Return a received WorldPacket, or None if the connection got closed
+        or sent an invalid packet size. Like the socket receiver, it doesn't
+        capture other network exceptions like ConnectionResetError. """
+        header_size = SessionCipher.DECRYPT_HEADER_SIZE
+        try:
+            header = await self.reader.readexactly(header_size)
+            if self.session_cipher is not None:
+                header = self.session_cipher.decrypt(header)
+
+            # The size field counts the opcode but not itself.
+            packet_size = int.from_bytes(header[:2], "big")
+            content_size = packet_size - (header_size - 2)
+            if content_size < 0:
+                LOG.warning("Invalid packet size {}".format(packet_size))
+                return None
+            content = await self.reader.readexactly(content_size)
+        except asyncio.IncompleteReadError:
+            return None
+
+        opcode = _get_opcode(header[2:])
+
+        if DEBUG:
+            if opcode is not None:
+                print("<<<", opcode)
+            print(dump_data(content), end = "")
+
+        return WorldPacket(opcode, content)
+
+
+def _get_opcode(opcode_bytes):
+    """ Return the OpCode from these 4 bytes, or None if it's unknown. """
+    opcode_value = int.from_bytes(opcode_bytes, "little")
+    try:
+        return OpCode(opcode_value)
+    except ValueError:
+        LOG.warning("Unknown opcode {:X}".format(opcode_value))
+        return None
@@ -3,10 +3,14 @@ import threading
 import time
 
 from durator.config import CONFIG
+from durator.world.connection_registry import ConnectionRegistry
 from durator.world.game.chat.manager import ChatManager
 from durator.world.game.object.manager import ObjectManager
+from durator.world.game.update_compression import UPDATE_COMPRESSION
 from durator.world.realm import Realm, RealmId, RealmFlags, RealmPopulation
 from durator.world.world_connection import WorldConnection
+from durator.world.world_thread import WorldThread
+from durator.world.world_tick import WorldTick
 from pyshgck.conc import simple_thread
 from durator.common.log import LOG
 
@@ -33,10 +37,11 @@ class WorldServer(object):
         self.login_server_socket = None
         self.clients_socket = None
 
-        self.world_connections = []
-        self.world_connections_lock = threading.Lock()
+        self.connection_registry = ConnectionRegistry()
         self.object_manager = ObjectManager(self)
         self.chat_manager = ChatManager(self)
+        self.world_tick = WorldTick(self)
+        self.world_thread = WorldThread(self) if WorldThread.ENABLED else None
 
         self.shutdown_flag = threading.Event()
 
@@ -51,11 +56,23 @@ class WorldServer(object):
         self._listen_clients()
 
         simple_thread(self._handle_login_server_connection)
+        self.object_manager.set_batched_snapshots(self.world_tick.is_enabled())
+        if self.world_thread is not None:
+            simple_thread(self.world_thread.run)
+        elif self.world_tick.is_enabled():
+            self._start_world_tick()
         self._accept_clients()
 
         self.shutdown_flag.set()
         self._stop_listen_clients()
         LOG.info("World server stopped.")
+        LOG.info("Update compression stats: " + str(
+            UPDATE_COMPRESSION.get_stats()
+        ))
+        if self.world_thread is not None:
+            LOG.info("World thread stats: " + str(
+                self.world_thread.get_stats()
+            ))
 
     #------------------------------
     # Clients connection
@@ -89,16 +106,17 @@ class WorldServer(object):
             pass
 
     def _handle_client(self, connection, address):
-        """ Start the threaded WorldConnection and add it to the local list. """
+        """ Start the threaded WorldConnection and register it. """
         address_string = str(address[0]) + ":" + str(address[1])
         LOG.info("Accepting client connection from " + address_string)
         world_connection = WorldConnection(self, connection)
-
-        with self.world_connections_lock:
-            self.world_connections.append(world_connection)
+        self.connection_registry.add(world_connection)
 
         simple_thread(world_connection.handle_connection)
 
+    def _start_world_tick(self):
+        simple_thread(self.world_tick.run)
+
     #------------------------------
     # Login server connection
     #------------------------------
@@ -137,27 +155,36 @@ class WorldServer(object):
     # Server utilities
     #------------------------------
 
-    def broadcast(self, packet, state = None, guids = None):
-        """ Send a WorldPacket to all eligible WorldConnection. """
-        with self.world_connections_lock:
-            for connection in self.world_connections:
-                eligible = WorldServer._get_broadcast_eligibility(
-                    connection, state, guids
-                )
-                if eligible:
-                    connection.outgoing_queue.put(packet)
-
-    @staticmethod
-    def _get_broadcast_eligibility(connection, state, guids):
-        """ Return whether a connection is eligible to receive a broadcast.
+    def post_to_world(self, func, *args):
+        """ Run func(*args), which changes the world state, without waiting
+        for it: it is posted to the world thread if there is one, else it is
+        run right away in the calling thread. """
+        if self.world_thread is not None:
+            self.world_thread.post(func, *args)
+        else:
+            func(*args)
+
+    def call_in_world(self, func, *args):
+        """ Run func(*args), which changes the world state, and return its
+        result, in the world thread if there is one. """
+        if self.world_thread is not None:
+            return self.world_thread.call(func, *args)
+        return func(*args)
+
+    def broadcast(self, packet, state = None, guids = None, map_id = None):
+        """ Send a WorldPacket to all eligible WorldConnection.
 
         If state is provided, send packet only WorldConnections in that state.
         If guids is provided, send packet only to players in that GUID list.
+        If map_id is provided, send packet only to players on that map.
+
+        Connections are looked up in the registry, so a broadcast to some
+        players only costs as much as the number of targets.
         """
-        state_condition = ( state is None
-                            or connection.state == state )
-        guid_condition = ( guids is None
-                           or ( connection.player
-                                and connection.player.guid in guids ) )
-        eligible = state_condition and guid_condition
-        return eligible
+        connections = self.connection_registry.get_connections(state, guids)
+        for connection in connections:
+            if map_id is not None:
+                player = connection.player
+                if player is None or player.map_id != map_id:
+                    continue
+            connection.queue_packet(packet)
@@ -0,0 +1,150 @@
+from concurrent.futures import CancelledError, Future
+import concurrent.futures
+import queue
+import threading
+import time
+
+from durator.config import CONFIG
+from durator.common.log import LOG
+
+
+class WorldThread(object):
+    """ Single thread owning the world state, in the opt-in world_thread mode.
+
+    Connection threads only parse their packets and post world state changes
+    (movement, spawn, despawn, chat routing) as messages to this thread, which
+    runs them one at a time in the order they were posted, along with the world
+    ticks. The ObjectManager is then only used from this thread, so its locks
+    and the objects locks are never contended.
+
+    Messages are functions with their arguments; use WorldServer.post_to_world
+    and WorldServer.call_in_world rather than this class directly, as they
+    also work when the mode is disabled.
+
+    When the thread stops, messages still queued are cancelled, and later
+    messages are run right away in the thread posting them, as nothing else
+    changes the world anymore; calls waiting for a cancelled message run it
+    themselves. Players logging out during the shutdown are then still
+    removed and saved.
+    """
+
+    ENABLED = CONFIG.getboolean("world", "world_thread")
+
+    # Max time (seconds) waiting for a message, to check the shutdown flag.
+    IDLE_TIMEOUT = 1
+
+    # Max time (seconds) a call waits for its result.
+    CALL_TIMEOUT = 30
+
+    def __init__(self, server):
+        self.server = server
+        self.messages = queue.Queue()
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.thread_id = None
+        self.num_messages = 0
+        self.busy_time = 0.0
+
+    def post(self, func, *args):
+        """ Queue func(*args) to be run by the world thread, and return a
+        Future that gets its result. If the world thread has stopped, it is
+        run right away instead. """
+        future = Future()
+        with self.lock:
+            if not self.stopped:
+                self.messages.put((future, func, args))
+                return future
+        self._process_message((future, func, args))
+        return future
+
+    def call(self, func, *args):
+        """ Run func(*args) in the world thread and return its result, waiting
+        for it if called from another thread, at most CALL_TIMEOUT seconds
+        (then concurrent.futures.TimeoutError is raised). """
+        if threading.get_ident() == self.thread_id:
+            return func(*args)
+        future = self.post(func, *args)
+        try:
+            return future.result(timeout = self.CALL_TIMEOUT)
+        except CancelledError:
+            # The world thread stopped before running it.
+            return func(*args)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            LOG.error("World thread call {} timed out.".format(
+                func.__qualname__
+            ))
+            raise
+
+    def run(self):
+        """ Process messages and world ticks until the server shuts down. """
+        self.thread_id = threading.get_ident()
+        try:
+            self._run_until_shutdown()
+        finally:
+            self._stop()
+
+    def _run_until_shutdown(self):
+        world_tick = self.server.world_tick
+        period = world_tick.get_period() if world_tick.is_enabled() else None
+        next_tick = time.perf_counter() + period if period else None
+        while not self.server.shutdown_flag.is_set():
+            if period:
+                timeout = max(next_tick - time.perf_counter(), 0)
+            else:
+                timeout = self.IDLE_TIMEOUT
+            try:
+                message = self.messages.get(timeout = timeout)
+                self._process_message(message)
+            except queue.Empty:
+                pass
+
+            if period and time.perf_counter() >= next_tick:
+                world_tick.flush()
+                next_tick = max(next_tick + period, time.perf_counter())
+
+    def _stop(self):
+        """ Stop accepting messages and cancel the ones still queued. """
+        with self.lock:
+            self.stopped = True
+        while True:
+            try:
+                future, _, _ = self.messages.get_nowait()
+            except queue.Empty:
+                return
+            future.cancel()
+
+    def process_messages(self):
+        """ Process all the messages already queued, then return. """
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return
+            self._process_message(message)
+
+    def _process_message(self, message):
+        future, func, args = message
+        if not future.set_running_or_notify_cancel():
+            return
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception as exc:
+            LOG.error("World thread message {} failed: {}".format(
+                func.__qualname__, exc
+            ))
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        self.busy_time += time.perf_counter() - start
+        self.num_messages += 1
+
+    def get_stats(self):
+        """ Return a dict with the number of messages processed, the time spent
+        processing them and the number of messages waiting. """
+        return {
+            "messages": self.num_messages,
+            "busy_time": self.busy_time,
+            "queued": self.messages.qsize()
+        }
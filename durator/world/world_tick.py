@@ -0,0 +1,114 @@
+import threading
+import time
+
+from durator.config import CONFIG
+from durator.world.game.update_object_packet import (
+    UpdateObjectPacket, MultiUpdateObjectPacket )
+from durator.world.world_connection_state import WorldConnectionState
+
+
+class WorldTick(object):
+    """ Gather the world update packets for each player and send them at a
+    fixed rate, tick_rate times per second.
+
+    Consecutive update blocks for a player are merged in a single
+    SMSG_UPDATE_OBJECT packet, and a movement block replaces a pending one for
+    the same object (blocks read the object state when they are serialized).
+    Other packets, e.g. object destructions, are sent as is, in order. Changed
+    object fields are sent at the beginning of each tick as PARTIAL blocks.
+    When ticks run, player moves are published to the object manager snapshot
+    once per tick instead of after each move.
+
+    With a tick rate of 0, packets are broadcast as soon as they are sent, and
+    changed fields of a player are sent after each packet handled by its
+    connection.
+    """
+
+    TICK_RATE = float(CONFIG["world"]["tick_rate"])
+
+    def __init__(self, server):
+        self.server = server
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def is_enabled(self):
+        return self.TICK_RATE > 0
+
+    def get_period(self):
+        return 1 / self.TICK_RATE
+
+    def send(self, packet, guids):
+        """ Send the packet to the players with these GUIDs at the next tick,
+        or right away if ticks are disabled. """
+        if not self.is_enabled():
+            self.server.broadcast(
+                packet,
+                state = WorldConnectionState.IN_WORLD,
+                guids = guids
+            )
+            return
+
+        with self.lock:
+            for guid in guids:
+                self.pending.setdefault(guid, []).append(packet)
+
+    def run(self):
+        """ Flush pending packets every period until the server shuts down. """
+        period = self.get_period()
+        while not self.server.shutdown_flag.is_set():
+            tick_start = time.perf_counter()
+            self.flush()
+            tick_duration = time.perf_counter() - tick_start
+            time.sleep(max(period - tick_duration, 0))
+
+    def flush(self):
+        """ Publish the players moves, send their changed fields and their
+        accumulated movements, then queue the pending packets to their players
+        connections. """
+        object_manager = self.server.object_manager
+        object_manager.publish_snapshot()
+        object_manager.update_all_fields()
+        object_manager.send_accumulated_movements()
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+        if not pending:
+            return
+
+        registry = self.server.connection_registry
+        for guid, packets in pending.items():
+            connection = registry.get_by_guid(guid)
+            if ( connection is None
+                 or connection.state != WorldConnectionState.IN_WORLD ):
+                continue
+            for packet in WorldTick._merge_packets(packets):
+                connection.queue_packet(packet)
+
+    @staticmethod
+    def _merge_packets(packets):
+        """ Return the packets list with each run of update packets merged into
+        a MultiUpdateObjectPacket, without replaceable duplicate blocks. """
+        merged = []
+        update_run = []
+        run_keys = {}
+        for packet in packets + [None]:
+            if isinstance(packet, UpdateObjectPacket):
+                key = packet.get_replace_key()
+                if key is None:
+                    update_run.append(packet)
+                elif key in run_keys:
+                    update_run[run_keys[key]] = packet
+                else:
+                    run_keys[key] = len(update_run)
+                    update_run.append(packet)
+                continue
+
+            if len(update_run) == 1:
+                merged.append(update_run[0])
+            elif update_run:
+                merged.append(MultiUpdateObjectPacket(update_run))
+            update_run = []
+            run_keys = {}
+            if packet is not None:
+                merged.append(packet)
+        return merged
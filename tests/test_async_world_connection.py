@@ -0,0 +1,32 @@
+import asyncio
+import threading
+import unittest
+
+from durator.world.async_world_connection import AsyncWorldConnection
+
+
+class TestAsyncWorldConnection(unittest.TestCase):
+
+    def test_call_in_loop(self):
+        """ _call_in_loop, direct call only from the loop thread """
+        loop = asyncio.new_event_loop()
+        try:
+            connection = AsyncWorldConnection.__new__(AsyncWorldConnection)
+            connection.loop = loop
+            connection.loop_thread_id = threading.get_ident()
+            calls = []
+
+            connection._call_in_loop(lambda: calls.append("loop"))
+            self.assertEqual(calls, ["loop"])
+
+            other = threading.Thread(
+                target = connection._call_in_loop,
+                args = (lambda: calls.append("other"),)
+            )
+            other.start()
+            other.join()
+            self.assertEqual(calls, ["loop"])
+            loop.run_until_complete(asyncio.sleep(0))
+            self.assertEqual(calls, ["loop", "other"])
+        finally:
+            loop.close()
@@ -0,0 +1,81 @@
+import unittest
+
+from durator.world.game.object.object_fields import (
+    ObjectField, ItemField, UnitField, PlayerField )
+from durator.world.game.object.type.base_object import BaseObject
+from durator.world.game.object.type.player import Player
+from durator.world.game.update_object_packet import UpdateBlocksBuilder
+
+
+class TestBaseObject(unittest.TestCase):
+
+    def test_get_set(self):
+        """ get and set, typed values are stored in raw slots """
+        player = Player()
+        self.assertEqual(len(player.slots), 0x36C)
+        self.assertIsNone(player.get(UnitField.HEALTH))
+
+        player.set(ObjectField.GUID, 0x1122334455667788)
+        player.set(ObjectField.SCALE_X, 1.0)
+        player.set(UnitField.HEALTH, -1)
+        player.set(PlayerField.SKILL_INFO_1_ID.value, 5)
+
+        self.assertEqual(player.get(ObjectField.GUID), 0x1122334455667788)
+        self.assertEqual(player.slots[0], 0x55667788)
+        self.assertEqual(player.slots[1], 0x11223344)
+        self.assertEqual(player.get(ObjectField.SCALE_X), 1.0)
+        self.assertEqual(player.slots[ObjectField.SCALE_X.value], 0x3F800000)
+        self.assertEqual(player.get(UnitField.HEALTH), -1)
+        self.assertEqual(player.get(PlayerField.SKILL_INFO_1_ID.value), 5)
+
+    def test_out_of_layout(self):
+        """ get and set, fields out of the object layout are ignored """
+        base_object = BaseObject()
+        base_object.set(UnitField.HEALTH, 10)
+        base_object.set(0x1000, 10)
+        self.assertIsNone(base_object.get(UnitField.HEALTH))
+        self.assertIsNone(base_object.get(0x1000))
+        self.assertEqual(base_object.get_field_mask(UnitField.HEALTH), 0)
+        self.assertEqual(base_object.set_mask, 0)
+        self.assertEqual(base_object.dirty_mask, 0)
+        self.assertEqual(len(base_object.slots), BaseObject.LAYOUT.num_fields)
+
+    def test_dirty_mask(self):
+        """ set, only changed fields are marked dirty, on all their slots """
+        player = Player()
+        player.set(ObjectField.GUID, 1)
+        self.assertEqual(player.dirty_mask, 0b11)
+        player.clear_dirty_fields()
+
+        player.set(ObjectField.GUID, 1)
+        self.assertEqual(player.dirty_mask, 0)
+        player.set(ObjectField.SCALE_X, 0.0)
+        self.assertEqual(player.dirty_mask, 1 << ObjectField.SCALE_X.value)
+
+    def test_add_slots(self):
+        """ add_slots, object slots are sent as is """
+        player = Player()
+        player.set(ObjectField.GUID, 0xDEAD)
+        player.set(ObjectField.SCALE_X, 1.0)
+        player.set(ObjectField.TYPE, 0x19)
+
+        builder = UpdateBlocksBuilder()
+        builder.add_slots(player.slots, player.set_mask)
+        expected = ( b"\x01" +
+                     int.to_bytes(0b10111, 4, "little") +
+                     b"\xAD\xDE\x00\x00\x00\x00\x00\x00" +
+                     b"\x19\x00\x00\x00" +
+                     b"\x00\x00\x80\x3F" )
+        self.assertEqual(builder.to_bytes(), expected)
+
+    def test_layout(self):
+        """ LAYOUT, fields of the object type are precompiled """
+        layout = Player.LAYOUT
+        self.assertEqual(layout.num_fields, 0x36C)
+        self.assertEqual(layout.fields[ObjectField.GUID].mask, 0b11)
+        self.assertIn(PlayerField.SKILL_INFO_1_ID.value, layout.fields)
+        self.assertNotIn(ItemField.OWNER, layout.fields)
+        self.assertEqual(
+            layout.get_mask([ObjectField.TYPE, ObjectField.SCALE_X]),
+            0b10100
+        )
@@ -0,0 +1,98 @@
+import unittest
+
+from durator.world.connection_registry import ConnectionRegistry
+from durator.world.world_connection_state import WorldConnectionState
+
+
+class FakeConnection(object):
+
+    def __init__(self, state):
+        self.state = state
+
+
+class TestConnectionRegistry(unittest.TestCase):
+
+    def test_get_connections(self):
+        """ get_connections, by state, by GUID, or both """
+        registry = ConnectionRegistry()
+        conn_1 = FakeConnection(WorldConnectionState.IN_WORLD)
+        conn_2 = FakeConnection(WorldConnectionState.AUTH_OK)
+        for connection in (conn_1, conn_2):
+            registry.add(connection)
+        registry.set_player_guid(conn_1, 1)
+        registry.set_player_guid(conn_2, 2)
+
+        in_world = WorldConnectionState.IN_WORLD
+        self.assertEqual(registry.get_connections(state = in_world), [conn_1])
+        self.assertEqual(registry.get_connections(guids = [2, 3]), [conn_2])
+        self.assertEqual(
+            registry.get_connections(state = in_world, guids = [1, 2]),
+            [conn_1]
+        )
+        self.assertEqual(len(registry.get_connections()), 2)
+        # Each connection is returned once, even for duplicate GUIDs.
+        self.assertEqual(registry.get_connections(guids = [1, 1]), [conn_1])
+
+    def test_update_and_remove(self):
+        """ update_state and remove, indexes follow connections """
+        registry = ConnectionRegistry()
+        connection = FakeConnection(WorldConnectionState.AUTH_OK)
+        registry.add(connection)
+        registry.set_player_guid(connection, 1)
+
+        connection.state = WorldConnectionState.IN_WORLD
+        registry.update_state(
+            connection,
+            WorldConnectionState.AUTH_OK, WorldConnectionState.IN_WORLD
+        )
+        self.assertEqual(
+            registry.get_connections(state = WorldConnectionState.IN_WORLD),
+            [connection]
+        )
+        self.assertEqual(
+            registry.get_connections(state = WorldConnectionState.AUTH_OK),
+            []
+        )
+
+        registry.remove(connection)
+        self.assertIsNone(registry.get_by_guid(1))
+        self.assertEqual(registry.by_state, {})
+        self.assertEqual(registry.get_connections(), [])
+
+    def test_outdated_old_state(self):
+        """ update_state and remove, with an outdated old state """
+        registry = ConnectionRegistry()
+        connection = FakeConnection(WorldConnectionState.AUTH_OK)
+        registry.add(connection)
+
+        connection.state = WorldConnectionState.ERROR
+        registry.update_state(
+            connection,
+            WorldConnectionState.IN_WORLD, WorldConnectionState.ERROR
+        )
+        self.assertEqual(
+            registry.get_connections(state = WorldConnectionState.AUTH_OK),
+            []
+        )
+        registry.remove(connection)
+        self.assertEqual(registry.by_state, {})
+
+    def test_cached_snapshots(self):
+        """ get_connections, cached lists follow changes """
+        registry = ConnectionRegistry()
+        in_world = WorldConnectionState.IN_WORLD
+        conn_1 = FakeConnection(in_world)
+        conn_2 = FakeConnection(in_world)
+        registry.add(conn_1)
+        self.assertEqual(registry.get_connections(state = in_world), [conn_1])
+        self.assertEqual(registry.get_connections(), [conn_1])
+
+        registry.add(conn_2)
+        self.assertEqual(
+            set(registry.get_connections(state = in_world)), {conn_1, conn_2}
+        )
+        self.assertEqual(len(registry.get_connections()), 2)
+
+        registry.remove(conn_1)
+        self.assertEqual(registry.get_connections(state = in_world), [conn_2])
+        self.assertEqual(registry.get_connections(), [conn_2])
@@ -0,0 +1,174 @@
+import unittest
+
+from durator.world.game.destroy_object_packet import DestroyObjectPacket
+from durator.world.game.movement_relay_packet import MovementRelayPacket
+from durator.world.game.object.interest_manager import InterestManager
+from durator.world.game.object.manager import ObjectManager
+from durator.world.game.object.object_fields import ObjectField, UnitField
+from durator.world.game.object.type.player import Player
+from durator.world.game.player_spawn_packet import (
+    PlayerSpawnPacket, PLAYER_SPAWN_FIELDS )
+from durator.world.game.update_object_packet import UpdateType
+from durator.world.opcodes import OpCode
+
+
+class FakeServer(object):
+
+    def __init__(self):
+        self.sent = []
+        self.world_tick = self
+
+    def is_enabled(self):
+        return True
+
+    def get_period(self):
+        return 0.5
+
+    def send(self, packet, guids):
+        for guid in guids:
+            self.sent.append((guid, self._describe(packet)))
+
+    @staticmethod
+    def _describe(packet):
+        if isinstance(packet, PlayerSpawnPacket):
+            return "create", packet.update_infos["object"].guid
+        elif isinstance(packet, DestroyObjectPacket):
+            guid = DestroyObjectPacket.PACKET_BIN.unpack(packet.data)[0]
+            return "destroy", guid
+        elif isinstance(packet, MovementRelayPacket):
+            return "relay", packet.guid
+        elif packet.update_type == UpdateType.MOVEMENT:
+            return "move", packet.update_infos["object"].guid
+        elif packet.update_type == UpdateType.PARTIAL:
+            return "partial", packet.update_infos["object"].guid
+
+
+def create_player(guid, x):
+    player = Player()
+    for field in PLAYER_SPAWN_FIELDS:
+        player.set(field, 0)
+    player.set(ObjectField.GUID, guid)
+    player.position.x = x
+    player.clear_dirty_fields()
+    return player
+
+
+class TestInterestManager(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeServer()
+        self.object_manager = ObjectManager(self.server)
+        self.players = [ create_player(1, 0.0), create_player(2, 10.0) ]
+        for player in self.players:
+            self.object_manager.player_manager._add_to_partition(player, 0)
+
+    def _move(self, player, x, movement_packet = None):
+        player.position.x = x
+        self.object_manager.update_player_position(player)
+        self.server.sent = []
+        self.object_manager.update_movement(player, movement_packet)
+        return sorted(self.server.sent)
+
+    def test_enter_move_leave(self):
+        """ update_movement, with hysteresis on the range limit """
+        player_1, player_2 = self.players
+        leave_range = InterestManager.LEAVE_RANGE
+        update_range = InterestManager.UPDATE_RANGE
+
+        self.assertEqual(self._move(player_1, 0.0), [
+            (1, ("create", 2)),
+            (2, ("create", 1))
+        ])
+        self.assertEqual(player_1.tracked_guids, {2})
+        self.assertEqual(player_2.tracked_guids, {1})
+
+        self.assertEqual(self._move(player_1, 5.0), [(2, ("move", 1))])
+
+        # Between both ranges, players keep tracking each other...
+        middle = 10.0 + (update_range + leave_range) / 2
+        self.assertEqual(self._move(player_1, middle), [(2, ("move", 1))])
+        # ... until they get farther than the leave range.
+        self.assertEqual(self._move(player_1, 20.0 + leave_range), [
+            (1, ("destroy", 2)),
+            (2, ("destroy", 1))
+        ])
+        self.assertEqual(player_1.tracked_guids, set())
+        self.assertEqual(player_2.tracked_guids, set())
+
+        # Coming back between both ranges does not create them again.
+        self.assertEqual(self._move(player_1, middle), [])
+
+    def test_movement_relay(self):
+        """ update_movement, a relayed movement packet replaces the update """
+        player_1, player_2 = self.players
+        relay_packet = MovementRelayPacket(
+            OpCode.MSG_MOVE_HEARTBEAT, 1, player_1.movement.to_bytes()
+        )
+        # Players getting in range are still created with update blocks.
+        self.assertEqual(self._move(player_1, 0.0, relay_packet), [
+            (1, ("create", 2)),
+            (2, ("create", 1))
+        ])
+        self.assertEqual(
+            self._move(player_1, 5.0, relay_packet), [(2, ("relay", 1))]
+        )
+        self.assertEqual(relay_packet.opcode, OpCode.MSG_MOVE_HEARTBEAT)
+        self.assertEqual(
+            relay_packet.data[8:], player_1.movement.to_bytes()
+        )
+
+    def test_movement_lod(self):
+        """ update_movement, far trackers get the last movement later """
+        player_1, player_2 = self.players
+        movement_lod = self.object_manager.movement_lod
+        movement_lod.TIERS = [(50.0, 1), (200.0, 2), (float("inf"), 5)]
+        self._move(player_1, 0.0)
+        self.assertEqual(self._move(player_1, 5.0), [(2, ("move", 1))])
+
+        # Farther than 50 units, movements are accumulated...
+        self.assertEqual(self._move(player_1, -100.0), [])
+        self.assertEqual(self._move(player_1, -110.0), [])
+        self.assertEqual(movement_lod.replaced, 1)
+        # ... and only the last one is sent when due (tick + GUID even).
+        self.server.sent = []
+        self.object_manager.send_accumulated_movements()
+        self.assertEqual(self.server.sent, [(2, ("move", 1))])
+        self.assertEqual(movement_lod.pending, {})
+
+        # Trackers getting out of range do not get accumulated movements.
+        self._move(player_1, -120.0)
+        self._move(player_1, 20.0 + InterestManager.LEAVE_RANGE)
+        self.assertEqual(movement_lod.pending, {})
+
+    def test_remove_player(self):
+        """ remove_player, trackers get a destroy packet """
+        player_1, player_2 = self.players
+        self._move(player_1, 0.0)
+
+        self.server.sent = []
+        self.object_manager.interest_manager.remove_player(player_1)
+        self.assertEqual(self.server.sent, [(2, ("destroy", 1))])
+        self.assertEqual(player_2.tracked_guids, set())
+
+    def test_update_fields(self):
+        """ update_fields, changed fields are sent once to self and trackers """
+        player_1, player_2 = self.players
+        self._move(player_1, 0.0)
+
+        player_1.set(UnitField.HEALTH, 0)  # unchanged
+        self.assertEqual(player_1.dirty_mask, 0)
+        player_1.set(UnitField.HEALTH, 50)
+        health_mask = player_1.get_field_mask(UnitField.HEALTH)
+        self.assertEqual(player_1.dirty_mask, health_mask)
+
+        self.server.sent = []
+        self.object_manager.update_all_fields()
+        self.assertEqual(sorted(self.server.sent), [
+            (1, ("partial", 1)),
+            (2, ("partial", 1))
+        ])
+        self.assertEqual(player_1.dirty_mask, 0)
+
+        self.server.sent = []
+        self.object_manager.update_all_fields()
+        self.assertEqual(self.server.sent, [])
@@ -0,0 +1,53 @@
+import asyncio
+import socket
+import unittest
+
+from durator.auth.login_packet import (
+    LoginPacketReceiver, AsyncLoginPacketReceiver )
+
+
+CHALL_CONTENT = bytes(30) + b"\x04" + b"TEST"
+LOGIN_CHALL   = b"\x00\x03" + int.to_bytes(35, 2, "little") + CHALL_CONTENT
+LOGIN_PROOF   = b"\x01" + bytes(73)
+REALMLIST     = b"\x10" + bytes(4)
+ALL_PACKETS   = LOGIN_CHALL + LOGIN_PROOF + REALMLIST
+
+
+class TestLoginPacket(unittest.TestCase):
+
+    def test_split_and_coalesced(self):
+        """ get_next_packet, with packets sent in arbitrary pieces """
+        client, server = socket.socketpair()
+        for offset in range(0, len(ALL_PACKETS), 7):
+            client.sendall(ALL_PACKETS[offset : offset + 7])
+        client.close()
+
+        receiver = LoginPacketReceiver(server)
+        self.assertEqual(receiver.get_next_packet(), LOGIN_CHALL)
+        self.assertEqual(receiver.get_next_packet(), LOGIN_PROOF)
+        self.assertEqual(receiver.get_next_packet(), REALMLIST)
+        self.assertIsNone(receiver.get_next_packet())
+        server.close()
+
+    def test_async(self):
+        """ get_next_packet, asyncio version """
+        async def receive_all():
+            reader = asyncio.StreamReader()
+            reader.feed_data(ALL_PACKETS)
+            reader.feed_eof()
+            receiver = AsyncLoginPacketReceiver(reader)
+            return [await receiver.get_next_packet() for _ in range(4)]
+
+        loop = asyncio.new_event_loop()
+        packets = loop.run_until_complete(receive_all())
+        loop.close()
+        self.assertEqual(packets, [LOGIN_CHALL, LOGIN_PROOF, REALMLIST, None])
+
+    def test_unknown_opcode(self):
+        """ get_next_packet, unknown opcodes end the connection """
+        client, server = socket.socketpair()
+        client.sendall(b"\xEE" + REALMLIST)
+        receiver = LoginPacketReceiver(server)
+        self.assertIsNone(receiver.get_next_packet())
+        client.close()
+        server.close()
@@ -0,0 +1,58 @@
+import unittest
+
+from durator.world.game.movement import Movement, MovementFlags
+from durator.world.game.position import Position
+
+
+class TestMovement(unittest.TestCase):
+
+    def test_heartbeat(self):
+        """ Movement without optional parts, parsed from a memoryview """
+        movement = Movement()
+        movement.flags = MovementFlags.FORWARD.value
+        movement.time = 1234
+        movement.position = Position(1.5, -2.0, 3.25, 0.5)
+        data = movement.to_bytes()
+        self.assertEqual(len(data), Movement.HEADER_BIN.size)
+
+        parsed = Movement.from_bytes(memoryview(b"\xFF" * 3 + data), 3)
+        self.assertEqual(parsed.flags, movement.flags)
+        self.assertEqual(parsed.time, 1234)
+        self.assertEqual(
+            (parsed.position.x, parsed.position.y, parsed.position.z,
+             parsed.position.o),
+            (1.5, -2.0, 3.25, 0.5)
+        )
+        self.assertIsNone(parsed.jump_data)
+        self.assertIsNone(parsed.transport_position)
+        self.assertEqual(parsed.to_bytes(), data)
+
+    def test_optional_parts(self):
+        """ Movement with all optional parts, round trip """
+        movement = Movement()
+        movement.flags = ( MovementFlags.ON_TRANSPORT.value
+                         | MovementFlags.IS_SWIMMING.value
+                         | MovementFlags.IS_FALLING.value
+                         | MovementFlags.SPLINE_ELEVATION.value )
+        movement.transport_guid = 0xF120000000001234
+        movement.transport_position = Position(0.5, 1.0, 1.5, 2.0)
+        movement.swim_pitch = 0.25
+        movement.jump_data.time = 42
+        movement.jump_data.velocity = -7.5
+        movement.spline_elevation_unk = 3.0
+        data = movement.to_bytes()
+        self.assertEqual(len(data), movement.get_size())
+
+        parsed = Movement.from_bytes(data)
+        self.assertEqual(parsed.transport_guid, 0xF120000000001234)
+        self.assertEqual(parsed.transport_position.o, 2.0)
+        self.assertEqual(parsed.swim_pitch, 0.25)
+        self.assertEqual(parsed.jump_data.time, 42)
+        self.assertEqual(parsed.jump_data.velocity, -7.5)
+        self.assertEqual(parsed.spline_elevation_unk, 3.0)
+        self.assertEqual(parsed.to_bytes(), data)
+
+    def test_slots(self):
+        """ Movement value types have no instance dict """
+        for value in (Movement(), Position(), Movement().jump_data):
+            self.assertFalse(hasattr(value, "__dict__"))
@@ -0,0 +1,100 @@
+import unittest
+
+from durator.world.game.movement import Movement, MovementFlags
+from durator.world.game.movement_filter import MovementFilter
+from durator.world.game.object.type.unit import DEFAULT_SPEEDS
+from durator.world.opcodes import OpCode
+
+
+def running_movement(time, x, flags = MovementFlags.FORWARD.value):
+    """ Movement of a unit running along the x axis. """
+    movement = Movement()
+    movement.flags = flags
+    movement.time = time
+    movement.position.x = x
+    return movement
+
+
+class TestMovementFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.movement_filter = MovementFilter()
+        self.movement_filter.ENABLED = True
+        self.movement_filter.ERROR_THRESHOLD = 1.0
+        self.movement_filter.MAX_INTERVAL = 1000
+
+    def _send(self, opcode, movement):
+        return self.movement_filter.should_send(
+            opcode, movement, DEFAULT_SPEEDS
+        )
+
+    def test_straight_line(self):
+        """ should_send, predictable heartbeats are suppressed """
+        run_speed = DEFAULT_SPEEDS["run"]
+        heartbeat = OpCode.MSG_MOVE_HEARTBEAT
+        self.assertTrue(self._send(
+            OpCode.MSG_MOVE_START_FORWARD, running_movement(0, 0.0)
+        ))
+        self.assertFalse(self._send(
+            heartbeat, running_movement(500, run_speed * 0.5)
+        ))
+        # Off course by more than the threshold.
+        self.assertTrue(self._send(
+            heartbeat, running_movement(600, run_speed * 0.6 + 2.0)
+        ))
+        self.assertFalse(self._send(
+            heartbeat, running_movement(1100, run_speed * 1.1 + 2.0)
+        ))
+        # Too long since the last sent movement.
+        self.assertTrue(self._send(
+            heartbeat, running_movement(1600, run_speed * 1.6 + 2.0)
+        ))
+        self.assertEqual(
+            self.movement_filter.get_stats(), { "sent": 3, "suppressed": 2 }
+        )
+
+    def test_state_changes(self):
+        """ should_send, state changes and turning heartbeats are sent """
+        turning = ( MovementFlags.FORWARD.value
+                  | MovementFlags.TURN_LEFT.value )
+        self.assertTrue(self._send(
+            OpCode.MSG_MOVE_START_TURN_LEFT, running_movement(0, 0.0, turning)
+        ))
+        self.assertTrue(self._send(
+            OpCode.MSG_MOVE_HEARTBEAT, running_movement(500, 3.5, turning)
+        ))
+        self.assertTrue(self._send(
+            OpCode.MSG_MOVE_STOP, running_movement(600, 4.2, 0)
+        ))
+        self.assertFalse(self._send(
+            OpCode.MSG_MOVE_HEARTBEAT, running_movement(900, 4.2, 0)
+        ))
+
+    def test_walk_mode(self):
+        """ should_send, walking and walking back use the walk speed """
+        walk_speed = DEFAULT_SPEEDS["walk"]
+        heartbeat = OpCode.MSG_MOVE_HEARTBEAT
+        for direction in ( MovementFlags.FORWARD.value,
+                           MovementFlags.BACKWARD.value ):
+            flags = direction | MovementFlags.WALK_MODE.value
+            sign = 1 if direction == MovementFlags.FORWARD.value else -1
+            self.movement_filter.last_sent = None
+            self.assertTrue(self._send(
+                OpCode.MSG_MOVE_SET_WALK_MODE, running_movement(0, 0.0, flags)
+            ))
+            # At run speeds, the prediction would be 3.6 or 1.6 units off.
+            self.assertFalse(self._send(
+                heartbeat, running_movement(800, sign * walk_speed * 0.8, flags)
+            ))
+            # Stuck at the start: 2.25 units off.
+            self.assertTrue(self._send(
+                heartbeat, running_movement(900, 0.0, flags)
+            ))
+
+    def test_disabled(self):
+        """ should_send, all movements are sent when disabled """
+        self.movement_filter.ENABLED = False
+        for time in range(0, 2000, 500):
+            self.assertTrue(self._send(
+                OpCode.MSG_MOVE_HEARTBEAT, running_movement(time, 0.0, 0)
+            ))
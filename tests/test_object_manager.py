@@ -0,0 +1,137 @@
+import threading
+import unittest
+
+from durator.world.game.object.manager import _PlayerManager
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.player import Player
+
+
+def create_player(guid, map_id, x, y):
+    player = Player()
+    player.set(ObjectField.GUID, guid)
+    player.map_id = map_id
+    player.position.x = x
+    player.position.y = y
+    return player
+
+
+class TestObjectManager(unittest.TestCase):
+
+    def test_map_partitions(self):
+        """ players_in_range_of, players of other maps are never in range """
+        player_manager = _PlayerManager(None)
+        players = [ create_player(1, 0, 0.0, 0.0),
+                    create_player(2, 0, 10.0, 0.0),
+                    create_player(3, 1, 0.0, 0.0),
+                    create_player(4, 0, 5000.0, 0.0) ]
+        for player in players:
+            player_manager._add_to_partition(player, player.map_id)
+
+        self.assertEqual(sorted(player_manager.partitions), [0, 1])
+        in_range = player_manager.players_in_range_of
+        self.assertEqual(in_range(players[0], 50), [2])
+        self.assertEqual(in_range(players[2], 50), [])
+
+        # Player 3 changes map and gets near player 4.
+        players[2].map_id = 0
+        players[2].position.x = 5010.0
+        player_manager.update_player_position(players[2])
+        self.assertEqual(in_range(players[3], 50), [3])
+        self.assertEqual(player_manager.partitions[1].get_guids(), [])
+        self.assertIs(player_manager.get_player(3), players[2])
+
+    def test_snapshots(self):
+        """ players_in_range_of, batched moves are published as a whole """
+        player_manager = _PlayerManager(None)
+        players = [ create_player(1, 0, 0.0, 0.0),
+                    create_player(2, 0, 5000.0, 0.0) ]
+        for player in players:
+            player_manager._add_to_partition(player, player.map_id)
+        player_manager.batched_snapshots = True
+        snapshot = player_manager.snapshot
+        in_range = player_manager.players_in_range_of
+
+        players[1].position.x = 10.0
+        player_manager.update_player_position(players[1])
+        self.assertIs(player_manager.snapshot, snapshot)
+        self.assertEqual(in_range(players[0], 50), [])
+
+        player_manager.publish_snapshot()
+        self.assertEqual(in_range(players[0], 50), [2])
+        # The previous snapshot is left untouched.
+        position = players[0].position
+        self.assertEqual(snapshot.guids_in_range_of(1, 0, position, 50), [])
+        self.assertEqual(sorted(player_manager.get_guids()), [1, 2])
+
+    def test_recent_cells(self):
+        """ publish_snapshot, changed cells are merged once there are many """
+        player_manager = _PlayerManager(None)
+        player_manager.MIN_RECENT_CELLS = 2
+        mover = create_player(1, 0, 0.0, 0.0)
+        watcher = create_player(2, 0, 0.0, 0.0)
+        player_manager._add_to_partition(mover, 0)
+        player_manager._add_to_partition(watcher, 0)
+        in_range = player_manager.players_in_range_of
+
+        snapshot = player_manager.snapshot
+        cells = snapshot.cells
+        mover.position.x = 10.0
+        player_manager.update_player_position(mover)
+        self.assertIs(player_manager.snapshot.cells, cells)
+        self.assertEqual(in_range(watcher, 50), [1])
+
+        # Cells changed again replace the recent ones, until they are merged.
+        mover.position.x = 1000.0
+        player_manager.update_player_position(mover)
+        self.assertEqual(in_range(watcher, 50), [])
+        mover.position.x = 2000.0
+        player_manager.update_player_position(mover)
+        self.assertIsNot(player_manager.snapshot.cells, cells)
+        self.assertEqual(player_manager.snapshot.recent_cells, {})
+        self.assertEqual(len(player_manager.snapshot.cells), 2)
+        self.assertEqual(in_range(watcher, 50), [])
+        # Previous snapshots are left untouched.
+        position = watcher.position
+        self.assertEqual(snapshot.guids_in_range_of(2, 0, position, 50), [1])
+
+    def test_partition_locks(self):
+        """ update_player_position, moves only wait for their map """
+        player_manager = _PlayerManager(None)
+        players = [ create_player(1, 0, 0.0, 0.0),
+                    create_player(2, 1, 0.0, 0.0) ]
+        for player in players:
+            player_manager._add_to_partition(player, player.map_id)
+
+        # Another thread holds the manager lock and the lock of map 1.
+        locked = threading.Event()
+        release = threading.Event()
+        def hold_locks():
+            with player_manager.lock, player_manager.partitions[1].lock:
+                locked.set()
+                release.wait()
+        holder = threading.Thread(target = hold_locks)
+        holder.start()
+        locked.wait()
+        try:
+            players[0].position.x = 10.0
+            mover = threading.Thread(
+                target = player_manager.update_player_position,
+                args = (players[0],)
+            )
+            mover.start()
+            mover.join(timeout = 5)
+            self.assertFalse(mover.is_alive())
+        finally:
+            release.set()
+            holder.join()
+
+        # The move could not be published meanwhile, the next publication
+        # includes it.
+        player_manager.publish_snapshot()
+        self.assertEqual(player_manager.positions[1], (10.0, 0.0, 0.0))
+        self.assertEqual(
+            player_manager.snapshot.guids_in_range_of(
+                2, 0, players[1].position, 50
+            ),
+            [1]
+        )
@@ -0,0 +1,152 @@
+import unittest
+
+from durator.world.game.movement_relay_packet import MovementRelayPacket
+from durator.world.opcodes import OpCode
+from durator.world.outgoing_queue import OutgoingQueue
+from durator.world.world_connection import WorldConnection
+from durator.world.world_connection_state import WorldConnectionState
+
+
+class FakePacket(object):
+
+    def __init__(self, name, key = None, droppable = True):
+        self.name = name
+        self.key = key
+        self.droppable = droppable
+
+    def get_replace_key(self):
+        return self.key
+
+    def is_droppable(self):
+        return self.droppable
+
+
+class TestOutgoingQueue(unittest.TestCase):
+
+    def test_replace(self):
+        """ put, newer packets replace queued ones with the same key """
+        outgoing_queue = OutgoingQueue(10, 20)
+        outgoing_queue.put(FakePacket("move1", key = 1))
+        outgoing_queue.put(FakePacket("chat"))
+        outgoing_queue.put(FakePacket("move2", key = 2))
+        outgoing_queue.put(FakePacket("move1 again", key = 1))
+
+        names = [outgoing_queue.pop().name for _ in range(3)]
+        self.assertEqual(names, ["move1 again", "chat", "move2"])
+        self.assertIsNone(outgoing_queue.pop())
+        self.assertEqual(outgoing_queue.replaced, 1)
+
+        # Once sent, a key can be queued again.
+        outgoing_queue.put(FakePacket("move1 later", key = 1))
+        self.assertEqual(outgoing_queue.pop().name, "move1 later")
+
+    def test_limits(self):
+        """ put, soft limit drops new keys and hard limit refuses packets """
+        outgoing_queue = OutgoingQueue(2, 3)
+        self.assertTrue(outgoing_queue.put(FakePacket("move1", key = 1)))
+        self.assertTrue(outgoing_queue.put(FakePacket("chat1")))
+        self.assertTrue(outgoing_queue.put(FakePacket("move2", key = 2)))
+        self.assertTrue(outgoing_queue.put(FakePacket("move1 again", key = 1)))
+        self.assertTrue(outgoing_queue.put(FakePacket("chat2")))
+        self.assertFalse(outgoing_queue.put(FakePacket("chat3")))
+
+        self.assertEqual(outgoing_queue.get_stats(), {
+            "depth": 3,
+            "dropped": 1,
+            "replaced": 1
+        })
+        names = [outgoing_queue.pop().name for _ in range(3)]
+        self.assertEqual(names, ["move1 again", "chat1", "chat2"])
+
+        # Packets which can't be dropped are only refused at the hard limit.
+        outgoing_queue.put(FakePacket("chat1"))
+        outgoing_queue.put(FakePacket("chat2"))
+        self.assertTrue(outgoing_queue.put(
+            FakePacket("stop", key = 3, droppable = False)
+        ))
+        self.assertEqual(outgoing_queue.qsize(), 3)
+
+    def test_movement_relay(self):
+        """ put, relayed movements replace the queued one of their mover """
+        outgoing_queue = OutgoingQueue(2, 4)
+        start = MovementRelayPacket(OpCode.MSG_MOVE_START_FORWARD, 1, b"")
+        heartbeat = MovementRelayPacket(OpCode.MSG_MOVE_HEARTBEAT, 1, b"")
+        other = MovementRelayPacket(OpCode.MSG_MOVE_HEARTBEAT, 2, b"")
+        other_stop = MovementRelayPacket(OpCode.MSG_MOVE_STOP, 2, b"")
+        self.assertTrue(outgoing_queue.put(start))
+        self.assertTrue(outgoing_queue.put(FakePacket("chat")))
+        self.assertTrue(outgoing_queue.put(heartbeat))
+        # Past the soft limit, heartbeats of new movers are dropped, but not
+        # their stops.
+        self.assertTrue(outgoing_queue.put(other))
+        self.assertTrue(outgoing_queue.put(other_stop))
+
+        self.assertEqual(outgoing_queue.get_stats(), {
+            "depth": 3,
+            "dropped": 1,
+            "replaced": 1
+        })
+        self.assertIs(outgoing_queue.pop(), heartbeat)
+        self.assertEqual(outgoing_queue.pop().name, "chat")
+        self.assertIs(outgoing_queue.pop(), other_stop)
+
+    def test_overflow(self):
+        """ queue_packet, the connection thread handles a full queue """
+        connection = WorldConnection.__new__(WorldConnection)
+        connection._state = WorldConnectionState.IN_WORLD
+        connection.outgoing_queue = OutgoingQueue(1, 1)
+        connection.overflowed = False
+        connection.wakeup_pending = True
+        connection.socket = FakeSocket()
+
+        connection.queue_packet(FakePacket("chat1"))
+        connection.queue_packet(FakePacket("chat2"))
+        # The broadcasting thread only shuts the socket down...
+        self.assertTrue(connection.overflowed)
+        self.assertTrue(connection.socket.is_shut_down)
+        self.assertEqual(connection.state, WorldConnectionState.IN_WORLD)
+
+        # ... and the connection thread changes the state.
+        connection.server = FakeServer()
+        connection._actions_at_loop_begin()
+        self.assertEqual(connection.state, WorldConnectionState.ERROR)
+        self.assertEqual(connection.server.states, [
+            (WorldConnectionState.IN_WORLD, WorldConnectionState.ERROR)
+        ])
+
+    def test_partial_sends(self):
+        """ _send_batch, buffers partially sent are sent again from there """
+        connection = WorldConnection.__new__(WorldConnection)
+        connection.socket = FakeSocket(max_send = 3)
+        connection._send_batch([b"ab", b"cdefg", b"h", b"ijkl"])
+        self.assertEqual(connection.socket.sent, b"abcdefghijkl")
+        self.assertEqual(connection.socket.num_calls, 4)
+
+
+class FakeSocket(object):
+
+    def __init__(self, max_send = 0):
+        self.is_shut_down = False
+        self.max_send = max_send
+        self.sent = b""
+        self.num_calls = 0
+
+    def shutdown(self, how):
+        self.is_shut_down = True
+
+    def sendmsg(self, buffers):
+        """ Send at most max_send bytes of these buffers. """
+        data = b"".join(buffers)[:self.max_send]
+        self.sent += data
+        self.num_calls += 1
+        return len(data)
+
+
+class FakeServer(object):
+
+    def __init__(self):
+        self.connection_registry = self
+        self.states = []
+
+    def update_state(self, connection, old_state, new_state):
+        self.states.append((old_state, new_state))
@@ -0,0 +1,62 @@
+import unittest
+
+from durator.world.game.movement_relay_packet import MovementRelayPacket
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.player import Player
+from durator.world.game.packed_guid import pack_guid, unpack_guid
+from durator.world.game.update_object_packet import (
+    UpdateType, UpdateObjectPacket )
+from durator.world.opcodes import OpCode
+
+
+class TestPackedGuid(unittest.TestCase):
+
+    def test_pack_guid(self):
+        """ pack_guid, only non-zero bytes follow the mask """
+        self.assertEqual(pack_guid(0), b"\x00")
+        self.assertEqual(pack_guid(0x0102), b"\x03\x02\x01")
+        self.assertEqual(pack_guid(0x0100000000000005), b"\x81\x05\x01")
+
+    def test_unpack_guid(self):
+        """ unpack_guid, packed GUIDs inside a buffer """
+        for guid in (0, 1, 0xDEAD, 0x0100000000000005, 0xFFFFFFFFFFFFFFFF):
+            data = b"\xAA" + pack_guid(guid) + b"\xBB"
+            self.assertEqual(
+                unpack_guid(data, 1),
+                (guid, len(pack_guid(guid)))
+            )
+
+    def test_block_header(self):
+        """ get_block_bytes, the GUID is packed for the configured types """
+        player = Player()
+        player.set(ObjectField.GUID, 0x0102)
+        infos = { "object": player }
+        default_types = UpdateObjectPacket.PACKED_GUID_TYPES
+        try:
+            UpdateObjectPacket.PACKED_GUID_TYPES = (UpdateType.PARTIAL,)
+            packet = UpdateObjectPacket(UpdateType.PARTIAL, infos)
+            self.assertEqual(packet.get_block_bytes()[:4], b"\x00\x03\x02\x01")
+            UpdateObjectPacket.PACKED_GUID_TYPES = ()
+            packet = UpdateObjectPacket(UpdateType.PARTIAL, infos)
+            self.assertEqual(
+                packet.get_block_bytes()[:9],
+                b"\x00\x02\x01\x00\x00\x00\x00\x00\x00"
+            )
+        finally:
+            UpdateObjectPacket.PACKED_GUID_TYPES = default_types
+
+    def test_movement_relay(self):
+        """ MovementRelayPacket, the GUID is packed with movement blocks """
+        opcode = OpCode.MSG_MOVE_HEARTBEAT
+        default_types = UpdateObjectPacket.PACKED_GUID_TYPES
+        try:
+            UpdateObjectPacket.PACKED_GUID_TYPES = (UpdateType.MOVEMENT,)
+            packet = MovementRelayPacket(opcode, 0x0102, b"\xAA")
+            self.assertEqual(packet.data, b"\x03\x02\x01\xAA")
+            UpdateObjectPacket.PACKED_GUID_TYPES = (UpdateType.PARTIAL,)
+            packet = MovementRelayPacket(opcode, 0x0102, b"\xAA")
+            self.assertEqual(
+                packet.data, b"\x02\x01\x00\x00\x00\x00\x00\x00\xAA"
+            )
+        finally:
+            UpdateObjectPacket.PACKED_GUID_TYPES = default_types
@@ -0,0 +1,49 @@
+import unittest
+
+from durator.world.game.object.object_fields import (
+    ObjectField, UnitField, PlayerField )
+from durator.world.game.object.type.base_object import (
+    ObjectType, OBJECT_TYPE_TO_FLAGS )
+from durator.world.game.object.type.player import Player
+from durator.world.game.player_spawn_packet import (
+    PlayerSpawnPacket, PLAYER_SPAWN_FIELDS )
+
+
+def create_player():
+    player = Player()
+    for field in PLAYER_SPAWN_FIELDS:
+        player.set(field, 0)
+    player.set(ObjectField.GUID, 1)
+    player.set(ObjectField.TYPE, OBJECT_TYPE_TO_FLAGS[ObjectType.PLAYER])
+    return player
+
+
+def spawn_packet(player):
+    return PlayerSpawnPacket({ "object": player, "is_player": False })
+
+
+class TestPlayerSpawnPacket(unittest.TestCase):
+
+    def test_fields_cache(self):
+        """ fields bytes are cached until a spawn field changes """
+        player = create_player()
+        fields_bytes = spawn_packet(player).get_fields_bytes()
+        self.assertIs(spawn_packet(player).get_fields_bytes(), fields_bytes)
+
+        # Fields not sent at spawn do not invalidate the cache...
+        player.set(PlayerField.TRACK_CREATURES, 1)
+        self.assertIs(spawn_packet(player).get_fields_bytes(), fields_bytes)
+        # ... but spawn and skill fields do.
+        player.set(UnitField.HEALTH, 10)
+        health_bytes = spawn_packet(player).get_fields_bytes()
+        self.assertNotEqual(health_bytes, fields_bytes)
+        player.set(PlayerField.SKILL_INFO_1_ID.value, 5)
+        skill_bytes = spawn_packet(player).get_fields_bytes()
+        self.assertGreater(len(skill_bytes), len(health_bytes))
+
+    def test_movement_read_when_sent(self):
+        """ the movement part is not cached with the fields """
+        player = create_player()
+        first_block = spawn_packet(player).get_block_bytes()
+        player.movement.position.x = 1.0
+        self.assertNotEqual(spawn_packet(player).get_block_bytes(), first_block)
@@ -0,0 +1,76 @@
+import random
+import unittest
+
+from durator.world.game.object.manager import _PlayerManager
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.proximity_engine import (
+    ProximityEngine, NUMPY_AVAILABLE )
+from durator.world.game.object.type.player import Player
+from durator.world.game.position import Position
+
+
+def visibility_by_scan(positions, dist_range):
+    visibility = {}
+    for guid, (map_id, position) in positions.items():
+        visibility[guid] = {
+            other_guid for other_guid, (other_map_id, other_position)
+            in positions.items()
+            if other_guid != guid and other_map_id == map_id
+            and position.distance_from(other_position) < dist_range
+        }
+    return visibility
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is not available")
+class TestProximityEngine(unittest.TestCase):
+
+    def test_get_visibility(self):
+        """ get_visibility, same results as a full scan """
+        random.seed(0)
+        engine = ProximityEngine(100.0)
+        positions = {}
+        for guid in range(1, 601):
+            map_id = random.choice([0, 1])
+            position = Position( random.uniform(-500, 500),
+                                 random.uniform(-500, 500),
+                                 random.uniform(-50, 50) )
+            positions[guid] = (map_id, position)
+            engine.set_position(
+                guid, map_id, position.x, position.y, position.z
+            )
+        for guid in range(1, 601, 7):
+            del positions[guid]
+            engine.remove(guid)
+
+        expected = visibility_by_scan(positions, 100.0)
+        visibility = engine.get_visibility()
+        self.assertEqual(
+            { guid: set(guids) for guid, guids in visibility.items() },
+            expected
+        )
+
+    def test_snapshot_visibility(self):
+        """ players_in_range_of, uses the visibility published at ticks """
+        player_manager = _PlayerManager(None)
+        player_manager.proximity_engine = ProximityEngine(50.0)
+        player_manager.batched_snapshots = True
+        players = []
+        for guid, x in ((1, 0.0), (2, 10.0), (3, 500.0)):
+            player = Player()
+            player.set(ObjectField.GUID, guid)
+            player.position.x = x
+            player_manager._add_to_partition(player, 0)
+            players.append(player)
+
+        player_manager.publish_snapshot(with_visibility = True)
+        self.assertEqual(player_manager.snapshot.visibility[1], (2,))
+        self.assertEqual(player_manager.players_in_range_of(players[0], 50.0),
+                         [2])
+
+        players[2].position.x = 20.0
+        player_manager.update_player_position(players[2])
+        player_manager.publish_snapshot(with_visibility = True)
+        self.assertEqual(
+            sorted(player_manager.players_in_range_of(players[0], 50.0)),
+            [2, 3]
+        )
@@ -0,0 +1,32 @@
+import unittest
+
+from durator.world.game.object.spatial_grid import SpatialGrid
+from durator.world.game.position import Position
+
+
+class TestSpatialGrid(unittest.TestCase):
+
+    def test_guids_near(self):
+        """ guids_near, only neighbour cells of the same map are visited """
+        grid = SpatialGrid(100.0)
+        grid.add(1, 0, Position(10.0, 10.0))
+        grid.add(2, 0, Position(-150.0, 50.0))
+        grid.add(3, 0, Position(450.0, 10.0))
+        grid.add(4, 1, Position(10.0, 10.0))
+
+        self.assertEqual(sorted(grid.guids_near(0, Position(), 100.0)), [1])
+        self.assertEqual(sorted(grid.guids_near(0, Position(), 150.0)), [1, 2])
+        self.assertEqual(grid.guids_near(1, Position(), 50.0), [4])
+
+    def test_move_and_remove(self):
+        """ move and remove, cells follow objects and empty cells disappear """
+        grid = SpatialGrid(100.0)
+        grid.add(1, 0, Position(10.0, 10.0))
+        self.assertFalse(grid.move(1, 0, Position(20.0, 90.0)))
+        self.assertTrue(grid.move(1, 0, Position(1000.0, 10.0)))
+        self.assertEqual(grid.guids_near(0, Position(), 100.0), [])
+        self.assertEqual(grid.guids_near(0, Position(1000.0, 0.0), 10.0), [1])
+
+        grid.remove(1)
+        self.assertEqual(grid.cells, {})
+        self.assertEqual(grid.guid_cells, {})
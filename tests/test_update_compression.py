@@ -0,0 +1,35 @@
+import os
+import unittest
+import zlib
+
+from durator.world.game.update_compression import UpdateCompression
+from durator.world.opcodes import OpCode
+
+
+class TestUpdateCompression(unittest.TestCase):
+
+    def test_compress(self):
+        """ compress, only data above the threshold that gets smaller """
+        compression = UpdateCompression(threshold = 100, level = 6)
+
+        small_data = bytes(99)
+        opcode, data = compression.compress(small_data)
+        self.assertEqual(opcode, OpCode.SMSG_UPDATE_OBJECT)
+        self.assertIs(data, small_data)
+
+        big_data = bytes(1000)
+        opcode, data = compression.compress(big_data)
+        self.assertEqual(opcode, OpCode.SMSG_COMPRESSED_UPDATE_OBJECT)
+        size = UpdateCompression.SIZE_BIN.unpack(data[:4])[0]
+        self.assertEqual(size, 1000)
+        self.assertEqual(zlib.decompress(data[4:]), big_data)
+        compressed_size = len(data)
+
+        random_data = os.urandom(1000)
+        opcode, data = compression.compress(random_data)
+        self.assertEqual(opcode, OpCode.SMSG_UPDATE_OBJECT)
+        self.assertIs(data, random_data)
+
+        stats = compression.get_stats()
+        self.assertEqual(stats["num_compressed"], 1)
+        self.assertEqual(stats["bytes_saved"], 1000 - compressed_size)
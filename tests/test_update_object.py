@@ -1,35 +1,60 @@
 import unittest
 
-from durator.world.handlers.game.player_login import *
+from durator.world.game.movement import MovementFlags
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.player import Player
+from durator.world.game.update_object_packet import (
+    UpdateBlocksBuilder, UpdateObjectPacket, UpdateType )
 
 
 class TestUpdateObject(unittest.TestCase):
 
     def test_add(self):
         """ add, simple fields add cases """
-        update = ObjectUpdate()
+        update = UpdateBlocksBuilder()
 
-        update.add(UpdateFieldObject.GUID, 0xDEAD)
-        self.assertEquals(update.mask_blocks, [0b00011])
-        self.assertEquals(len(update.update_blocks), 1)
+        update.add(ObjectField.GUID, 0xDEAD)
+        self.assertEqual(update.mask, 0b00011)
+        self.assertEqual(len(update.slot_values), 2)
 
-        update.add(UpdateFieldObject.SCALE_X, 1.0)
-        self.assertEquals(update.mask_blocks, [0b10011])
-        self.assertEquals(len(update.update_blocks), 2)
+        update.add(ObjectField.SCALE_X, 1.0)
+        self.assertEqual(update.mask, 0b10011)
+        self.assertEqual(len(update.slot_values), 3)
 
-        update.add(UpdateFieldObject.TYPE, 0x19)
-        self.assertEquals(update.mask_blocks, [0b10111])
-        self.assertEquals(len(update.update_blocks), 3)
+        update.add(ObjectField.TYPE, 0x19)
+        self.assertEqual(update.mask, 0b10111)
+        self.assertEqual(len(update.slot_values), 4)
 
     def test_to_bytes(self):
         """ to_bytes, with a few simple fields """
-        update = ObjectUpdate()
-        update.add(UpdateFieldObject.GUID, 0xDEAD)
-        update.add(UpdateFieldObject.SCALE_X, 1.0)
-        update.add(UpdateFieldObject.TYPE, 0x19)
+        update = UpdateBlocksBuilder()
+        update.add(ObjectField.GUID, 0xDEAD)
+        update.add(ObjectField.SCALE_X, 1.0)
+        update.add(ObjectField.TYPE, 0x19)
         data = update.to_bytes()
-        expected = ( int.to_bytes(0b10111, 4, "little") +
+        expected = ( b"\x01" +
+                     int.to_bytes(0b10111, 4, "little") +
                      b"\xAD\xDE\x00\x00\x00\x00\x00\x00" +
-                     b"\x00\x00\x80\x3F" +
-                     b"\x19\x00\x00\x00" )
-        self.assertEquals(data, expected)
+                     b"\x19\x00\x00\x00" +
+                     b"\x00\x00\x80\x3F" )
+        self.assertEqual(data, expected)
+
+    def test_fields_only_in_field_updates(self):
+        """ add_field, ignored by update types without fields """
+        infos = { "object": Player(), "is_player": False }
+        update_packet = UpdateObjectPacket(UpdateType.MOVEMENT, infos)
+        # All implemented types have fields, pretend this one does not.
+        update_packet.TYPES_WITH_FIELDS = ()
+        update_packet.add_field(ObjectField.GUID, 1)
+        update_packet.add_object_fields(0b11)
+        self.assertEqual(update_packet.blocks_builder.mask, 0)
+
+    def test_droppable_movement(self):
+        """ is_droppable, movement updates of a stopped object are kept """
+        player = Player()
+        update_packet = UpdateObjectPacket(
+            UpdateType.MOVEMENT, { "object": player }
+        )
+        self.assertFalse(update_packet.is_droppable())
+        player.movement.flags = MovementFlags.FORWARD.value
+        self.assertTrue(update_packet.is_droppable())
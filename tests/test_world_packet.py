@@ -0,0 +1,122 @@
+import select
+import socket
+import unittest
+
+from durator.common.crypto.session_cipher import SessionCipher
+from durator.world.opcodes import OpCode
+from durator.world.world_packet import WorldPacket, WorldPacketReceiver
+
+
+SESSION_KEY = bytes(range(1, 41))
+
+
+def client_packet(opcode, data):
+    size = int.to_bytes(len(data) + 4, 2, "big")
+    return size + int.to_bytes(opcode.value, 4, "little") + data
+
+
+def client_encrypt(packets):
+    """ Encrypt the client headers like the client would. """
+    encrypted = b""
+    key_index, last_byte = 0, 0
+    for packet in packets:
+        header = bytearray(packet[:6])
+        for index in range(6):
+            enc = ((header[index] ^ SESSION_KEY[key_index]) + last_byte) % 0x100
+            header[index] = last_byte = enc
+            key_index = (key_index + 1) % len(SESSION_KEY)
+        encrypted += bytes(header) + packet[6:]
+    return encrypted
+
+
+PING    = client_packet(OpCode.CMSG_PING, b"\x01\x00\x00\x00")
+BIG     = client_packet(OpCode.CMSG_PING, bytes(range(256)) * 64)
+PACKETS = [PING, BIG, PING]
+
+
+class TestWorldPacket(unittest.TestCase):
+
+    def test_split_and_coalesced(self):
+        """ get_next_packet, with packets sent in arbitrary pieces """
+        client, server = socket.socketpair()
+        client.sendall(b"".join(PACKETS))
+        client.close()
+
+        receiver = WorldPacketReceiver(server)
+        for expected in PACKETS:
+            packet = receiver.get_next_packet()
+            self.assertEqual(packet.opcode, OpCode.CMSG_PING)
+            self.assertEqual(bytes(packet.data), expected[6:])
+        self.assertFalse(receiver.has_buffered_data())
+        self.assertIsNone(receiver.get_next_packet())
+        server.close()
+
+    def test_encrypted_headers(self):
+        """ get_next_packet, decrypting headers in place """
+        client, server = socket.socketpair()
+        client.sendall(client_encrypt(PACKETS))
+        client.close()
+
+        receiver = WorldPacketReceiver(server)
+        receiver.session_cipher = SessionCipher(SESSION_KEY)
+        for expected in PACKETS:
+            packet = receiver.get_next_packet()
+            self.assertEqual(packet.opcode, OpCode.CMSG_PING)
+            self.assertEqual(bytes(packet.data), expected[6:])
+        server.close()
+
+    def test_buffer_reuse(self):
+        """ get_next_packet, many packets going through the same buffer """
+        client, server = socket.socketpair()
+        receiver = WorldPacketReceiver(server)
+        for _ in range(100):
+            client.sendall(PING * 37 + BIG)
+            for _ in range(37):
+                packet = receiver.get_next_packet()
+                self.assertEqual(bytes(packet.data), PING[6:])
+            packet = receiver.get_next_packet()
+            self.assertEqual(bytes(packet.data), BIG[6:])
+        self.assertFalse(receiver.has_buffered_data())
+        client.close()
+        server.close()
+
+    def test_wait_for_data(self):
+        """ get_next_packet, interrupted and resumed in a partial packet """
+        client, server = socket.socketpair()
+
+        def wait_for_data():
+            if not select.select([server], [], [], 0)[0]:
+                raise socket.timeout()
+
+        receiver = WorldPacketReceiver(server, wait_for_data = wait_for_data)
+        for piece in (BIG[:3], BIG[3:100]):
+            client.sendall(piece)
+            with self.assertRaises(socket.timeout):
+                receiver.get_next_packet()
+            self.assertTrue(receiver.has_buffered_data())
+        client.sendall(BIG[100:])
+        packet = receiver.get_next_packet()
+        self.assertEqual(bytes(packet.data), BIG[6:])
+        client.close()
+        server.close()
+
+    def test_invalid_size(self):
+        """ get_next_packet, sizes not covering the opcode are refused """
+        client, server = socket.socketpair()
+        client.sendall(b"\x00\x02" + bytes(4))
+        receiver = WorldPacketReceiver(server)
+        self.assertIsNone(receiver.get_next_packet())
+        client.close()
+        server.close()
+
+    def test_to_buffers(self):
+        """ to_buffers, the body is built once and shared by recipients """
+        packet = WorldPacket(OpCode.SMSG_PONG, b"\x01\x00\x00\x00")
+        header_1, body_1 = packet.to_buffers(SessionCipher(SESSION_KEY))
+        packet.data = b""  # ignored, the packet is frozen
+        header_2, body_2 = packet.to_buffers(SessionCipher(bytes(40)))
+
+        self.assertIs(body_1, body_2)
+        self.assertEqual(body_1, b"\x01\x00\x00\x00")
+        self.assertNotEqual(header_1, header_2)
+        self.assertEqual(packet.to_socket(), b"\x00\x06\xDD\x01" + body_1)
@@ -0,0 +1,93 @@
+import concurrent.futures
+import threading
+import time
+import unittest
+
+from durator.world.world_thread import WorldThread
+
+
+class FakeServer(object):
+
+    def __init__(self):
+        self.shutdown_flag = threading.Event()
+        self.world_tick = self
+        self.num_ticks = 0
+
+    def is_enabled(self):
+        return True
+
+    def get_period(self):
+        return 0.01
+
+    def flush(self):
+        self.num_ticks += 1
+
+
+class TestWorldThread(unittest.TestCase):
+
+    def test_process_messages(self):
+        """ process_messages, messages run in order and fill their futures """
+        world_thread = WorldThread(FakeServer())
+        processed = []
+        future_1 = world_thread.post(processed.append, 1)
+        future_2 = world_thread.post(processed.append, 2)
+        future_error = world_thread.post(int, "not a number")
+        self.assertEqual(processed, [])
+
+        world_thread.process_messages()
+        self.assertEqual(processed, [1, 2])
+        self.assertIsNone(future_1.result())
+        self.assertTrue(future_2.done())
+        self.assertIsInstance(future_error.exception(), ValueError)
+        self.assertEqual(world_thread.get_stats()["messages"], 3)
+
+    def test_run(self):
+        """ run, calls from other threads wait for the world thread """
+        server = FakeServer()
+        world_thread = WorldThread(server)
+        thread = threading.Thread(target = world_thread.run)
+        thread.start()
+        try:
+            thread_id = world_thread.call(threading.get_ident)
+            self.assertEqual(thread_id, thread.ident)
+            nested = world_thread.call(world_thread.call, threading.get_ident)
+            self.assertEqual(nested, thread.ident)
+            time.sleep(0.05)
+        finally:
+            server.shutdown_flag.set()
+            thread.join()
+        self.assertGreater(server.num_ticks, 0)
+
+    def test_stop(self):
+        """ call, messages left at stop run in the calling threads """
+        world_thread = WorldThread(FakeServer())
+        future = world_thread.post(threading.get_ident)
+        results = []
+        caller = threading.Thread(
+            target = lambda: results.append(
+                world_thread.call(threading.get_ident)
+            )
+        )
+        caller.start()
+        while world_thread.messages.qsize() < 2:
+            time.sleep(0.001)
+
+        world_thread._stop()
+        caller.join()
+        self.assertTrue(future.cancelled())
+        self.assertEqual(results, [caller.ident])
+        # Later messages are run right away.
+        self.assertEqual(
+            world_thread.call(threading.get_ident), threading.get_ident()
+        )
+        self.assertEqual(world_thread.post(int, "1").result(), 1)
+
+    def test_call_timeout(self):
+        """ call, the caller stops waiting after CALL_TIMEOUT """
+        world_thread = WorldThread(FakeServer())
+        world_thread.CALL_TIMEOUT = 0.01
+        processed = []
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            world_thread.call(processed.append, 1)
+        world_thread.process_messages()
+        self.assertEqual(processed, [])
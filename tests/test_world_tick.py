@@ -0,0 +1,74 @@
+import unittest
+
+from durator.world.game.destroy_object_packet import DestroyObjectPacket
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.player import Player
+from durator.world.game.update_object_packet import (
+    UpdateType, UpdateObjectPacket, MultiUpdateObjectPacket )
+from durator.world.world_connection import WorldConnection
+from durator.world.world_tick import WorldTick
+
+
+def movement_packet(guid):
+    player = Player()
+    player.set(ObjectField.GUID, guid)
+    infos = { "object": player, "is_player": False }
+    return UpdateObjectPacket(UpdateType.MOVEMENT, infos)
+
+
+class TestWorldTick(unittest.TestCase):
+
+    def test_merge_packets(self):
+        """ _merge_packets, update runs are merged and deduplicated """
+        move_1, move_2, move_1_again = [ movement_packet(1),
+                                         movement_packet(2),
+                                         movement_packet(1) ]
+        destroy = DestroyObjectPacket(3)
+        move_3 = movement_packet(3)
+
+        merged = WorldTick._merge_packets(
+            [move_1, move_2, move_1_again, destroy, move_3]
+        )
+        self.assertEqual(len(merged), 3)
+        self.assertIsInstance(merged[0], MultiUpdateObjectPacket)
+        self.assertEqual(merged[0].update_packets, [move_1_again, move_2])
+        self.assertIs(merged[1], destroy)
+        self.assertIs(merged[2], move_3)
+
+    def test_fields_without_ticks(self):
+        """ _actions_at_loop_end, changed fields are sent without ticks """
+        sent = []
+        server = FakeServer(sent)
+        connection = WorldConnection.__new__(WorldConnection)
+        connection.server = server
+        connection.overflowed = False
+        connection.player = Player()
+        connection.player.clear_dirty_fields()
+
+        connection._actions_at_loop_end()
+        self.assertEqual(sent, [])
+        connection.player.set(ObjectField.GUID, 1)
+        connection._actions_at_loop_end()
+        self.assertEqual(sent, [connection.player])
+
+        server.tick_rate = 10
+        connection._actions_at_loop_end()
+        self.assertEqual(sent, [connection.player])
+
+
+class FakeServer(object):
+
+    def __init__(self, sent):
+        self.world_tick = self
+        self.object_manager = self
+        self.tick_rate = 0
+        self.sent = sent
+
+    def is_enabled(self):
+        return self.tick_rate > 0
+
+    def update_fields(self, player):
+        self.sent.append(player)
+
+    def post_to_world(self, func, *args):
+        func(*args)